@@ -1,3 +1,4 @@
+from fastapi import APIRouter
 from app.api.endpoints import transcript, degree_plan, chat
 
 api_router = APIRouter()
@@ -1,13 +1,80 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.schemas.chat import ChatRequest, ChatResponse
-from app.services.rag_service import rag_service
+from app.services.rag_service import RAGService, get_rag_service
+import asyncio
+import json
+import os
 
 router = APIRouter()
 
+# How often a streaming answer checks that its client is still connected
+STREAM_DISCONNECT_POLL_SECONDS = float(os.getenv("STREAM_DISCONNECT_POLL_SECONDS", "0.5"))
+
+def rag_service_dependency() -> RAGService:
+    # Sync dependency: FastAPI runs it in the threadpool, so a first-time init does not block the loop
+    try:
+        return get_rag_service()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Chat is unavailable: {e}")
+
 @router.post("/message", response_model=ChatResponse)
-async def chat_message(request: ChatRequest):
+async def chat_message(request: ChatRequest, rag_service: RAGService = Depends(rag_service_dependency)):
     try:
-        answer = await rag_service.get_answer(request.message)
+        answer = await rag_service.get_answer(request.message, request.filters())
         return ChatResponse(response=answer)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, http_request: Request, rag_service: RAGService = Depends(rag_service_dependency)):
+    """
+    Server-sent events: one `retrieval` event with the sources, then `token`
+    events as the answer is generated, then `done` (or `error`).
+    """
+    async def event_stream():
+        # One task drives the upstream stream into the queue, which ends with
+        # None once that task is over; the watcher cancels it when the client
+        # leaves, even while a token is still pending
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            stream = rag_service.stream_answer(request.message, request.filters())
+            try:
+                async for event, data in stream:
+                    queue.put_nowait((event, data))
+                queue.put_nowait(("done", {}))
+            except Exception as e:
+                queue.put_nowait(("error", {"detail": str(e)}))
+            finally:
+                await stream.aclose()
+
+        async def watch_disconnect():
+            while not await http_request.is_disconnected():
+                await asyncio.sleep(STREAM_DISCONNECT_POLL_SECONDS)
+            # Stop paying for tokens nobody will read
+            producer.cancel()
+
+        producer = asyncio.create_task(produce())
+        # Also when it is cancelled before it ever ran
+        producer.add_done_callback(lambda _: queue.put_nowait(None))
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            while (item := await queue.get()) is not None:
+                yield _sse(*item)
+        finally:
+            watcher.cancel()
+            producer.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/cache/stats")
+async def chat_cache_stats(rag_service: RAGService = Depends(rag_service_dependency)):
+    return rag_service.cache_stats()
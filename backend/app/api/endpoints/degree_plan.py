@@ -1,17 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import List, Optional
+import json
+import os
 from app.core.database import get_db
+from app.schemas.planner import AuditResult, CourseRequirement, DegreePlanDocument, PlanResponse, PlanView, RequirementSource
 from app.schemas.student import StudentProfile
 from app.services.degree_planner import DegreePlannerService
+from app.services.plan_index import plan_index
+from app.services.requirement_tables import requirements_with_course
 
 router = APIRouter()
 
-@router.post("/generate", response_model=dict)
-async def generate_degree_plan(profile: StudentProfile, db: Session = Depends(get_db)):
+# Profiles per batch planning request
+PLANNER_BATCH_MAX_PROFILES = int(os.getenv("PLANNER_BATCH_MAX_PROFILES", "20000"))
+# How long clients may reuse GET /plan before revalidating with If-None-Match
+PLANNER_PLAN_MAX_AGE_SECONDS = int(os.getenv("PLANNER_PLAN_MAX_AGE_SECONDS", "300"))
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak validators ("W/...") compare equal to strong ones for If-None-Match
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+@router.post("/generate", response_model=PlanResponse)
+def generate_degree_plan(profile: StudentProfile, view: PlanView = PlanView.compact, db: Session = Depends(get_db)):
+    """
+    `view=compact` (default) returns the schedule with course codes and
+    credits; fetch the plan itself once from GET /plan (its ETag is
+    `plan_fingerprint`). `view=full` adds the profile and the whole plan,
+    `view=diff` returns only the missing requirements and the courses taken
+    outside the plan.
+    """
+    # A plain def: FastAPI runs it in the threadpool, so the planner's queries and
+    # CPU work never block the event loop
     planner = DegreePlannerService(db)
-    result = planner.generate_plan(profile)
+    result = planner.generate_plan(profile, view)
     
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
         
     return result
+
+@router.get("/plan", response_model=DegreePlanDocument)
+def get_degree_plan(
+    response: Response,
+    major: str = "Computer Science",
+    catalog_year: str = "2024-2025",
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    compiled_plan = plan_index.get(db, major, catalog_year)
+    if not compiled_plan:
+        raise HTTPException(status_code=404, detail="No degree plan found in database.")
+
+    headers = {
+        "ETag": f'"{compiled_plan.fingerprint}"',
+        "Cache-Control": f"public, max-age={PLANNER_PLAN_MAX_AGE_SECONDS}",
+    }
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return DegreePlanDocument(
+        plan=compiled_plan.name,
+        catalog_year=compiled_plan.catalog_year,
+        plan_fingerprint=compiled_plan.fingerprint,
+        plan_structure=compiled_plan.plan_structure,
+    )
+
+@router.post("/batch")
+def generate_degree_plans(profiles: List[StudentProfile], db: Session = Depends(get_db)):
+    """
+    Plans many students in one call (e.g. a whole cohort after a catalog
+    change) and streams one NDJSON line per student. Lines carry the
+    profile's position in `index`; the full plan is not repeated per line.
+    """
+    if len(profiles) > PLANNER_BATCH_MAX_PROFILES:
+        raise HTTPException(status_code=413, detail=f"At most {PLANNER_BATCH_MAX_PROFILES} profiles per batch")
+
+    planner = DegreePlannerService(db)
+    results = planner.generate_plans(profiles)
+    # Sync generator: Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse((json.dumps(result) + "\n" for result in results), media_type="application/x-ndjson")
+
+@router.post("/audit", response_model=List[AuditResult])
+def audit_degree_requirements(profiles: List[StudentProfile], source: RequirementSource = RequirementSource.plan, db: Session = Depends(get_db)):
+    """
+    Missing requirements of many students, against the four-year plan
+    (`source=plan`) or the degree requirement blocks
+    (`source=requirements`), in one query over the normalized tables.
+    """
+    if len(profiles) > PLANNER_BATCH_MAX_PROFILES:
+        raise HTTPException(status_code=413, detail=f"At most {PLANNER_BATCH_MAX_PROFILES} profiles per batch")
+    return DegreePlannerService(db).audit(profiles, source)
+
+@router.get("/requirements", response_model=List[CourseRequirement])
+def get_course_requirements(course: str, db: Session = Depends(get_db)):
+    """Every plan slot and degree requirement a course counts toward, e.g. `?course=CSCI 311`."""
+    return requirements_with_course(db, course)
@@ -1,37 +1,120 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List
 from app.schemas.student import StudentProfile, TranscriptUploadResponse
-from app.services.transcript_parser import parser_service
-import shutil
+from app.services.transcript_executor import ParserBusyError, transcript_executor
+import asyncio
+import json
 import os
-import tempfile
+import zipfile
 
 router = APIRouter()
 
+# Transcripts are a few pages; anything larger is not one
+TRANSCRIPT_MAX_BYTES = int(os.getenv("TRANSCRIPT_MAX_BYTES", str(10 * 1024 * 1024)))
+# PDFs per batch request, counting the ones inside zip archives
+TRANSCRIPT_BATCH_MAX_FILES = int(os.getenv("TRANSCRIPT_BATCH_MAX_FILES", "500"))
+
+def _busy() -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many transcripts are being parsed, try again shortly", headers={"Retry-After": "5"})
+
 @router.post("/upload", response_model=TranscriptUploadResponse)
 async def upload_transcript(file: UploadFile = File(...)):
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-    # Save temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
+    # Reject before reading the upload when every parse slot is taken
+    if transcript_executor.is_full():
+        raise _busy()
+
+    # Keep the upload in memory: the worker parses the bytes directly, no temp file
+    data = await file.read(TRANSCRIPT_MAX_BYTES + 1)
+    if len(data) > TRANSCRIPT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Transcript PDF is too large")
 
     try:
-        # Parse
-        profile = parser_service.parse_pdf(tmp_path)
+        # Parse in the process pool so the event loop stays free
+        profile = await transcript_executor.parse_pdf(data)
         return TranscriptUploadResponse(
             success=True,
             profile=profile,
             message="Transcript parsed successfully"
         )
+    except ParserBusyError:
+        raise _busy()
     except Exception as e:
         return TranscriptUploadResponse(
             success=False,
             profile=StudentProfile(),
             message=f"Error parsing transcript: {str(e)}"
         )
-    finally:
-        # Cleanup
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+
+def _failed(message: str):
+    async def load():
+        raise ValueError(message)
+    return load
+
+def _upload_loader(upload: UploadFile):
+    async def load():
+        data = await upload.read(TRANSCRIPT_MAX_BYTES + 1)
+        if len(data) > TRANSCRIPT_MAX_BYTES:
+            raise ValueError("Transcript PDF is too large")
+        return data
+    return load
+
+def _zip_member_loader(archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+    async def load():
+        # Inflating is blocking file I/O and CPU; ZipFile reads are thread-safe
+        return await asyncio.to_thread(archive.read, info)
+    return load
+
+async def _batch_jobs(files: List[UploadFile]):
+    # One (name, loader) per PDF; bad entries become jobs that fail on their own
+    jobs = []
+    for upload in files:
+        name = upload.filename or "upload"
+        if name.lower().endswith(".pdf"):
+            jobs.append((name, _upload_loader(upload)))
+        elif name.lower().endswith(".zip"):
+            try:
+                # Reads the central directory from the spooled (possibly on-disk) upload
+                archive = await asyncio.to_thread(zipfile.ZipFile, upload.file)
+            except zipfile.BadZipFile:
+                jobs.append((name, _failed("Not a valid zip archive")))
+                continue
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                    continue
+                member = f"{name}/{info.filename}"
+                # file_size is the uncompressed size, so zip bombs are refused before reading
+                if info.file_size > TRANSCRIPT_MAX_BYTES:
+                    jobs.append((member, _failed("Transcript PDF is too large")))
+                else:
+                    jobs.append((member, _zip_member_loader(archive, info)))
+        else:
+            jobs.append((name, _failed("Only PDF or zip files are allowed")))
+    return jobs
+
+@router.post("/batch")
+async def upload_transcript_batch(files: List[UploadFile] = File(...)):
+    """
+    Parses many transcripts (PDFs and/or zip archives of PDFs) in parallel and
+    streams one NDJSON line per file as it finishes:
+    {"file", "success", "profile" | "error", "completed", "total"}.
+    """
+    jobs = await _batch_jobs(files)
+    if len(jobs) > TRANSCRIPT_BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {TRANSCRIPT_BATCH_MAX_FILES} transcripts per batch")
+
+    async def results():
+        completed = 0
+        async for name, outcome in transcript_executor.parse_batch(jobs):
+            completed += 1
+            line = {"file": name, "completed": completed, "total": len(jobs)}
+            if isinstance(outcome, Exception):
+                line.update(success=False, error=f"Error parsing transcript: {outcome}")
+            else:
+                line.update(success=True, profile=outcome.model_dump())
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
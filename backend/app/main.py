@@ -1,10 +1,40 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.database import async_engine
+from app.services.rag_service import init_rag_service
+from app.services.transcript_executor import transcript_executor
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the RAG clients and warm the pools in the background so the API
+    # starts serving right away; chat requests wait for (or retry) the same init
+    async def warm_up():
+        try:
+            await init_rag_service()
+        except Exception as e:
+            logger.warning(f"RAG service unavailable at startup: {e}")
+
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+    # Let it unwind before the pools it may be opening are torn down
+    with suppress(asyncio.CancelledError):
+        await warm_up_task
+    transcript_executor.shutdown()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="Ole Miss Virtual Academic Advisor",
     description="AI-powered academic advisor for Ole Miss CS students",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -1,2 +1,4 @@
-from app.models.course import Course, DegreePlan
+from app.models.course import CatalogPolicy, Course, DegreePlan, DegreeRequirement
+from app.models.rag import CollectionVersion, EmbeddingCacheEntry
+from app.models.requirement import Requirement, RequirementOption, RequirementPrefix
 # Import other models here as we add them
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, JSON, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -25,3 +25,31 @@ class DegreePlan(Base):
     # Stores the entire 4-year structure as a JSON blob for easy retrieval
     # Structure: { "freshman": { "fall": [...], "spring": [...] }, ... }
     plan_structure = Column(JSON) 
+
+    # The bulk loader (data/ingest_structured.py) upserts plans by name
+    __table_args__ = (Index("uq_degree_plans_name", "name", unique=True),)
+
+class DegreeRequirement(Base):
+    __tablename__ = "degree_requirements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    program = Column(String, nullable=False) # e.g., "BS in Computer Science"
+    catalog_year = Column(String, nullable=False)
+    min_total_credits = Column(Integer)
+
+    # Requirement blocks as in degree_requirements.json:
+    # { "general_education": { "requirements": [...] }, ... }
+    blocks = Column(JSON)
+
+    __table_args__ = (UniqueConstraint("program", "catalog_year", name="uq_degree_requirements_program_year"),)
+
+class CatalogPolicy(Base):
+    __tablename__ = "catalog_policies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    program = Column(String, nullable=False)
+    catalog_year = Column(String, nullable=False)
+    key = Column(String, nullable=False) # e.g., "credit_max_standard"
+    value = Column(JSON) # number or text, as in policies.json
+
+    __table_args__ = (UniqueConstraint("program", "catalog_year", "key", name="uq_catalog_policies_program_year_key"),)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, LargeBinary, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CollectionVersion(Base):
+    __tablename__ = "rag_collection_versions"
+
+    # Bumped by data/ingest_rag.py after every ingest so API processes can drop cached answers
+    collection_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "rag_embedding_cache"
+
+    # Written by CachedEmbeddings; a vector depends only on the model, the task
+    # ("query" and "document" embed differently) and the text
+    model = Column(String, primary_key=True)
+    task = Column(String, primary_key=True)
+    content_hash = Column(String(64), primary_key=True)
+    # float32 bytes
+    embedding = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
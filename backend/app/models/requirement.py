@@ -0,0 +1,54 @@
+from sqlalchemy import CheckConstraint, Column, ForeignKey, Index, Integer, PrimaryKeyConstraint, String, Text
+from app.core.database import Base
+
+# Normalized copies of the plan_structure and blocks JSON, rebuilt by
+# data/ingest_structured.py, so "who needs CSCI 211" is an index lookup
+# instead of a scan of every blob
+
+class Requirement(Base):
+    __tablename__ = "requirements"
+
+    id = Column(Integer, primary_key=True)
+    # Exactly one owner: a four-year plan slot or a degree requirement set entry
+    plan_id = Column(Integer, ForeignKey("degree_plans.id", ondelete="CASCADE"))
+    requirement_set_id = Column(Integer, ForeignKey("degree_requirements.id", ondelete="CASCADE"))
+    position = Column(Integer, nullable=False) # Order within the owner's JSON
+    section = Column(String, nullable=False) # Plan year ("freshman") or block ("emphases/data_science")
+    term = Column(String) # Plan semester ("fall"); None for requirement sets
+    name = Column(String, nullable=False) # e.g. "CSCI 111", "MATH 263 or 319", "Fine Arts"
+    kind = Column(String, nullable=False) # "course", "choice", "all" or "elective"
+    credits = Column(Integer)
+    # Distinct matching courses that satisfy it: 1, both of a pair, credits / 3 of a bucket
+    min_courses = Column(Integer, nullable=False, default=1)
+    notes = Column(Text)
+
+    __table_args__ = (
+        CheckConstraint("(plan_id IS NULL) <> (requirement_set_id IS NULL)", name="ck_requirements_one_owner"),
+        Index("ix_requirements_plan", "plan_id", "position"),
+        Index("ix_requirements_requirement_set", "requirement_set_id", "position"),
+    )
+
+class RequirementOption(Base):
+    __tablename__ = "requirement_options"
+
+    # A course that counts toward the requirement
+    requirement_id = Column(Integer, ForeignKey("requirements.id", ondelete="CASCADE"), nullable=False)
+    course_code = Column(String, nullable=False) # Normalized, e.g. "CSCI 211"
+
+    __table_args__ = (
+        PrimaryKeyConstraint("requirement_id", "course_code"),
+        Index("ix_requirement_options_course", "course_code", "requirement_id"),
+    )
+
+class RequirementPrefix(Base):
+    __tablename__ = "requirement_prefixes"
+
+    # Any course of a subject counts, from min_level up (e.g. CSCI 300+)
+    requirement_id = Column(Integer, ForeignKey("requirements.id", ondelete="CASCADE"), nullable=False)
+    prefix = Column(String, nullable=False) # e.g. "CSCI"
+    min_level = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("requirement_id", "prefix"),
+        Index("ix_requirement_prefixes_prefix", "prefix", "min_level", "requirement_id"),
+    )
@@ -1,7 +1,15 @@
 from pydantic import BaseModel
+from typing import Dict, Optional
 
 class ChatRequest(BaseModel):
     message: str
+    # Restrict retrieval to one catalog / kind of page
+    catalog_year: Optional[str] = None # e.g. "2024-2025"
+    page_type: Optional[str] = None # e.g. "program", "course"
+
+    def filters(self) -> Optional[Dict[str, str]]:
+        filters = {key: value for key, value in (("catalog_year", self.catalog_year), ("page_type", self.page_type)) if value}
+        return filters or None
 
 class ChatResponse(BaseModel):
     response: str
@@ -0,0 +1,88 @@
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+from typing_extensions import TypedDict
+from app.schemas.student import StudentProfile
+
+class RequirementSource(str, Enum):
+    plan = "plan" # Slots of the four-year plan
+    requirements = "requirements" # Entries of the degree requirement blocks
+
+class PlanView(str, Enum):
+    compact = "compact" # Schedule only; the plan itself comes from GET /planner/plan
+    full = "full" # Everything, including the profile and the whole four-year plan
+    diff = "diff" # What the student still differs from the plan by, no schedule
+
+# Schedule entries are TypedDicts rather than models: a plan has dozens of
+# them, and validating plain dicts takes half the time of building models
+class PlannedCourse(TypedDict):
+    course: str # e.g. "CSCI 111" or "WRIT 100 or WRIT 101"
+    credits: int
+
+class PlanRequirement(PlannedCourse):
+    # Position of the requirement in the published four-year plan
+    year: str # e.g. "freshman"
+    semester: str # e.g. "fall"
+
+class RequirementEntry(TypedDict):
+    section: str # Plan year ("freshman") or requirement block ("emphases/data_science")
+    term: Optional[str] # Plan semester; None for requirement blocks
+    name: str # e.g. "CSCI 111" or "Social Sciences"
+    kind: str # "course", "choice", "all" or "elective"
+    credits: Optional[int]
+
+class CourseRequirement(RequirementEntry):
+    # Owner of the requirement: a plan, or a program's requirement set
+    plan: Optional[str]
+    program: Optional[str]
+    catalog_year: str
+
+class CompactPlanResponse(BaseModel):
+    view: Literal["compact"] = "compact"
+    status: str = "success"
+    student_name: Optional[str] = None
+    plan: str
+    catalog_year: str
+    plan_fingerprint: str # ETag of GET /planner/plan
+    missing_count: int
+    recommended_schedule: List[List[PlannedCourse]]
+
+class FullPlanResponse(BaseModel):
+    view: Literal["full"] = "full"
+    status: str = "success"
+    student: StudentProfile
+    plan: str
+    catalog_year: str
+    plan_fingerprint: str
+    missing_count: int
+    recommended_schedule: List[List[Dict[str, Any]]] # Plan entries as written, notes included
+    raw_plan: Dict[str, Any]
+
+class DiffPlanResponse(BaseModel):
+    view: Literal["diff"] = "diff"
+    status: str = "success"
+    student_name: Optional[str] = None
+    plan: str
+    catalog_year: str
+    plan_fingerprint: str
+    missing_count: int
+    missing: List[PlanRequirement]
+    outside_plan: List[str] # Taken courses that fill no slot of the plan
+
+PlanResponse = Annotated[Union[CompactPlanResponse, FullPlanResponse, DiffPlanResponse], Field(discriminator="view")]
+
+class DegreePlanDocument(BaseModel):
+    plan: str
+    catalog_year: str
+    plan_fingerprint: str
+    plan_structure: Dict[str, Any]
+
+class AuditResult(BaseModel):
+    index: int # Position of the profile in the request
+    status: str = "success"
+    error: Optional[str] = None
+    student_name: Optional[str] = None
+    source: Optional[str] = None # Plan name or program audited against
+    catalog_year: Optional[str] = None
+    missing_count: int = 0
+    missing: List[RequirementEntry] = []
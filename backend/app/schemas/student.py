@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class CourseGrade(BaseModel):
     course_code: str # e.g. "CSCI 111"
@@ -13,6 +13,9 @@ class StudentProfile(BaseModel):
     catalog_year: str = "2024-2025" # Default, can be extracted
     gpa: float = 0.0
     taken_courses: List[CourseGrade] = []
+    # Placement scores and standing used by prerequisite checks
+    test_scores: Dict[str, float] = {} # e.g. {"ACT_MATH": 24}
+    attributes: List[str] = [] # e.g. ["honors", "graduate"]
     
     # Calculated fields
     credits_earned: float = 0.0
@@ -0,0 +1,163 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+# Cosine similarity above which a previous answer is reused for a new question
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+# Course codes and numbers must match exactly: "CSCI 111" and "CSCI 112" embed almost identically
+_ANCHOR_RE = re.compile(r"\b[a-z]{2,4}\s*\d{3}\b|\b\d+\b")
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(_PUNCTUATION_RE.sub(" ", question.lower()).split())
+
+
+def question_anchors(normalized: str) -> Tuple[str, ...]:
+    return tuple(sorted(" ".join(anchor.split()) for anchor in _ANCHOR_RE.findall(normalized)))
+
+
+class AnswerCache:
+    """
+    Two-tier cache in front of the RAG chain.
+
+    Tier 1 is an exact LRU keyed by the normalized question. Tier 2 keeps the
+    question embeddings in a fixed-size matrix and reuses an answer when a new
+    question is within `similarity_threshold` cosine of a cached one and names
+    the same course codes/numbers. Both tiers share the TTL and LRU bound.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+
+        self._exact: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+        # Semantic tier: row i of _vectors belongs to _row_keys[i]
+        self._vectors: Optional[np.ndarray] = None
+        self._expires = np.zeros(max_entries)
+        self._row_keys: List[Optional[str]] = [None] * max_entries
+        self._rows: "OrderedDict[str, int]" = OrderedDict()
+        self._semantic: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+
+        # Every question is looked up in the exact tier; only exact misses that need
+        # an embedding anyway (no fast-path answer) reach the semantic tier
+        self.counters = {
+            "exact_hits": 0, "exact_misses": 0, "semantic_hits": 0, "semantic_misses": 0,
+            "evictions": 0, "invalidations": 0,
+        }
+
+    def get_exact(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._exact.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return entry[0]
+            if entry:
+                del self._exact[key]
+            self.counters["exact_misses"] += 1
+            return None
+
+    def get_similar(self, question: str, embedding: List[float]) -> Optional[str]:
+        key = normalize_question(question)
+        anchors = question_anchors(key)
+        query = _unit(embedding)
+        with self._lock:
+            if self._vectors is not None and self._rows and query.shape[0] == self._vectors.shape[1]:
+                live = np.fromiter(self._rows.values(), dtype=np.int64)
+                live = live[self._expires[live] > time.monotonic()]
+                if live.size:
+                    scores = self._vectors[live] @ query
+                    for position in np.argsort(scores)[::-1]:
+                        if scores[position] < self.similarity_threshold:
+                            break
+                        cached_key = self._row_keys[live[position]]
+                        answer, cached_anchors = self._semantic[cached_key]
+                        if cached_anchors == anchors:
+                            self._rows.move_to_end(cached_key)
+                            self.counters["semantic_hits"] += 1
+                            return answer
+            self.counters["semantic_misses"] += 1
+            return None
+
+    def put(self, question: str, embedding: Optional[List[float]], answer: str):
+        key = normalize_question(question)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._exact[key] = (answer, expires_at)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+                self.counters["evictions"] += 1
+
+            if embedding is None:
+                return
+            vector = _unit(embedding)
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._reset_semantic(vector.shape[0])
+
+            if key in self._rows:
+                row = self._rows[key]
+                self._rows.move_to_end(key)
+            elif len(self._rows) < self.max_entries:
+                row = len(self._rows)
+                self._rows[key] = row
+            else:
+                oldest, row = self._rows.popitem(last=False)
+                del self._semantic[oldest]
+                self._rows[key] = row
+                self.counters["evictions"] += 1
+
+            self._vectors[row] = vector
+            self._expires[row] = expires_at
+            self._row_keys[row] = key
+            self._semantic[key] = (answer, question_anchors(key))
+
+    def invalidate(self):
+        with self._lock:
+            self._exact.clear()
+            self._reset_semantic(self._vectors.shape[1] if self._vectors is not None else 0)
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.counters["exact_hits"] + self.counters["exact_misses"]
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            return {
+                **self.counters,
+                # Questions answered by neither tier
+                "misses": lookups - hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "exact_entries": len(self._exact),
+                "semantic_entries": len(self._rows),
+            }
+
+    def _reset_semantic(self, dimensions: int):
+        self._vectors = np.zeros((self.max_entries, dimensions), dtype=np.float32) if dimensions else None
+        self._expires = np.zeros(self.max_entries)
+        self._row_keys = [None] * self.max_entries
+        self._rows.clear()
+        self._semantic.clear()
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Set, Tuple
+
+from sqlalchemy import JSON, cast, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Keys of the inserted and updated rows
+    written: Set[Tuple] = field(default_factory=set)
+
+    def __str__(self) -> str:
+        return f"{self.inserted} inserted, {self.updated} updated, {self.unchanged} unchanged"
+
+
+def upsert_rows(db: Session, model, rows: List[Dict], key: Sequence[str]) -> UpsertResult:
+    """
+    Writes `rows` into `model`'s table with INSERT ... ON CONFLICT (key)
+    DO UPDATE, batched by SQLAlchemy into multi-row statements. The update
+    only fires when a value differs, so unchanged rows are not rewritten;
+    RETURNING tells written rows apart and the keys already present split
+    them into inserted and updated. The caller commits.
+    """
+    if not rows:
+        return UpsertResult()
+    table = model.__table__
+    key_columns = [table.c[name] for name in key]
+
+    # 1. One row per key (last wins): a statement may not update a row twice
+    by_key: Dict[Tuple, Dict] = {tuple(row[name] for name in key): row for row in rows}
+    existing = {tuple(row) for row in db.execute(select(*key_columns))}
+
+    # 2. Upsert, updating only rows whose values changed
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(table)
+    values = [name for name in next(iter(by_key.values())) if name not in key]
+    changed = or_(*(_differs(table.c[name], statement.excluded[name], dialect) for name in values))
+    statement = statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={name: statement.excluded[name] for name in values},
+        where=changed,
+    ).returning(*key_columns)
+    written = {tuple(row) for row in db.execute(statement, list(by_key.values()))}
+
+    inserted = len(written - existing)
+    return UpsertResult(inserted=inserted, updated=len(written) - inserted, unchanged=len(by_key) - len(written), written=written)
+
+
+def _differs(current, incoming, dialect):
+    # Postgres json has no equality operator; compare as jsonb
+    if dialect is postgresql and isinstance(current.type, JSON):
+        return cast(current, postgresql.JSONB).is_distinct_from(cast(incoming, postgresql.JSONB))
+    return current.is_distinct_from(incoming)
@@ -0,0 +1,25 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import engine
+from app.models.rag import CollectionVersion
+
+
+def get_collection_version(db: Session, collection_name: str) -> int:
+    try:
+        row = db.get(CollectionVersion, collection_name)
+    except SQLAlchemyError:
+        # Nothing has been ingested since the table was introduced
+        db.rollback()
+        return 0
+    return row.version if row else 0
+
+
+def bump_collection_version(db: Session, collection_name: str) -> int:
+    CollectionVersion.__table__.create(bind=engine, checkfirst=True)
+    row = db.get(CollectionVersion, collection_name)
+    if not row:
+        row = CollectionVersion(collection_name=collection_name, version=0)
+        db.add(row)
+    row.version += 1
+    db.commit()
+    return row.version
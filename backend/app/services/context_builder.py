@@ -0,0 +1,154 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from app.services.token_counter import TokenCounter, token_counter
+
+# Most context tokens one prompt may carry (the template and question come on top)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# A block cut shorter than this is left out instead
+CONTEXT_MIN_BLOCK_TOKENS = int(os.getenv("CONTEXT_MIN_BLOCK_TOKENS", "40"))
+# Chunk windows overlapping by this many characters are stitched together
+# (the recursive splitter overlapped by up to 200)
+MIN_OVERLAP_CHARS = 40
+MAX_OVERLAP_CHARS = 400
+
+# Lower keeps first when the budget runs out: course and policy facts answer
+# most advising questions, then program pages, then general regulations
+PAGE_TYPE_PRIORITY: Dict[Optional[str], int] = {
+    "course": 0,
+    "policy": 0,
+    "course_list": 1,
+    "course_index": 1,
+    "program": 1,
+    "regulation": 2,
+    "guide": 2,
+    "calendar": 3,
+    "form": 3,
+}
+DEFAULT_PRIORITY = 3
+
+
+@dataclass
+class ContextBlock:
+    source: str
+    priority: int
+    rank: int
+    docs: List[Document] = field(default_factory=list)
+    text: str = ""
+
+
+@dataclass
+class AssembledContext:
+    text: str
+    docs: List[Document]
+    tokens: int
+    # Tokens of the chunks as retrieved, before deduplication and the budget
+    retrieved_tokens: int
+    dropped: int
+
+
+def _overlap(left: str, right: str) -> int:
+    # Length of the longest suffix of `left` that starts `right`
+    # (the recursive splitter's chunk_overlap windows)
+    for size in range(min(len(left), len(right), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _append(text: str, addition: str) -> str:
+    if not text:
+        return addition
+    overlap = _overlap(text, addition)
+    if overlap:
+        return text + addition[overlap:]
+    # Catalog chunks of one page repeat their heading path; keep it once
+    heading, _, body = addition.partition("\n")
+    if body and heading == text.partition("\n")[0]:
+        addition = body
+    return f"{text}\n{addition}"
+
+
+class ContextBuilder:
+    """
+    Turns retrieved chunks into the prompt context within `token_budget`:
+    exact and contained duplicates are dropped, chunks from the same page
+    are merged into one block (stitching overlapping windows), and blocks
+    are kept by page-type priority, then retrieval rank. The block that
+    crosses the budget is truncated at a line or sentence boundary.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, counter: TokenCounter = token_counter):
+        self.token_budget = token_budget
+        self.counter = counter
+
+    def build(self, docs: List[Document]) -> AssembledContext:
+        retrieved_tokens = sum(self.counter.count(doc.page_content) for doc in docs)
+
+        # 1. Deduplicate: identical chunks, and chunks contained in another
+        unique: List[Document] = []
+        for doc in docs:
+            text = doc.page_content.strip()
+            if not text or any(text in kept.page_content for kept in unique):
+                continue
+            unique = [kept for kept in unique if kept.page_content.strip() not in text] + [doc]
+
+        # 2. One block per source page, ranked by its best chunk
+        blocks: Dict[str, ContextBlock] = {}
+        for rank, doc in enumerate(unique):
+            source = doc.metadata.get("source") or f"#{rank}"
+            block = blocks.get(source)
+            if block is None:
+                priority = PAGE_TYPE_PRIORITY.get(doc.metadata.get("page_type"), DEFAULT_PRIORITY)
+                block = blocks[source] = ContextBlock(source=source, priority=priority, rank=rank)
+            block.docs.append(doc)
+        for block in blocks.values():
+            for doc in self._page_order(block.docs):
+                block.text = _append(block.text, doc.page_content.strip())
+
+        # 3. Fill the budget by priority, truncating the block that does not fit
+        parts: List[str] = []
+        kept: List[Document] = []
+        used = 0
+        separator = self.counter.count("\n\n")
+        for block in sorted(blocks.values(), key=lambda block: (block.priority, block.rank)):
+            remaining = self.token_budget - used - (separator if parts else 0)
+            tokens = self.counter.count(block.text)
+            if tokens > remaining:
+                if remaining < CONTEXT_MIN_BLOCK_TOKENS:
+                    continue
+                block.text = self.counter.truncate(block.text, remaining)
+                tokens = self.counter.count(block.text)
+            parts.append(block.text)
+            kept.extend(block.docs)
+            used += tokens + (separator if len(parts) > 1 else 0)
+
+        return AssembledContext(
+            text="\n\n".join(parts),
+            docs=kept,
+            tokens=used,
+            retrieved_tokens=retrieved_tokens,
+            dropped=len(docs) - len(kept),
+        )
+
+    def _page_order(self, docs: List[Document]) -> List[Document]:
+        # Overlapping windows only stitch in page order; the recursive splitter
+        # does not record positions, so order by how the windows chain
+        ordered = [docs[0]]
+        rest = docs[1:]
+        while rest:
+            tail, head = ordered[-1].page_content, ordered[0].page_content
+            after = next((doc for doc in rest if _overlap(tail, doc.page_content)), None)
+            before = None if after else next((doc for doc in rest if _overlap(doc.page_content, head)), None)
+            if after:
+                ordered.append(after)
+                rest.remove(after)
+            elif before:
+                ordered.insert(0, before)
+                rest.remove(before)
+            else:
+                ordered.extend(rest)
+                break
+        return ordered
@@ -0,0 +1,86 @@
+import re
+from typing import FrozenSet, List, Optional, Set
+
+# "CSCI 111", "EL E 235", "SPCH 102"
+COURSE_CODE_RE = re.compile(r"^[A-Z]{2,4}(?: [A-Z]{1,4})?\s+\d{3}[A-Z]?$")
+BARE_NUMBER_RE = re.compile(r"^\d{3}[A-Z]?$")
+OR_SPLIT_RE = re.compile(r"\s+or\s+", re.IGNORECASE)
+
+# "Csci 111", "MATH 261", "EL E 235" and bare "223" after a code ("CSCI 211, 223")
+# ("300+" is a course level, not a course)
+CODE_OR_NUMBER_RE = re.compile(r"\b(?:([A-Za-z]{2,4}(?: [A-Z])?)\s+)?(\d{3})\b(?!\+)")
+# Clause boundaries: "Prerequisite:" markers, semicolons, commas, "and", sentence ends
+CLAUSE_SPLIT_RE = re.compile(r"(?i)pre-?requi?s?i?te?s?:|;|,|\band\b|\.(?!\d)")
+OR_RE = re.compile(r"(?i)\bor\b|/")
+# Alternatives we cannot plan for (placement tests); a clause offering them is not a hard prereq
+EXTERNAL_ALTERNATIVE_RE = re.compile(r"(?i)\b(ACT|SAT|ALEKS|placement|score)\b")
+
+
+def normalize_course_code(code: str) -> str:
+    # "Csci  111" -> "CSCI 111"
+    return " ".join(code.split()).upper()
+
+
+def parse_course_options(course_name: str) -> Optional[List[str]]:
+    """
+    Parses a plan entry like "WRIT 100 or WRIT 101" or "SPCH 102 or 105" into
+    course codes. Bare numbers inherit the prefix of the previous option.
+    Returns None when the entry is not made of course codes (e.g. "Fine Arts").
+    """
+    options = []
+    prefix = None
+    for part in OR_SPLIT_RE.split(course_name.strip()):
+        part = normalize_course_code(part)
+        if BARE_NUMBER_RE.match(part) and prefix:
+            part = f"{prefix} {part}"
+        if not COURSE_CODE_RE.match(part):
+            return None
+        prefix = part.rsplit(" ", 1)[0]
+        options.append(part)
+    return options
+
+
+PrereqGroup = FrozenSet[str]  # Any one of the codes satisfies the group
+
+
+def extract_prerequisite_groups(text: Optional[str], known_prefixes: Set[str] = frozenset()) -> List[PrereqGroup]:
+    """
+    Heuristic extraction of prerequisite groups from catalog free text.
+    Every returned group must be satisfied (AND); codes inside a group are
+    alternatives (OR). e.g. "CSCI 211, 223" -> [{CSCI 211}, {CSCI 223}]
+    """
+    if not text:
+        return []
+
+    groups = []
+    prefix = None
+    for clause in CLAUSE_SPLIT_RE.split(text):
+        if not clause.strip():
+            continue
+        if OR_RE.search(clause) and EXTERNAL_ALTERNATIVE_RE.search(clause):
+            continue
+
+        current: List[str] = []
+        last_end = 0
+        for match in CODE_OR_NUMBER_RE.finditer(clause):
+            dept, number = match.group(1), match.group(2)
+            # Accept "MATH 261" or a department we know ("Csci 111"), not "of 540"
+            if dept and (dept.isupper() or dept.upper() in known_prefixes):
+                prefix = normalize_course_code(dept)
+                start = match.start(1)
+            elif prefix:
+                start = match.start(2)
+            else:
+                continue
+
+            code = f"{prefix} {number}"
+            between = clause[last_end:start]
+            if current and not OR_RE.search(between):
+                groups.append(frozenset(current))
+                current = []
+            current.append(code)
+            last_end = match.end()
+
+        if current:
+            groups.append(frozenset(current))
+    return groups
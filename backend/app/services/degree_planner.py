@@ -1,82 +1,173 @@
 from sqlalchemy.orm import Session
-from app.models.course import Course, DegreePlan
-from app.schemas.student import StudentProfile, CourseGrade
-from typing import List, Dict, Any
-import json
+from app.schemas.planner import PlanView, RequirementSource
+from app.schemas.student import StudentProfile
+from app.services.course_codes import normalize_course_code
+from app.services.plan_index import CompiledPlan, plan_index
+from app.services.prereq_graph import prereq_graph_cache
+from app.services.requirement_tables import audit_students, find_requirement_set, requirement_entry
+from app.services.semester_scheduler import SemesterScheduler, load_scheduling_policy
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+def compact_schedule(schedule: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    # Course and credits only; prerequisites and notes live in the cached plan
+    return [[{"course": entry.get("course", ""), "credits": entry.get("credits", 3)} for entry in semester] for semester in schedule]
 
 class DegreePlannerService:
     def __init__(self, db: Session):
         self.db = db
 
-    def generate_plan(self, student_profile: StudentProfile) -> Dict[str, Any]:
-        # 1. Fetch Degree Requirements (BSCS 2024-2025)
-        # simplistic fetch for now, assuming one main plan
-        plan_model = self.db.query(DegreePlan).filter(DegreePlan.name.like("%BSCS%")).first()
-        if not plan_model:
+    def generate_plan(self, student_profile: StudentProfile, view: PlanView = PlanView.compact) -> Dict[str, Any]:
+        # 1. Fetch the compiled Degree Requirements (shared across requests)
+        compiled_plan = plan_index.get(self.db, student_profile.major, student_profile.catalog_year)
+        if not compiled_plan:
             return {"error": "No degree plan found in database."}
         
         # 2. Identify Taken Courses (Set of codes)
-        taken_courses = {c.course_code.upper() for c in student_profile.taken_courses}
-        
-        # 3. Flatten Degree Plan to find all required courses
-        target_plan = plan_model.plan_structure # JSON structure
-        
-        missing_courses = []
+        taken_courses = frozenset(normalize_course_code(c.course_code) for c in student_profile.taken_courses)
         
-        # Simple traversal to find missing requirements
-        # Structure: { "freshman": { "fall": [ { "course": "CSCI 111", ... } ] } }
-        for year, semesters in target_plan.items():
-            for semester, courses in semesters.items():
-                for course_req in courses:
-                    course_name = course_req.get("course")
-                    # Handle "OR" logic roughly (e.g. "WRIT 100 or WRIT 101")
-                    if " or " in course_name.lower():
-                        options = [opt.strip().upper() for opt in course_name.split(" or ")]
-                        if not any(opt in taken_courses for opt in options):
-                             missing_courses.append(course_req)
-                    elif "elective" in course_name.lower():
-                        # Electives are tricky, simplistic check:
-                        # If we have "Minor/Tech Elective", we assume it's missing unless user manually tracks it.
-                        # For MVP, we just list it as needed.
-                        missing_courses.append(course_req)
-                    else:
-                        if course_name.upper() not in taken_courses:
-                            missing_courses.append(course_req)
+        # 3. Unmet requirements from the normalized tables, as the plan's slots
+        missing_slots = [compiled_plan.slots[j] for j in self._missing_positions([compiled_plan], [taken_courses])[0]]
+        result = {
+            "view": view.value,
+            "status": "success",
+            "plan": compiled_plan.name,
+            "catalog_year": compiled_plan.catalog_year,
+            "plan_fingerprint": compiled_plan.fingerprint,
+            "missing_count": len(missing_slots),
+        }
 
-        # 4. Create a Schedule (The "Magic")
-        # For MVP, we just strictly follow the 4-year plan order for missing items.
-        # A real solver would use constraint satisfaction (CSP).
-        
-        generated_schedule = []
-        current_load = 0
-        MAX_LOAD = 15 # Credits per semester
-        
-        semester_bucket = []
-        
-        for req in missing_courses:
-            # Check prerequisites (Basic check against "taken_courses")
-            # In a real engine, we'd check against the 'database' of prereqs. 
-            # Here we trust the 'prerequisites' field in the JSON plan if it exists, 
-            # but verifying against strict logic is better.
-            
-            # Add to bucket
-            req_credits = req.get("credits", 3)
-            if current_load + req_credits > MAX_LOAD:
-                # Flush bucket to a new semester
-                generated_schedule.append(semester_bucket)
-                semester_bucket = []
-                current_load = 0
-            
-            semester_bucket.append(req)
-            current_load += req_credits
-            
-        if semester_bucket:
-            generated_schedule.append(semester_bucket)
+        # The diff view stops here: no schedule, just where the student stands against the plan
+        if view == PlanView.diff:
+            result["student_name"] = student_profile.student_name
+            result["missing"] = [
+                {"course": slot.requirement.get("course", ""), "credits": slot.credits, "year": slot.year, "semester": slot.semester}
+                for slot in missing_slots
+            ]
+            result["outside_plan"] = sorted(code for code in taken_courses if code not in compiled_plan.option_codes)
+            return result
 
-        return {
-            "status": "success",
-            "student": student_profile.dict(),
-            "missing_count": len(missing_courses),
-            "recommended_schedule": generated_schedule,
-            "raw_plan": target_plan
+        # 4. Create a Schedule: topological, critical-path-first packing within policy credit limits
+        scheduler = SemesterScheduler(
+            prereq_graph_cache.get(self.db),
+            load_scheduling_policy(student_profile.major, student_profile.catalog_year),
+        )
+        generated_schedule = scheduler.schedule(missing_slots, taken_courses, student_profile.gpa)
+
+        if view == PlanView.full:
+            result["student"] = student_profile
+            result["recommended_schedule"] = generated_schedule
+            result["raw_plan"] = compiled_plan.plan_structure
+        else:
+            # The full plan entries are served once, by fingerprint, from GET /planner/plan
+            result["student_name"] = student_profile.student_name
+            result["recommended_schedule"] = compact_schedule(generated_schedule)
+        return result
+
+    def generate_plans(self, profiles: List[StudentProfile]) -> Iterator[Dict[str, Any]]:
+        """
+        Plans many students at once. Everything that needs the database (plans,
+        prerequisite graph, policies, the requirement audit) is loaded here,
+        once per (major, catalog year) or batch; the returned iterator then only computes, so it can be streamed
+        after the request's session is closed. Results carry the profile's
+        position in `index` and come out grouped by plan.
+        """
+        # 1. Group students by the plan they follow
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, profile in enumerate(profiles):
+            groups.setdefault((profile.major, profile.catalog_year), []).append(i)
+
+        # 2. Load shared state eagerly
+        graph = prereq_graph_cache.get(self.db)
+        contexts = {
+            key: (plan_index.get(self.db, *key), SemesterScheduler(graph, load_scheduling_policy(*key)))
+            for key in groups
         }
+
+        # 3. One set-based audit for every student with a plan, across plans
+        taken_sets = [frozenset(normalize_course_code(c.course_code) for c in profile.taken_courses) for profile in profiles]
+        planned = [i for key, indices in groups.items() if contexts[key][0] for i in indices]
+        missing = dict(zip(planned, self._missing_positions(
+            [contexts[(profiles[i].major, profiles[i].catalog_year)][0] for i in planned],
+            [taken_sets[i] for i in planned],
+        )))
+        return self._plan_groups(profiles, groups, contexts, taken_sets, missing)
+
+    def _plan_groups(self, profiles, groups, contexts, taken_sets, missing) -> Iterator[Dict[str, Any]]:
+        for key, indices in groups.items():
+            compiled_plan, scheduler = contexts[key]
+            if not compiled_plan:
+                for i in indices:
+                    yield {"index": i, "status": "error", "error": "No degree plan found in database."}
+                continue
+
+            # 4. Schedules depend only on the missing slots, the taken courses that
+            # appear in prerequisites and the GPA's load cap; students of a cohort
+            # mostly share those, so each distinct combination is scheduled once
+            prereq_codes = scheduler.prerequisite_codes(compiled_plan.slots)
+            schedules: Dict[Tuple[Tuple[int, ...], FrozenSet[str], int], Tuple[int, List]] = {}
+            for i in indices:
+                key = (missing[i], taken_sets[i] & prereq_codes, scheduler.policy.max_load(profiles[i].gpa))
+                if key not in schedules:
+                    missing_slots = [compiled_plan.slots[j] for j in missing[i]]
+                    schedules[key] = (len(missing_slots), compact_schedule(scheduler.schedule(missing_slots, taken_sets[i], profiles[i].gpa)))
+                missing_count, schedule = schedules[key]
+                yield {
+                    "index": i,
+                    "status": "success",
+                    "student_name": profiles[i].student_name,
+                    "plan": compiled_plan.name,
+                    "plan_fingerprint": compiled_plan.fingerprint,
+                    "missing_count": missing_count,
+                    "recommended_schedule": schedule,
+                }
+
+    def _missing_positions(self, compiled_plans: Sequence[CompiledPlan], taken_sets: Sequence[Iterable[str]]) -> List[Tuple[int, ...]]:
+        """
+        Indexes into compiled_plans[i].slots of student i's unmet slots, from
+        one audit_students query over the plans' normalized requirement rows.
+        Those rows are numbered like the compiled slots (both walk the plan
+        JSON in the same order) and are rebuilt with the plan by
+        data/ingest_structured.py.
+        """
+        rows = audit_students(self.db, [compiled_plan.plan_id for compiled_plan in compiled_plans], taken_sets)
+        return [tuple(row.position for row in student_rows) for student_rows in rows]
+
+    def audit(self, profiles: List[StudentProfile], source: RequirementSource = RequirementSource.plan) -> List[Dict[str, Any]]:
+        """
+        Missing requirements of many students from the normalized requirement
+        tables: one set-based query for the whole batch, across plans.
+        """
+        # 1. The plan or requirement set each (major, catalog year) follows
+        owners: Dict[Tuple[str, str], Optional[Tuple[int, str, str]]] = {}
+        for key in {(profile.major, profile.catalog_year) for profile in profiles}:
+            if source == RequirementSource.plan:
+                compiled_plan = plan_index.get(self.db, *key)
+                owners[key] = (compiled_plan.plan_id, compiled_plan.name, compiled_plan.catalog_year) if compiled_plan else None
+            else:
+                requirement_set = find_requirement_set(self.db, *key)
+                owners[key] = (requirement_set.id, requirement_set.program, requirement_set.catalog_year) if requirement_set else None
+
+        # 2. One query for everyone
+        student_owners = [owners[(profile.major, profile.catalog_year)] for profile in profiles]
+        missing = audit_students(
+            self.db,
+            [owner[0] if owner else None for owner in student_owners],
+            [[c.course_code for c in profile.taken_courses] for profile in profiles],
+            by=source.value,
+        )
+
+        results = []
+        for i, (profile, owner) in enumerate(zip(profiles, student_owners)):
+            if not owner:
+                results.append({"index": i, "status": "error", "error": f"No degree {source.value} found in database."})
+                continue
+            results.append({
+                "index": i,
+                "status": "success",
+                "student_name": profile.student_name,
+                "source": owner[1],
+                "catalog_year": owner[2],
+                "missing_count": len(missing[i]),
+                "missing": [requirement_entry(requirement) for requirement in missing[i]],
+            })
+        return results
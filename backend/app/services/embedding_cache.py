@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.rag import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Vectors kept in process (float32, ~3 KB each at 768 dimensions)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "5000"))
+# Set to "0" to keep the cache in memory only
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "1").lower() not in ("0", "false", "no")
+
+# Key: (task, sha256 of the text)
+CacheKey = Tuple[str, str]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_embeddings(db: Session, model: str, task: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+    try:
+        rows = db.execute(
+            select(EmbeddingCacheEntry.content_hash, EmbeddingCacheEntry.embedding).where(
+                EmbeddingCacheEntry.model == model,
+                EmbeddingCacheEntry.task == task,
+                EmbeddingCacheEntry.content_hash.in_(hashes),
+            )
+        )
+        return {row.content_hash: np.frombuffer(row.embedding, dtype=np.float32) for row in rows}
+    except SQLAlchemyError:
+        # Nothing has been cached since the table was introduced
+        db.rollback()
+        return {}
+
+
+def ensure_embedding_cache_table(db: Session):
+    # Created up front: concurrent first writes would race on CREATE TABLE
+    EmbeddingCacheEntry.__table__.create(bind=db.connection(), checkfirst=True)
+    db.commit()
+
+
+def store_embeddings(db: Session, model: str, task: str, vectors: Dict[str, np.ndarray]):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    # Two processes may embed the same text; the first write wins, both are equal
+    db.execute(dialect.insert(EmbeddingCacheEntry).values([
+        {"model": model, "task": task, "content_hash": key, "embedding": vector.tobytes()}
+        for key, vector in vectors.items()
+    ]).on_conflict_do_nothing())
+    db.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with two cache tiers: an in-process LRU for hot
+    questions and the rag_embedding_cache table, shared by every API process
+    and the ingest. Entries are keyed by model, task (query/document) and the
+    text's SHA-256, so they never go stale; a new model gets new keys.
+
+    Cache failures are logged and fall through to the model.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: Optional[str] = None,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        persist: bool = EMBEDDING_CACHE_PERSIST,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.max_entries = max_entries
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self.counters = {"memory_hits": 0, "store_hits": 0, "misses": 0, "model_calls": 0, "store_errors": 0}
+
+    def ensure_store(self):
+        if self.persist:
+            with SessionLocal() as db:
+                self._guard(ensure_embedding_cache_table, None, db)
+
+    async def aensure_store(self):
+        if self.persist:
+            async with AsyncSessionLocal() as db:
+                await db.run_sync(lambda session: self._guard(ensure_embedding_cache_table, None, session))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents_for("query", [text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_for("document", texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents_for("query", [text]))[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.aembed_documents_for("document", texts)
+
+    def embed_documents_for(self, task: str, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._from_memory(task, texts)
+        if missing and self.persist:
+            with SessionLocal() as db:
+                self._found(task, vectors, missing, self._guard(load_embeddings, {}, db, self.model_name, task, list(missing)))
+        if missing:
+            embedded = self._embed_sync(task, [texts[positions[0]] for positions in missing.values()])
+            self._computed(task, vectors, missing, embedded)
+            if self.persist:
+                with SessionLocal() as db:
+                    self._guard(store_embeddings, None, db, self.model_name, task, embedded)
+        return [vectors[i].tolist() for i in range(len(texts))]
+
+    async def aembed_documents_for(self, task: str, texts: List[str]) -> List[List[float]]:
+        # 1. LRU, 2. the shared table, 3. the model (one call for every miss)
+        vectors, missing = self._from_memory(task, texts)
+        if missing and self.persist:
+            async with AsyncSessionLocal() as db:
+                found = await db.run_sync(lambda session: self._guard(load_embeddings, {}, session, self.model_name, task, list(missing)))
+            self._found(task, vectors, missing, found)
+        if missing:
+            embedded = await self._embed_async(task, [texts[positions[0]] for positions in missing.values()])
+            self._computed(task, vectors, missing, embedded)
+            if self.persist:
+                async with AsyncSessionLocal() as db:
+                    await db.run_sync(lambda session: self._guard(store_embeddings, None, session, self.model_name, task, embedded))
+        return [vectors[i].tolist() for i in range(len(texts))]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["store_hits"] + self.counters["misses"]
+            hits = self.counters["memory_hits"] + self.counters["store_hits"]
+            return {
+                **self.counters,
+                # Texts that did not have to be sent to the model
+                "avoided_embeddings": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "model": self.model_name,
+            }
+
+    def _from_memory(self, task: str, texts: List[str]) -> Tuple[Dict[int, np.ndarray], Dict[str, List[int]]]:
+        # Returns (vectors by position, positions of each missing hash)
+        vectors: Dict[int, np.ndarray] = {}
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = (task, content_hash(text))
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    vectors[i] = vector
+                else:
+                    missing.setdefault(key[1], []).append(i)
+        return vectors, missing
+
+    def _found(self, task: str, vectors: Dict[int, np.ndarray], missing: Dict[str, List[int]], found: Dict[str, np.ndarray]):
+        for key, vector in found.items():
+            for i in missing.pop(key):
+                vectors[i] = vector
+        self._remember(task, found, "store_hits")
+
+    def _computed(self, task: str, vectors: Dict[int, np.ndarray], missing: Dict[str, List[int]], embedded: Dict[str, np.ndarray]):
+        for key, positions in missing.items():
+            for i in positions:
+                vectors[i] = embedded[key]
+        self._remember(task, embedded, "misses")
+
+    def _remember(self, task: str, vectors: Dict[str, np.ndarray], counter: str):
+        with self._lock:
+            self.counters[counter] += len(vectors)
+            for key, vector in vectors.items():
+                self._memory[(task, key)] = vector
+                self._memory.move_to_end((task, key))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _embed_sync(self, task: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        if task == "query":
+            return self._as_arrays(texts, [self.embeddings.embed_query(text) for text in texts])
+        return self._as_arrays(texts, self.embeddings.embed_documents(texts))
+
+    async def _embed_async(self, task: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        if task == "query":
+            return self._as_arrays(texts, [await self.embeddings.aembed_query(text) for text in texts])
+        return self._as_arrays(texts, await self.embeddings.aembed_documents(texts))
+
+    def _as_arrays(self, texts: List[str], vectors: List[List[float]]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            self.counters["model_calls"] += 1
+        return {content_hash(text): np.asarray(vector, dtype=np.float32) for text, vector in zip(texts, vectors)}
+
+    def _guard(self, function, default, *args):
+        try:
+            return function(*args)
+        except SQLAlchemyError as e:
+            with self._lock:
+                self.counters["store_errors"] += 1
+            logger.warning(f"Embedding cache store unavailable: {e}")
+            args[0].rollback()
+            return default
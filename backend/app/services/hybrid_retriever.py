@@ -0,0 +1,279 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import AsyncSessionLocal
+from app.models.course import Course
+from app.services.course_codes import normalize_course_code
+from app.services.semester_scheduler import CATALOG_DATA_DIR
+from app.services.vector_index import filter_clause, search_vectors
+
+logger = logging.getLogger(__name__)
+
+# How often the in-memory course/policy index is rebuilt from the courses table
+KNOWLEDGE_INDEX_TTL_SECONDS = float(os.getenv("KNOWLEDGE_INDEX_TTL_SECONDS", "900"))
+# Candidates taken from each ranking (full-text, vector) before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+# Reciprocal-rank fusion constant (Cormack et al.); dampens the weight of top ranks
+RRF_K = 60
+
+# The catalog cross-lists computer science as CIS and Csci ("CIS 211 or Csci 211");
+# the courses table holds rows under both, students mostly say CSCI
+DEPARTMENT_ALIASES: Dict[str, Tuple[str, ...]] = {"CSCI": ("CIS",), "CIS": ("CSCI",)}
+
+# "CSCI 111", "csci111", "EL E 235"
+COURSE_MENTION_RE = re.compile(r"\b([A-Za-z]{2,4}(?: [A-Z])?) ?(\d{3})\b")
+
+# Phrases that point a question at a catalog policy (matched on the lowercased question)
+POLICY_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "credit_min_fulltime": ("full-time", "full time", "fulltime"),
+    "credit_max_standard": ("overload", "maximum credit", "max credit", "credit limit", "how many credits can"),
+    "credit_max_overload": ("overload",),
+    "overload_gpa_threshold": ("overload",),
+    "min_total_credits": ("total credits", "credits to graduate", "credits do i need", "hours to graduate"),
+    "school_gpa_min": ("minimum gpa", "gpa requirement", "gpa to graduate"),
+    "repeat_policy": ("repeat", "retake", "failed", "fail a"),
+    "lab_science_policy": ("lab science", "laboratory"),
+    "minor_or_tech_elective_policy": ("minor", "technical elective", "tech elective"),
+    "csci_electives_policy": ("csci elective", "cs elective", "upper level elective", "300 level"),
+    "emphasis_policy": ("emphasis", "concentration", "data science", "security"),
+    "speech_policy": ("speech",),
+    "writing_policy": ("writing", "composition"),
+}
+
+# Words an index document answers by itself: question words, fillers and the
+# facets a course entry or policy states. A question made only of these (plus
+# course codes and matched policy phrases) needs no search.
+ANSWERED_WORDS = frozenset("""
+    a about an and any are as at be can course courses credit credits description do does for
+    from get have hour hours how i in info information is it its me my of on or policy policies
+    prereq prereqs prerequisite prerequisites required requirement requirements rule rules take
+    taking tell the there this to what whats when which who why will with
+""".split())
+WORD_RE = re.compile(r"[a-z]+")
+
+# Numeric policies are stored bare; these turn them into sentences
+POLICY_TEMPLATES = {
+    "credit_min_fulltime": "Full-time enrollment requires at least {} credit hours per semester.",
+    "credit_max_standard": "Students may take at most {} credit hours per semester without an overload.",
+    "credit_max_overload": "With an approved overload, students may take up to {} credit hours per semester.",
+    "overload_gpa_threshold": "An overload requires a GPA of at least {}.",
+    "min_total_credits": "The degree requires at least {} total credit hours.",
+    "school_gpa_min": "The School requires a minimum GPA of {}.",
+}
+
+# Questions are prose, so their terms are OR-ed (plainto_tsquery would AND them)
+# and ts_rank_cd decides how well each chunk covers them
+FULLTEXT_SQL = """
+    WITH q AS (SELECT replace(plainto_tsquery('english', :query)::text, ' & ', ' | ')::tsquery AS query)
+    SELECT e.id, e.document, e.cmetadata
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON c.uuid = e.collection_id, q
+    WHERE c.name = :collection
+      AND q.query::text <> ''
+      AND to_tsvector('english', e.document) @@ q.query {filters}
+    ORDER BY ts_rank_cd(to_tsvector('english', e.document), q.query) DESC
+    LIMIT :limit
+"""
+
+FULLTEXT_INDEX_SQL = text("""
+    CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_document_fts
+    ON langchain_pg_embedding USING gin (to_tsvector('english', document))
+""")
+
+
+def ensure_fulltext_index(db: Session):
+    # Lets the full-text ranking use an index instead of parsing every chunk
+    db.execute(FULLTEXT_INDEX_SQL)
+    db.commit()
+
+
+def course_document(course: Course) -> Document:
+    lines = [f"{course.course_code}: {course.title or ''} ({course.credits or 3} credit hours)"]
+    if course.description:
+        lines.append(course.description)
+    lines.append(f"Prerequisites: {course.prerequisites_raw or 'None listed.'}")
+    return Document(
+        page_content="\n".join(lines),
+        metadata={"source": "courses", "title": f"{course.course_code}: {course.title or ''}", "page_type": "course", "catalog_year": None},
+    )
+
+
+def load_policy_documents(data_dir: str = CATALOG_DATA_DIR) -> Dict[str, List[Document]]:
+    # policy key -> one document per catalog (program/year) that defines it
+    documents: Dict[str, List[Document]] = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "*", "*", "policies.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for key, value in catalog.get("policies", {}).items():
+            content = POLICY_TEMPLATES[key].format(value) if key in POLICY_TEMPLATES else str(value)
+            documents.setdefault(key, []).append(Document(
+                page_content=f"{catalog.get('program', '')} ({catalog.get('catalog_year', '')}): {content}",
+                metadata={
+                    "source": os.path.relpath(path, data_dir),
+                    "title": f"{catalog.get('program', '')} policy: {key}",
+                    "page_type": "policy",
+                    "catalog_year": catalog.get("catalog_year"),
+                },
+            ))
+    return documents
+
+
+@dataclass
+class IndexMatch:
+    docs: List[Document]
+    # True when the documents answer the whole question; otherwise they are
+    # only part of the answer and get fused with the search results
+    complete: bool
+
+
+@dataclass
+class KnowledgeIndex:
+    # Normalized code ("CSCI 111") -> its course rows (the table has "Csci 111" and "csci 423")
+    courses: Dict[str, List[Document]] = field(default_factory=dict)
+    departments: frozenset = frozenset()
+    policies: Dict[str, List[Document]] = field(default_factory=dict)
+
+    def lookup(self, question: str) -> Optional[IndexMatch]:
+        """
+        Documents answering `question` straight from the index, or None when
+        it names no known course or policy, or mentions a course code the
+        index lacks. A cross-listed course returns the rows of every listing.
+        """
+        docs = []
+        for mention, number in COURSE_MENTION_RE.findall(question):
+            dept = normalize_course_code(mention)
+            depts = (dept,) + DEPARTMENT_ALIASES.get(dept, ())
+            # "for 111" is not a course; "MATH 261" is, even if MATH is not indexed
+            if self.departments.isdisjoint(depts) and not mention.isupper():
+                continue
+            found = [doc for code in (f"{d} {number}" for d in depts) for doc in self.courses.get(code, [])]
+            if not found:
+                return None
+            docs.extend(doc for doc in found if doc not in docs)
+
+        # What the question asks beyond the course codes and matched policy phrases
+        lowered = COURSE_MENTION_RE.sub(" ", question).lower()
+        rest = lowered
+        for key, phrases in POLICY_KEYWORDS.items():
+            matched = [phrase for phrase in phrases if phrase in lowered] if key in self.policies else []
+            if matched:
+                docs.extend(doc for doc in self.policies[key] if doc not in docs)
+            for phrase in matched:
+                rest = rest.replace(phrase, " ")
+        if not docs:
+            return None
+        return IndexMatch(docs, complete=all(word in ANSWERED_WORDS for word in WORD_RE.findall(rest)))
+
+
+def build_knowledge_index(db: Session) -> KnowledgeIndex:
+    courses: Dict[str, List[Document]] = {}
+    for course in db.query(Course).all():
+        if course.course_code:
+            courses.setdefault(normalize_course_code(course.course_code), []).append(course_document(course))
+    return KnowledgeIndex(
+        courses=courses,
+        departments=frozenset(code.rsplit(" ", 1)[0] for code in courses),
+        policies=load_policy_documents(),
+    )
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int) -> List[Document]:
+    # Documents are matched across rankings by id (falling back to their text)
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+class HybridRetriever:
+    """
+    Course-code and policy questions are answered from an in-memory index of
+    the courses table and policies.json, without an embedding call, when the
+    index documents cover the whole question. Anything else is searched in
+    Postgres twice, full-text and vector, and the rankings (plus any index
+    documents that answer part of the question) are merged with
+    reciprocal-rank fusion.
+    """
+
+    def __init__(self, vector_store, collection_name: str, k: int = 5, ttl_seconds: float = KNOWLEDGE_INDEX_TTL_SECONDS):
+        self.vector_store = vector_store
+        self.collection_name = collection_name
+        self.k = k
+        self.ttl_seconds = ttl_seconds
+        self._index: Optional[KnowledgeIndex] = None
+        self._built_at = 0.0
+
+    async def warm_up(self):
+        await self._get_index()
+
+    async def fast_path(self, question: str, filters: Optional[Dict[str, str]] = None) -> Optional[IndexMatch]:
+        index = await self._get_index()
+        match = index.lookup(question)
+        if match and filters:
+            # Course entries carry no catalog year; they apply to every catalog
+            if any(not all(doc.metadata.get(key) in (None, value) for key, value in filters.items()) for doc in match.docs):
+                return None
+        return match
+
+    async def search(self, question: str, embedding: List[float], filters: Optional[Dict[str, str]] = None,
+                     index_docs: Optional[List[Document]] = None) -> List[Document]:
+        # Both rankings run at once, each on its own pooled connection
+        vector_docs, fulltext_docs = await asyncio.gather(
+            self._vector(embedding, filters),
+            self._fulltext(question, filters),
+        )
+        # Index documents that answer part of the question rank alongside the search results
+        return reciprocal_rank_fusion([index_docs or [], fulltext_docs, vector_docs], self.k)
+
+    async def _vector(self, embedding: List[float], filters: Optional[Dict[str, str]]) -> List[Document]:
+        if not isinstance(self.vector_store, PGVector):
+            # Injected stores (local testing) search themselves
+            return await self.vector_store.asimilarity_search_by_vector(embedding, HYBRID_CANDIDATES, filter=filters)
+        # Our own query, so the ANN index settings apply per query
+        async with AsyncSessionLocal() as db:
+            results = await search_vectors(db, self.collection_name, embedding, HYBRID_CANDIDATES, filters)
+        return [doc for doc, _ in results]
+
+    async def _fulltext(self, question: str, filters: Optional[Dict[str, str]] = None) -> List[Document]:
+        filter_sql, params = filter_clause(filters)
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = await db.execute(
+                    text(FULLTEXT_SQL.format(filters=filter_sql)),
+                    {"collection": self.collection_name, "query": question, "limit": HYBRID_CANDIDATES, **params},
+                )
+                return [Document(id=str(row.id), page_content=row.document, metadata=row.cmetadata or {}) for row in rows]
+        except SQLAlchemyError as e:
+            # No collection yet, or not Postgres: the vector ranking alone still works
+            logger.warning(f"Full-text search unavailable: {e}")
+            return []
+
+    async def _get_index(self) -> KnowledgeIndex:
+        if self._index is None or time.monotonic() - self._built_at >= self.ttl_seconds:
+            try:
+                async with AsyncSessionLocal() as db:
+                    self._index = await db.run_sync(build_knowledge_index)
+            except SQLAlchemyError as e:
+                logger.warning(f"Course index unavailable: {e}")
+                self._index = self._index or KnowledgeIndex(policies=load_policy_documents())
+            self._built_at = time.monotonic()
+        return self._index
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Query, Session
+from app.models.course import DegreePlan
+from app.services.course_codes import PrereqGroup, parse_course_options
+from app.services.prereq_parser import course_groups, parse_prerequisites
+
+# How long a compiled plan is trusted before we re-check the degree_plans row
+PLAN_INDEX_TTL_SECONDS = float(os.getenv("PLAN_INDEX_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class RequirementSlot:
+    kind: str  # "course", "choice" or "elective"
+    year: str
+    semester: str
+    requirement: Dict[str, Any]  # The original plan entry, returned as-is
+    options: FrozenSet[str] = frozenset()
+    code: Optional[str] = None  # Set for single-course slots
+    prerequisites: Tuple[PrereqGroup, ...] = ()  # From the plan entry's "prerequisites" note
+
+    @property
+    def credits(self) -> int:
+        return self.requirement.get("credits", 3)
+
+
+@dataclass
+class ElectiveBucket:
+    name: str
+    slots: int = 0
+    credits: int = 0
+
+
+@dataclass
+class CompiledPlan:
+    plan_id: int
+    name: str
+    catalog_year: str
+    fingerprint: str
+    plan_structure: Dict[str, Any]
+    slots: List[RequirementSlot] = field(default_factory=list)
+    required_codes: FrozenSet[str] = frozenset()
+    elective_buckets: Dict[str, ElectiveBucket] = field(default_factory=dict)
+    option_codes: FrozenSet[str] = frozenset()  # Every code that can fill a slot
+
+    def missing_slots(self, taken_courses: FrozenSet[str]) -> List[RequirementSlot]:
+        # One set difference for the fixed courses, then a single pass in plan order
+        missing_required = self.required_codes - taken_courses
+        missing = []
+        for slot in self.slots:
+            if slot.kind == "course":
+                if slot.code in missing_required:
+                    missing.append(slot)
+            elif slot.kind == "choice":
+                if slot.options.isdisjoint(taken_courses):
+                    missing.append(slot)
+            else:
+                # Electives are tricky: for MVP we assume they are still needed
+                missing.append(slot)
+        return missing
+
+
+def plan_fingerprint(plan_structure: Dict[str, Any]) -> str:
+    canonical = json.dumps(plan_structure, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def plan_entry_options(course_name: str) -> Optional[List[str]]:
+    # Elective slots ("CSCI 300+ Elective") fill from a pool, not from listed codes
+    if "elective" in course_name.lower():
+        return None
+    return parse_course_options(course_name)
+
+
+def like_escape(text: str) -> str:
+    # Literal text inside a LIKE pattern matched with escape="\\"
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def find_by_program(query: Query, name_column, year_column, program: str, catalog_year: str):
+    """
+    First row of `query` for a program, compared case-insensitively: names
+    equal to `program` (plan names may add their catalog year) before names
+    that merely contain it. Within each, the requested catalog year wins,
+    then the newest.
+    """
+    pattern = like_escape(program)
+    exact = or_(name_column.ilike(pattern, escape="\\"), name_column.ilike(f"{pattern} ____-____", escape="\\"))
+    for condition in (exact, name_column.ilike(f"%{pattern}%", escape="\\")):
+        by_program = query.filter(condition)
+        row = by_program.filter(year_column == catalog_year).first()
+        if not row:
+            # Fall back to any catalog year of the same program
+            row = by_program.order_by(year_column.desc()).first()
+        if row:
+            return row
+    return None
+
+
+def compile_plan(plan_model: DegreePlan) -> CompiledPlan:
+    plan_structure = plan_model.plan_structure or {}
+    compiled = CompiledPlan(
+        plan_id=plan_model.id,
+        name=plan_model.name,
+        catalog_year=plan_model.catalog_year,
+        fingerprint=plan_fingerprint(plan_structure),
+        plan_structure=plan_structure,
+    )
+
+    required = set()
+    # Structure: { "freshman": { "fall": [ { "course": "CSCI 111", ... } ] } }
+    for year, semesters in plan_structure.items():
+        for semester, courses in semesters.items():
+            for course_req in courses:
+                course_name = course_req.get("course", "")
+                options = plan_entry_options(course_name)
+
+                prerequisites = tuple(course_groups(parse_prerequisites(course_req.get("prerequisites"))))
+                if options and len(options) == 1:
+                    slot = RequirementSlot("course", year, semester, course_req, frozenset(options), options[0], prerequisites)
+                    required.add(options[0])
+                elif options:
+                    slot = RequirementSlot("choice", year, semester, course_req, frozenset(options), None, prerequisites)
+                else:
+                    slot = RequirementSlot("elective", year, semester, course_req, prerequisites=prerequisites)
+                    bucket = compiled.elective_buckets.setdefault(course_name, ElectiveBucket(course_name))
+                    bucket.slots += 1
+                    bucket.credits += slot.credits
+                compiled.slots.append(slot)
+
+    compiled.required_codes = frozenset(required)
+
+    compiled.option_codes = frozenset(code for slot in compiled.slots for code in slot.options)
+    return compiled
+
+
+@dataclass
+class _IndexEntry:
+    plan: CompiledPlan
+    checked_at: float
+
+
+class PlanIndex:
+    """
+    Process-wide cache of compiled degree plans keyed by (program, catalog_year).
+    Entries are re-validated against the degree_plans row every `ttl_seconds`
+    and recompiled only when the stored plan actually changed.
+    """
+
+    def __init__(self, ttl_seconds: float = PLAN_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, str], _IndexEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, program: str, catalog_year: str) -> Optional[CompiledPlan]:
+        key = (program.lower(), catalog_year)
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry.checked_at < self.ttl_seconds:
+            return entry.plan
+
+        with self._lock:
+            # Another thread may have refreshed it while we waited
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry.checked_at < self.ttl_seconds:
+                return entry.plan
+
+            plan_model = self._find_plan(db, program, catalog_year)
+            if not plan_model:
+                self._entries.pop(key, None)
+                return None
+
+            fingerprint = plan_fingerprint(plan_model.plan_structure or {})
+            if entry and entry.plan.plan_id == plan_model.id and entry.plan.fingerprint == fingerprint:
+                compiled = entry.plan
+            else:
+                compiled = compile_plan(plan_model)
+
+            self._entries[key] = _IndexEntry(plan=compiled, checked_at=time.monotonic())
+            return compiled
+
+    def invalidate(self, program: Optional[str] = None, catalog_year: Optional[str] = None):
+        with self._lock:
+            if program is None and catalog_year is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if program is not None and key[0] != program.lower():
+                    continue
+                if catalog_year is not None and key[1] != catalog_year:
+                    continue
+                del self._entries[key]
+
+    def _find_plan(self, db: Session, program: str, catalog_year: str) -> Optional[DegreePlan]:
+        return find_by_program(db.query(DegreePlan), DegreePlan.name, DegreePlan.catalog_year, program, catalog_year)
+
+
+plan_index = PlanIndex()
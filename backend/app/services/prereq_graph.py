@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+from app.models.course import Course
+from app.services.course_codes import PrereqGroup, extract_prerequisite_groups, normalize_course_code
+from app.services.prereq_parser import PrerequisiteCheck, StudentContext, compile_prerequisites, course_groups
+
+logger = logging.getLogger(__name__)
+
+# The catalog changes a few times a year; rebuilding the graph is cheap but not free
+PREREQ_GRAPH_TTL_SECONDS = float(os.getenv("PREREQ_GRAPH_TTL_SECONDS", "900"))
+
+
+class PrerequisiteGraph:
+    """
+    Prerequisite DAG over the whole catalog. Edges point from a prerequisite to
+    the courses that need it. Built once; lookups are plain dict reads.
+    Rows are (course_code, credits, prerequisites_raw, metadata_json); the
+    parsed "prerequisite_ast" in metadata is preferred over the raw text.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, Optional[int], Optional[str], Optional[Dict[str, Any]]]]):
+        rows = [(normalize_course_code(code), credits, raw, metadata or {}) for code, credits, raw, metadata in rows if code]
+        known_prefixes = {row[0].rsplit(" ", 1)[0] for row in rows}
+
+        self.credits: Dict[str, int] = {}
+        self.prerequisites: Dict[str, List[PrereqGroup]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self.checks: Dict[str, PrerequisiteCheck] = {}
+
+        for code, credits, raw, metadata in rows:
+            self.credits[code] = credits or 3
+            if "prerequisite_ast" in metadata:
+                ast = metadata["prerequisite_ast"]
+                self.checks[code] = compile_prerequisites(ast)
+                extracted = course_groups(ast)
+            else:
+                extracted = extract_prerequisite_groups(raw, known_prefixes)
+
+            groups = []
+            for group in extracted:
+                # Cross-listed entries often mention themselves ("CIS 211 or Csci 211")
+                group = group - {code}
+                if group:
+                    groups.append(group)
+            self.prerequisites[code] = groups
+            for group in groups:
+                for prereq in group:
+                    self.dependents.setdefault(prereq, set()).add(code)
+
+        self.topological_order, self.cyclic = self._topological_sort()
+        if self.cyclic:
+            logger.warning(f"Prerequisite graph has {len(self.cyclic)} courses in cycles; their ordering is arbitrary.")
+        self.depth = self._critical_path_depth()
+
+    def groups_for(self, code: str) -> List[PrereqGroup]:
+        return self.prerequisites.get(code, [])
+
+    def is_eligible(self, code: str, student: StudentContext) -> bool:
+        # Courses without a parsed expression have nothing we can enforce
+        check = self.checks.get(code)
+        return check(student) if check else True
+
+    def _topological_sort(self) -> Tuple[List[str], Set[str]]:
+        nodes = set(self.prerequisites) | set(self.dependents)
+        in_degree = {node: 0 for node in nodes}
+        for dependents in self.dependents.values():
+            for dependent in dependents:
+                in_degree[dependent] += 1
+
+        queue = deque(sorted(node for node, degree in in_degree.items() if degree == 0))
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for dependent in self.dependents.get(node, ()):
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        cyclic = nodes - set(order)
+        order.extend(sorted(cyclic))
+        return order, cyclic
+
+    def _critical_path_depth(self) -> Dict[str, int]:
+        # Longest chain of courses that still have to follow each course
+        depth = {}
+        for node in reversed(self.topological_order):
+            depth[node] = 1 + max(
+                (depth.get(dependent, 0) for dependent in self.dependents.get(node, ()) if dependent not in self.cyclic),
+                default=0,
+            )
+        return depth
+
+
+class PrerequisiteGraphCache:
+    def __init__(self, ttl_seconds: float = PREREQ_GRAPH_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._graph: Optional[PrerequisiteGraph] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> PrerequisiteGraph:
+        if self._graph and time.monotonic() - self._built_at < self.ttl_seconds:
+            return self._graph
+
+        with self._lock:
+            if self._graph and time.monotonic() - self._built_at < self.ttl_seconds:
+                return self._graph
+            self._graph = self._load(db)
+            self._built_at = time.monotonic()
+            return self._graph
+
+    def _load(self, db: Session) -> PrerequisiteGraph:
+        rows = db.query(Course.course_code, Course.credits, Course.prerequisites_raw, Course.metadata_json).all()
+        return PrerequisiteGraph(rows)
+
+    def invalidate(self):
+        with self._lock:
+            self._graph = None
+
+
+prereq_graph_cache = PrerequisiteGraphCache()
@@ -0,0 +1,369 @@
+"""
+Prerequisite expressions compiled from catalog free text.
+
+Node types (all plain JSON so they can live in Course.metadata_json):
+    {"type": "and" | "or", "args": [...]}
+    {"type": "course", "code": "CSCI 111", "min_grade": "C-", "or_higher": false}
+    {"type": "test", "test": "ACT_MATH", "min": 22}
+    {"type": "hours", "min": 60}
+    {"type": "credits_in", "prefix": "CSCI", "min_level": 300, "min": 6}
+    {"type": "attribute", "value": "engineering", "negate": false}
+    {"type": "text", "text": "..."}   # Kept for advisors, never blocks a student
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.schemas.student import StudentProfile
+from app.services.course_codes import PrereqGroup, normalize_course_code
+
+GRADE_POINTS = {
+    "A": 4.0, "A-": 3.67, "B+": 3.33, "B": 3.0, "B-": 2.67, "C+": 2.33, "C": 2.0,
+    "C-": 1.67, "D+": 1.33, "D": 1.0, "D-": 0.67, "F": 0.0,
+    # Pass/credit grades count as a C for minimum-grade checks
+    "P": 2.0, "S": 2.0, "CR": 2.0, "TR": 2.0,
+}
+STANDING_HOURS = {"freshman": 0, "sophomore": 30, "junior": 60, "senior": 90}
+# Majors housed in the School of Engineering ("Engineering students only")
+ENGINEERING_MAJORS = {
+    "computer science", "electrical engineering", "civil engineering", "mechanical engineering",
+    "chemical engineering", "geological engineering", "biomedical engineering", "engineering",
+}
+TEST_NAMES = {"ACT": "ACT_MATH", "SAT": "SAT_MATH", "ALEKS": "ALEKS_PPL"}
+
+_GRADE = r"([A-F][+-]?)"
+# Text rewrites applied before tokenizing; annotations become [bracket] markers
+_REWRITES = [
+    (re.compile(r"≥\s*"), ""),
+    (re.compile(r"(?i)\(\s*min(?:imum)?\s+grade:?\s*(?:of\s*)?" + _GRADE + r"\s*\)"), r" [grade*:\1] "),
+    (re.compile(r"(?i)\(\s*(?:min(?:imum)?\s*)?" + _GRADE + r"\s*\)"), r" [grade:\1] "),
+    (re.compile(r"(?i)with a (?:minimum )?grade of " + _GRADE + r"(?: or better)?"), r" [grade:\1] "),
+    (re.compile(r"(\d{3})\s+" + _GRADE + r"(?=[\s.;,)]|$)"), r"\1 [grade:\2] "),
+    (re.compile(r"(?i)\(\s*(\d+)\s*hr\.?\s*\)"), r" \1 hr "),
+    (re.compile(r"(?i)\(\s*or (?:above|higher)[^)]*\)"), " [above] "),
+    (re.compile(r"(?i)\bor (?:above|higher)\b"), " [above] "),
+    (re.compile(r"(?i)(\d+)\s+or\s+more\b"), r"\1+"),
+]
+_STATEMENT_GRADE_RE = re.compile(r"(?i)minimum grade of " + _GRADE + r" for all of the following courses:?")
+_STATEMENT_SPLIT_RE = re.compile(
+    r"(?i:pre-?requ\w*:?)"
+    r"|\.(?=\s*(?:[A-Z(]|$))"
+    # "Code 123:" headings, also run into the previous title ("...Geometry IICsci 223:")
+    r"|(?<![A-Z])(?=[A-Z][A-Za-z]{1,3} \d{3}:)"
+    r"|(?<=[A-Z])(?=[A-Z][a-z]{1,3} \d{3}:)"
+    r"|(?<=[a-z0-9)])(?=(?:[A-Z][a-z]{1,3} \d{3}|Engineering|Non-engineering|Limited|Course|Graduate|Junior|Senior)\b)"
+)
+_TOKEN_RE = re.compile(r"(?i)(\(|\)|;|,|/|\bor\b|\band\b|\[[^\]]+\])")
+
+_CODE_TITLE_RE = re.compile(r"^([A-Za-z]{2,4}(?: [A-Za-z])?)\s+(\d{3}):")
+_COURSE_RE = re.compile(r"^([A-Za-z]{2,4}(?: [A-Za-z](?= \d))?)\s+(\d{3})\b")
+_BARE_NUMBER_RE = re.compile(r"^(\d{3})\b")
+_TEST_RE = re.compile(r"\b(ACT|SAT|ALEKS)\b")
+_NUMBER_RE = re.compile(r"(\d+)")
+_CREDITS_IN_RE = re.compile(r"(?i)(\d+)\s*(?:credit|hour)s?\s*(?:of\s+|in\s+)?([A-Za-z]{2,4})\s*(\d)00\+")
+_STANDING_RE = re.compile(r"(?i)\b(freshman|sophomore|junior|senior) standing")
+_HOURS_RE = re.compile(r"(?i)(\d+)\+?\s*(?:earned\s*)?(?:hours|hrs?)\b")
+_ENGINEERING_RE = re.compile(r"(?i)\b(non-)?engineering (?:students|majors)")
+
+
+class _Parser:
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+        self.prefix: Optional[str] = None
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos].lower() if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse_semi(self) -> Optional[Dict[str, Any]]:
+        parts = [self.parse_or()]
+        connector = "and"
+        while self.peek() == ";":
+            self.take()
+            if self.peek() in ("or", "and"):
+                if self.take().lower() == "or":
+                    connector = "or"
+            parts.append(self.parse_or())
+        return _combine(connector, parts)
+
+    def parse_or(self) -> Optional[Dict[str, Any]]:
+        parts = [self.parse_and()]
+        while self.peek() in ("or", "/"):
+            self.take()
+            parts.append(self.parse_and())
+        _spread_group_grades(parts)
+        return _combine("or", parts)
+
+    def parse_and(self) -> Optional[Dict[str, Any]]:
+        parts = [self.parse_unary()]
+        while self.peek() in (",", "and"):
+            self.take()
+            parts.append(self.parse_unary())
+        return _combine("and", parts)
+
+    def parse_unary(self) -> Optional[Dict[str, Any]]:
+        if self.peek() == "(":
+            self.take()
+            node = self.parse_semi()
+            if self.peek() == ")":
+                self.take()
+        else:
+            text = []
+            while self.peek() is not None and self.peek() not in ("(", ")", ";", ",", "/", "or", "and") and not self.peek().startswith("["):
+                text.append(self.take())
+            node = self.classify(" ".join(text).strip())
+
+        # Trailing annotations: [grade:C-], [grade*:B-], [above]
+        while self.peek() is not None and self.peek().startswith("["):
+            marker = self.take()
+            if node is None:
+                continue
+            if marker.lower() == "[above]":
+                for leaf in _course_leaves(node):
+                    leaf["or_higher"] = True
+            else:
+                grade = marker[marker.index(":") + 1:-1].upper()
+                for leaf in _course_leaves(node):
+                    if "min_grade" not in leaf or node is leaf:
+                        leaf["min_grade"] = grade
+                        if marker.startswith("[grade*"):
+                            leaf["_group_grade"] = True
+        return node
+
+    def classify(self, text: str) -> Optional[Dict[str, Any]]:
+        if not text:
+            return None
+
+        test = _TEST_RE.search(text)
+        if test:
+            number = _NUMBER_RE.search(text[test.end():]) or _NUMBER_RE.search(text)
+            name = TEST_NAMES[test.group(1)]
+            if name != "ALEKS_PPL" and not re.search(r"(?i)math", text):
+                name = test.group(1)
+            return {"type": "test", "test": name, "min": int(number.group(1)) if number else 0}
+
+        credits_in = _CREDITS_IN_RE.search(text)
+        if credits_in:
+            return {
+                "type": "credits_in",
+                "prefix": credits_in.group(2).upper(),
+                "min_level": int(credits_in.group(3)) * 100,
+                "min": int(credits_in.group(1)),
+            }
+
+        standing = _STANDING_RE.search(text)
+        hours = _HOURS_RE.search(text)
+        if standing or hours:
+            return {"type": "hours", "min": int(hours.group(1)) if hours else STANDING_HOURS[standing.group(1).lower()]}
+
+        if re.search(r"(?i)\bgraduate (?:standing|program)", text):
+            return {"type": "attribute", "value": "graduate", "negate": False}
+        engineering = _ENGINEERING_RE.search(text)
+        if engineering:
+            return {"type": "attribute", "value": "engineering", "negate": bool(engineering.group(1))}
+        if re.search(r"(?i)\bhonors\b", text):
+            return {"type": "attribute", "value": "honors", "negate": False}
+
+        course = _COURSE_RE.match(text)
+        if course and course.group(1).lower() not in ("of", "or", "and", "the"):
+            self.prefix = normalize_course_code(course.group(1))
+            return {"type": "course", "code": f"{self.prefix} {course.group(2)}"}
+        bare = _BARE_NUMBER_RE.match(text)
+        if bare and self.prefix:
+            return {"type": "course", "code": f"{self.prefix} {bare.group(1)}"}
+
+        return {"type": "text", "text": text}
+
+
+def _combine(node_type: str, parts: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    args = []
+    for part in parts:
+        if part is None:
+            continue
+        # Flatten (a or (b or c)) into (a or b or c)
+        if part["type"] == node_type:
+            args.extend(part["args"])
+        elif part not in args:
+            args.append(part)
+    if not args:
+        return None
+    if len(args) == 1:
+        return args[0]
+    return {"type": node_type, "args": args}
+
+
+def _course_leaves(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if node["type"] == "course":
+        return [node]
+    return [leaf for arg in node.get("args", []) for leaf in _course_leaves(arg)]
+
+
+def _spread_group_grades(parts: List[Optional[Dict[str, Any]]]):
+    # "Csci 113 or CIS 113 (Minimum grade: B-)" applies the grade to both options
+    pending = []
+    for part in parts:
+        if part is None:
+            continue
+        for leaf in _course_leaves(part):
+            if leaf.pop("_group_grade", False):
+                for other in pending:
+                    other["min_grade"] = leaf["min_grade"]
+                pending = []
+            elif "min_grade" not in leaf:
+                pending.append(leaf)
+
+
+def _apply_default_grade(node: Dict[str, Any], grade: str):
+    for leaf in _course_leaves(node):
+        leaf.setdefault("min_grade", grade)
+
+
+def _parse_statement(statement: str, parser: _Parser) -> Optional[Dict[str, Any]]:
+    if re.search(r"(?i)co-?requisite|cannot be booked", statement):
+        return {"type": "text", "text": statement}
+
+    code_title = _CODE_TITLE_RE.match(statement)
+    if code_title:
+        # "Csci 223: Computer Org. & Assembly Language(Minimum grade: C-)"
+        parser.prefix = normalize_course_code(code_title.group(1))
+        node = {"type": "course", "code": f"{parser.prefix} {code_title.group(2)}"}
+        grade = re.search(r"(?i)grade:?\s*" + _GRADE, statement)
+        if grade:
+            node["min_grade"] = grade.group(1).upper()
+        return node
+
+    default_grade = _STATEMENT_GRADE_RE.search(statement)
+    if default_grade:
+        statement = _STATEMENT_GRADE_RE.sub(" ", statement)
+    for pattern, replacement in _REWRITES:
+        statement = pattern.sub(replacement, statement)
+
+    parser.tokens = [token.strip() for token in _TOKEN_RE.split(statement) if token and token.strip()]
+    parser.pos = 0
+    node = parser.parse_semi()
+    if node and default_grade:
+        _apply_default_grade(node, default_grade.group(1).upper())
+    return node
+
+
+def _drop_course(node: Optional[Dict[str, Any]], code: str) -> Optional[Dict[str, Any]]:
+    if node is None or (node["type"] == "course" and node["code"] == code):
+        return None
+    if node["type"] in ("and", "or"):
+        return _combine(node["type"], [_drop_course(arg, code) for arg in node["args"]])
+    return node
+
+
+def parse_prerequisites(text: Optional[str], course_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Compiles a catalog prerequisite string into an expression tree.
+    Separate "Prerequisite:" statements and sentences are AND-ed together.
+    Returns None when there is nothing to require.
+    """
+    if not text or not text.strip():
+        return None
+
+    parser = _Parser([])
+    statements = []
+    for statement in _STATEMENT_SPLIT_RE.split(" ".join(text.split())):
+        statement = statement.strip(" .")
+        if statement:
+            statements.append(_parse_statement(statement, parser))
+    node = _combine("and", statements)
+    # Catalog pages sometimes list the course itself ("Csci 561: Computer Networks")
+    if course_code:
+        node = _drop_course(node, normalize_course_code(course_code))
+    return node
+
+
+def course_groups(node: Optional[Dict[str, Any]]) -> List[PrereqGroup]:
+    """
+    Reduces an expression tree to the AND-of-OR course groups the scheduler
+    plans around. An OR that a placement test can satisfy is not a course
+    requirement; standing and other non-course alternatives are ignored.
+    """
+    if not node:
+        return []
+    node_type = node["type"]
+    if node_type == "course":
+        return [] if node.get("or_higher") else [frozenset([node["code"]])]
+    if node_type == "and":
+        return [group for arg in node["args"] for group in course_groups(arg)]
+    if node_type == "or":
+        if any(arg["type"] == "test" for arg in node["args"]):
+            return []
+        codes = frozenset(code for arg in node["args"] for group in course_groups(arg) for code in group)
+        return [codes] if codes else []
+    return []
+
+
+class StudentContext:
+    """Pre-digested view of a StudentProfile so each check is a few dict lookups."""
+
+    def __init__(self, profile: StudentProfile):
+        self.best_points: Dict[str, float] = {}
+        self.by_prefix: Dict[str, List[Tuple[int, float, float]]] = {}
+        for course in profile.taken_courses:
+            points = GRADE_POINTS.get(course.grade.strip().upper())
+            if points is None or points <= 0:
+                continue
+            code = normalize_course_code(course.course_code)
+            self.best_points[code] = max(points, self.best_points.get(code, 0.0))
+            prefix, _, number = code.rpartition(" ")
+            if number[:3].isdigit():
+                self.by_prefix.setdefault(prefix, []).append((int(number[:3]), points, course.credits))
+
+        self.hours = profile.credits_earned or sum(c.credits for c in profile.taken_courses)
+        self.test_scores = {name.upper(): score for name, score in profile.test_scores.items()}
+        self.attributes = {attribute.lower() for attribute in profile.attributes}
+        if profile.major.lower() in ENGINEERING_MAJORS:
+            self.attributes.add("engineering")
+
+
+PrerequisiteCheck = Callable[[StudentContext], bool]
+
+
+def compile_prerequisites(node: Optional[Dict[str, Any]]) -> PrerequisiteCheck:
+    """Turns an expression tree into nested closures; evaluate with a StudentContext."""
+    if not node:
+        return lambda ctx: True
+
+    node_type = node["type"]
+    if node_type in ("and", "or"):
+        checks = [compile_prerequisites(arg) for arg in node["args"]]
+        if node_type == "and":
+            return lambda ctx: all(check(ctx) for check in checks)
+        return lambda ctx: any(check(ctx) for check in checks)
+
+    if node_type == "course":
+        code = node["code"]
+        min_points = GRADE_POINTS.get(node.get("min_grade"), 0.01)
+        if node.get("or_higher"):
+            prefix, _, number = code.rpartition(" ")
+            level = int(number)
+            return lambda ctx: any(n >= level and p >= min_points for n, p, _ in ctx.by_prefix.get(prefix, ()))
+        return lambda ctx: ctx.best_points.get(code, 0.0) >= min_points
+
+    if node_type == "test":
+        test, minimum = node["test"], node["min"]
+        return lambda ctx: ctx.test_scores.get(test, 0) >= minimum
+
+    if node_type == "hours":
+        minimum = node["min"]
+        return lambda ctx: ctx.hours >= minimum
+
+    if node_type == "credits_in":
+        prefix, level, minimum = node["prefix"], node["min_level"], node["min"]
+        return lambda ctx: sum(c for n, _, c in ctx.by_prefix.get(prefix, ()) if n >= level) >= minimum
+
+    if node_type == "attribute":
+        value, negate = node["value"], node.get("negate", False)
+        return lambda ctx: (value in ctx.attributes) != negate
+
+    # Free text we could not interpret is advisory only
+    return lambda ctx: True
@@ -2,39 +2,62 @@ from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmb
 from langchain_postgres import PGVector
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
+import asyncio
+import logging
 import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load env vars
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".env"))
-from app.core.database import DATABASE_URL
+from sqlalchemy import text
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.answer_cache import AnswerCache
+from app.services.collection_versions import get_collection_version
+from app.services.context_builder import AssembledContext, ContextBuilder
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.hybrid_retriever import HybridRetriever
+from app.services.token_counter import token_counter
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "olemiss_knowledge_base_gemini"
+# How often we ask the DB whether the collection was re-ingested
+COLLECTION_VERSION_CHECK_SECONDS = float(os.getenv("COLLECTION_VERSION_CHECK_SECONDS", "30"))
+# Connections opened ahead of the first request (capped by the pool size)
+RAG_WARMUP_CONNECTIONS = int(os.getenv("RAG_WARMUP_CONNECTIONS", "5"))
 
 class RAGService:
-    def __init__(self):
+    def __init__(self, embeddings=None, vector_store=None, llm=None):
+        # Any component can be injected (e.g. fake models for local testing)
         google_api_key = os.getenv("GOOGLE_API_KEY")
-        if not google_api_key:
+        if not google_api_key and not (embeddings and vector_store and llm):
             raise ValueError("GOOGLE_API_KEY is missing")
 
-        # 1. Setup Embeddings
-        self.embeddings = GoogleGenerativeAIEmbeddings(
+        # 1. Setup Embeddings (cached in memory and in Postgres, shared with the ingest)
+        self.embeddings = CachedEmbeddings(embeddings or GoogleGenerativeAIEmbeddings(
             model="models/text-embedding-004", 
             google_api_key=google_api_key
-        )
+        ))
 
         # 2. Setup Vector Store
-        connection_string = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://")
-        self.vector_store = PGVector(
-            embeddings=self.embeddings,
-            collection_name="olemiss_knowledge_base_gemini",
-            connection=connection_string,
-            use_jsonb=True,
-        )
-        self.retriever = self.vector_store.as_retriever(search_kwargs={"k": 5})
+        if vector_store is None:
+            # Shares the app's async engine (and its pool) instead of opening its own
+            vector_store = PGVector(
+                embeddings=self.embeddings,
+                collection_name=COLLECTION_NAME,
+                connection=async_engine,
+                use_jsonb=True,
+                async_mode=True,
+            )
+        self.vector_store = vector_store
+        self.retriever = HybridRetriever(self.vector_store, COLLECTION_NAME, k=5)
 
         # 3. Setup LLM (Gemini)
-        self.llm = ChatGoogleGenerativeAI(
+        self.llm = llm or ChatGoogleGenerativeAI(
             model="gemini-pro",
             temperature=0.3,
             google_api_key=google_api_key
@@ -54,19 +77,176 @@ Question: {question}
 
 Answer:"""
         self.prompt = ChatPromptTemplate.from_template(self.template)
+        # Built once; runnables are stateless so every request can share it
+        self.answer_chain = self.prompt | self.llm | StrOutputParser()
+        # Retrieved chunks are deduplicated and fitted to a token budget before prompting
+        self.context_builder = ContextBuilder()
+        self.prompt_counters = {"prompts": 0, "prompt_tokens": 0, "context_tokens": 0, "retrieved_tokens": 0}
+
+        # 5. Answer cache (exact + semantic), dropped whenever the collection is re-ingested
+        self.answer_cache = AnswerCache()
+        self._collection_version = None
+        self._version_checked_at = 0.0
+
+    async def get_answer(self, question: str, filters: Optional[Dict[str, str]] = None) -> str:
+        cached, embedding, docs = await self._prepare(question, filters)
+        if cached is not None:
+            return cached
+
+        answer = await self.answer_chain.ainvoke(self._chain_input(question, self._build_context(docs)))
+
+        if not filters:
+            self.answer_cache.put(question, embedding, answer)
+        return answer
+
+    async def stream_answer(self, question: str, filters: Optional[Dict[str, str]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yields ("retrieval", metadata) as soon as the context is known, then
+        ("token", text) chunks as the LLM produces them. Closing the generator
+        closes the upstream LLM stream.
+        """
+        cached, embedding, docs = await self._prepare(question, filters)
+        context = self._build_context(docs) if cached is None else None
+        yield "retrieval", {
+            "cached": cached is not None,
+            "path": "cache" if cached is not None else ("fast" if embedding is None else "search"),
+            # The chunks the answer is based on, after deduplication and the budget
+            "sources": [self._source(doc) for doc in (context.docs if context else docs)],
+        }
+        if cached is not None:
+            yield "token", cached
+            return
+
+        tokens = []
+        stream = self.answer_chain.astream(self._chain_input(question, context))
+        try:
+            async for token in stream:
+                # The model's closing chunk is empty; clients get no blank events
+                if token:
+                    tokens.append(token)
+                    yield "token", token
+        finally:
+            await stream.aclose()
+
+        # Only complete answers are cached
+        if not filters:
+            self.answer_cache.put(question, embedding, "".join(tokens))
+
+    async def _prepare(self, question: str, filters: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Optional[List[float]], list]:
+        # Returns (cached answer, question embedding, retrieved docs).
+        # Cached answers are unfiltered, so filtered questions bypass the cache.
+        await self._check_collection_version()
+
+        cached = None if filters else self.answer_cache.get_exact(question)
+        if cached is not None:
+            return cached, None, []
 
-    async def get_answer(self, question: str) -> str:
-        # Build Chain
-        def format_docs(docs):
-            return "\n\n".join(doc.page_content for doc in docs)
+        # Course codes and policy keywords are answered from the in-memory index, no embedding
+        match = await self.retriever.fast_path(question, filters)
+        if match and match.complete:
+            return None, None, match.docs[:self.retriever.k]
 
-        rag_chain = (
-            {"context": self.retriever | format_docs, "question": RunnablePassthrough()}
-            | self.prompt
-            | self.llm
-            | StrOutputParser()
+        # Embed once and reuse the vector for both the semantic cache and retrieval
+        embedding = await self.embeddings.aembed_query(question)
+        cached = None if filters else self.answer_cache.get_similar(question, embedding)
+        if cached is not None:
+            return cached, embedding, []
+
+        docs = await self.retriever.search(question, embedding, filters, match.docs if match else None)
+        return None, embedding, docs
+
+    def _build_context(self, docs: list) -> AssembledContext:
+        return self.context_builder.build(docs)
+
+    def _chain_input(self, question: str, context: AssembledContext) -> Dict[str, str]:
+        chain_input = {"context": context.text, "question": question}
+        prompt_tokens = token_counter.count(self.template.format(**chain_input))
+        self.prompt_counters["prompts"] += 1
+        self.prompt_counters["prompt_tokens"] += prompt_tokens
+        self.prompt_counters["context_tokens"] += context.tokens
+        self.prompt_counters["retrieved_tokens"] += context.retrieved_tokens
+        logger.info(
+            f"Prompt: {prompt_tokens} tokens; context {context.tokens} of {context.retrieved_tokens} retrieved "
+            f"({len(context.docs)} chunks kept, {context.dropped} dropped)"
         )
+        return chain_input
+
+    def _source(self, doc) -> Dict[str, Any]:
+        return {key: doc.metadata.get(key) for key in ("source", "title", "page_type", "catalog_year")}
+
+    async def warm_up(self):
+        """
+        Pre-opens pooled DB connections (shared by the planner and the vector
+        store), reads the collection version, builds the course/policy index
+        creates the embedding cache table and loads the tokenizer so the first
+        request does not pay for them.
+        """
+        await self._open_connections()
+        await self.embeddings.aensure_store()
+        # tiktoken loads (and may download) its encoding on first use
+        await asyncio.to_thread(token_counter.count, "")
+        await self._check_collection_version()
+        await self.retriever.warm_up()
+
+    async def _open_connections(self):
+        # Check out several connections at once so the pool really grows
+        pool_size = getattr(async_engine.pool, "size", lambda: 1)()
+        connections = [async_engine.connect() for _ in range(max(1, min(RAG_WARMUP_CONNECTIONS, pool_size)))]
+        try:
+            for connection in await asyncio.gather(*(connection.start() for connection in connections)):
+                await connection.execute(text("SELECT 1"))
+        finally:
+            await asyncio.gather(*(connection.close() for connection in connections))
+
+    def cache_stats(self):
+        return {
+            **self.answer_cache.stats(),
+            "collection_version": self._collection_version,
+            "embeddings": self.embeddings.stats(),
+            "prompts": self._prompt_stats(),
+        }
+
+    def _prompt_stats(self) -> Dict[str, Any]:
+        prompts = self.prompt_counters["prompts"]
+        return {
+            **self.prompt_counters,
+            "mean_prompt_tokens": self.prompt_counters["prompt_tokens"] / prompts if prompts else 0.0,
+            "context_budget": self.context_builder.token_budget,
+            "tokenizer": token_counter.name,
+        }
+
+    async def _check_collection_version(self):
+        if time.monotonic() - self._version_checked_at < COLLECTION_VERSION_CHECK_SECONDS:
+            return
+        self._version_checked_at = time.monotonic()
+
+        async with AsyncSessionLocal() as db:
+            version = await db.run_sync(get_collection_version, COLLECTION_NAME)
+        if self._collection_version is not None and version != self._collection_version:
+            logger.info(f"Collection {COLLECTION_NAME} re-ingested (v{version}); clearing answer cache.")
+            self.answer_cache.invalidate()
+        self._collection_version = version
+
+_rag_service: Optional[RAGService] = None
+_rag_service_lock = threading.Lock()
+
+
+def get_rag_service() -> RAGService:
+    """
+    Returns the shared RAGService, creating it on first use. Creating it
+    connects to Gemini and Postgres, so it never happens at import time.
+    """
+    global _rag_service
+    if _rag_service is None:
+        with _rag_service_lock:
+            if _rag_service is None:
+                _rag_service = RAGService()
+    return _rag_service
 
-        return await rag_chain.ainvoke(question)
 
-rag_service = RAGService()
+async def init_rag_service():
+    # Called from the app lifespan; client setup blocks, so it runs in a thread
+    start = time.perf_counter()
+    service = await asyncio.to_thread(get_rag_service)
+    await service.warm_up()
+    logger.info(f"RAG service ready in {time.perf_counter() - start:.2f}s")
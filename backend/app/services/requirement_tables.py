@@ -0,0 +1,320 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, Integer, MetaData, Row, String, Table, and_, delete, event, exists, func, insert, or_, select, text, tuple_, union
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from app.core.database import engine
+from app.models.course import DegreePlan, DegreeRequirement
+from app.models.requirement import Requirement, RequirementOption, RequirementPrefix
+from app.services.course_codes import normalize_course_code, parse_course_options
+from app.services.plan_index import find_by_program, plan_entry_options
+
+# Credit buckets ("Social Sciences", 6 credits) need credits // 3 courses
+CREDITS_PER_COURSE = 3
+# Level of "allowed_prefixes_extra_300plus" when the file names none
+DEFAULT_EXTRA_MIN_LEVEL = 300
+
+# Scratch tables of an audit, one row per student and per taken course
+_audit_metadata = MetaData()
+_audit_students = Table(
+    "audit_students", _audit_metadata,
+    Column("student", Integer, primary_key=True, autoincrement=False),
+    Column("owner_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+_audit_taken = Table(
+    "audit_taken", _audit_metadata,
+    Column("student", Integer, nullable=False),
+    Column("course_code", String, nullable=False),
+    Column("prefix", String, nullable=False),
+    Column("level", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+@event.listens_for(engine, "connect")
+def _create_audit_tables(dbapi_connection, connection_record):
+    # Once per pooled connection and committed right away: created inside an
+    # audit, the tables would go with the request's rolled-back transaction
+    cursor = dbapi_connection.cursor()
+    for table in _audit_metadata.sorted_tables:
+        cursor.execute(str(CreateTable(table, if_not_exists=True).compile(dialect=engine.dialect)))
+    cursor.close()
+    dbapi_connection.commit()
+    connection_record.info["audit_tables"] = True
+
+
+def split_course_code(code: str) -> Tuple[str, int]:
+    # "EL E 235" -> ("EL E", 235); "CSCI 311H" -> ("CSCI", 311)
+    prefix, _, number = code.rpartition(" ")
+    digits = "".join(ch for ch in number if ch.isdigit())
+    return prefix, int(digits[:3] or 0)
+
+
+def _requirement(position: int, section: str, term: Optional[str], name: str, credits: Optional[int],
+                 notes: Optional[str], options: Iterable[str], prefixes: Dict[str, int],
+                 kind: Optional[str] = None, min_courses: int = 1) -> Dict[str, Any]:
+    options = list(dict.fromkeys(normalize_course_code(code) for code in options))
+    if kind is None:
+        if not options and not prefixes:
+            kind = "elective"
+        elif len(options) == 1 and not prefixes:
+            kind = "course"
+        else:
+            kind = "choice"
+    return {
+        "position": position,
+        "section": section,
+        "term": term,
+        "name": name,
+        "kind": kind,
+        "credits": credits,
+        "min_courses": min_courses,
+        "notes": notes,
+        "options": options,
+        "prefixes": prefixes,
+    }
+
+
+def plan_requirements(plan_structure: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One requirement per four-year plan slot, classified like the planner's
+    compiled plan (app/services/plan_index.py): a course, a choice of
+    courses, or an elective that no listed course fills.
+    """
+    rows: List[Dict[str, Any]] = []
+    # Structure: { "freshman": { "fall": [ { "course": "CSCI 111", ... } ] } }
+    for year, semesters in (plan_structure or {}).items():
+        for semester, courses in semesters.items():
+            for entry in courses:
+                name = entry.get("course", "")
+                options = plan_entry_options(name) or []
+                rows.append(_requirement(len(rows), year, semester, name, entry.get("credits", 3), entry.get("notes"), options, {}))
+    return rows
+
+
+def _iter_sections(block: Dict[str, Any], section: str) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    # {"requirements": [...], "electives": [...], "data_science": {...}, "policy": "..."}
+    for key, value in block.items():
+        if isinstance(value, dict):
+            yield from _iter_sections(value, f"{section}/{key}")
+        elif isinstance(value, list) and all(isinstance(item, dict) for item in value):
+            yield (section if key == "requirements" else f"{section}/{key}"), value
+
+
+def requirement_set_requirements(blocks: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Flattens the blocks of a degree_requirements*.json file. Listed courses
+    ("options", "allowed_courses_specific", "paired", "sequences", or the
+    codes in "course") become options; "allowed_prefixes", the 300+ extras
+    and "filter" become prefixes with a minimum course level. A pair needs
+    all of its courses; sequences are approximated as any two of their
+    courses, and credit buckets as credits // 3 matching courses.
+    """
+    rows: List[Dict[str, Any]] = []
+    for block_name, block in (blocks or {}).items():
+        if not isinstance(block, dict):
+            continue
+        for section, items in _iter_sections(block, block_name):
+            for item in items:
+                name = item.get("course") or item.get("name", "")
+                credits = item.get("credits")
+                paired = item.get("paired") or []
+                sequences = item.get("sequences") or []
+                options = [*item.get("options", []), *item.get("allowed_courses_specific", []), *paired, *(code for sequence in sequences for code in sequence)]
+                if not options and item.get("course"):
+                    options = parse_course_options(item["course"]) or []
+
+                prefixes = {prefix.upper(): 0 for prefix in item.get("allowed_prefixes", [])}
+                extra_level = item.get("min_level_for_extra", DEFAULT_EXTRA_MIN_LEVEL)
+                for prefix in item.get("allowed_prefixes_extra_300plus", []):
+                    prefixes.setdefault(prefix.upper(), extra_level)
+                if item.get("filter", {}).get("prefix"):
+                    prefix = item["filter"]["prefix"].upper()
+                    prefixes[prefix] = min(prefixes.get(prefix, item["filter"].get("min_level", 0)), item["filter"].get("min_level", 0))
+
+                kind, min_courses = None, 1
+                if paired:
+                    kind, min_courses = "all", len(paired)
+                elif sequences:
+                    kind, min_courses = "choice", max(len(sequence) for sequence in sequences)
+                elif credits and (len(options) > 1 or prefixes):
+                    min_courses = max(1, credits // CREDITS_PER_COURSE)
+                rows.append(_requirement(len(rows), section, None, name, credits, item.get("notes") or item.get("policy"),
+                                         options, prefixes, kind, min_courses))
+    return rows
+
+
+def sync_requirements(db: Session, plan_names: Iterable[str] = (), requirement_set_keys: Iterable[Tuple[str, str]] = ()) -> Dict[str, int]:
+    """
+    Rebuilds the normalized requirement rows of the named plans and
+    (program, catalog_year) requirement sets, plus any plan or set that has
+    none yet (e.g. the first load after the tables were added). Runs in
+    the caller's transaction; the caller commits.
+    """
+    plan_names, requirement_set_keys = list(plan_names), list(requirement_set_keys)
+
+    # 1. Owners to rebuild
+    plans = db.execute(select(DegreePlan.id, DegreePlan.plan_structure).where(or_(
+        DegreePlan.name.in_(plan_names),
+        ~exists().where(Requirement.plan_id == DegreePlan.id),
+    ))).all()
+    requirement_sets = db.execute(select(DegreeRequirement.id, DegreeRequirement.blocks).where(or_(
+        tuple_(DegreeRequirement.program, DegreeRequirement.catalog_year).in_(requirement_set_keys),
+        ~exists().where(Requirement.requirement_set_id == DegreeRequirement.id),
+    ))).all()
+    counts = {"plans": len(plans), "requirement_sets": len(requirement_sets), "requirements": 0, "options": 0, "prefixes": 0}
+    if not plans and not requirement_sets:
+        return counts
+
+    # 2. Drop their old rows (explicitly: SQLite only cascades with foreign keys enabled)
+    owned = or_(Requirement.plan_id.in_([row.id for row in plans]), Requirement.requirement_set_id.in_([row.id for row in requirement_sets]))
+    stale = select(Requirement.id).where(owned)
+    db.execute(delete(RequirementOption).where(RequirementOption.requirement_id.in_(stale)))
+    db.execute(delete(RequirementPrefix).where(RequirementPrefix.requirement_id.in_(stale)))
+    db.execute(delete(Requirement).where(owned))
+
+    # 3. Insert the new ones, then read their ids back by (owner, position)
+    built = {(row.id, None, requirement["position"]): requirement for row in plans for requirement in plan_requirements(row.plan_structure)}
+    built.update({(None, row.id, requirement["position"]): requirement for row in requirement_sets for requirement in requirement_set_requirements(row.blocks)})
+    if not built:
+        return counts
+    columns = ("position", "section", "term", "name", "kind", "credits", "min_courses", "notes")
+    db.execute(insert(Requirement), [
+        {"plan_id": plan_id, "requirement_set_id": requirement_set_id, **{name: requirement[name] for name in columns}}
+        for (plan_id, requirement_set_id, _), requirement in built.items()
+    ])
+    ids = {
+        (plan_id, requirement_set_id, position): id_
+        for id_, plan_id, requirement_set_id, position in db.execute(
+            select(Requirement.id, Requirement.plan_id, Requirement.requirement_set_id, Requirement.position).where(owned)
+        )
+    }
+
+    options = [{"requirement_id": ids[key], "course_code": code} for key, requirement in built.items() for code in requirement["options"]]
+    prefixes = [
+        {"requirement_id": ids[key], "prefix": prefix, "min_level": level}
+        for key, requirement in built.items() for prefix, level in requirement["prefixes"].items()
+    ]
+    if options:
+        db.execute(insert(RequirementOption), options)
+    if prefixes:
+        db.execute(insert(RequirementPrefix), prefixes)
+    counts.update(requirements=len(built), options=len(options), prefixes=len(prefixes))
+    return counts
+
+
+def find_requirement_set(db: Session, program: str, catalog_year: str) -> Optional[DegreeRequirement]:
+    # Same matching as the plan lookup
+    return find_by_program(db.query(DegreeRequirement), DegreeRequirement.program, DegreeRequirement.catalog_year, program, catalog_year)
+
+
+def requirements_with_course(db: Session, course_code: str) -> List[Dict[str, Any]]:
+    """
+    Every plan slot and requirement-set entry a course counts toward, listed
+    or through its prefix, from the course_code and prefix indexes.
+    """
+    code = normalize_course_code(course_code)
+    prefix, level = split_course_code(code)
+    matching = union(
+        select(RequirementOption.requirement_id).where(RequirementOption.course_code == code),
+        select(RequirementPrefix.requirement_id).where(RequirementPrefix.prefix == prefix, RequirementPrefix.min_level <= level),
+    ).subquery()
+    rows = db.execute(
+        select(Requirement, DegreePlan.name, DegreeRequirement.program, func.coalesce(DegreePlan.catalog_year, DegreeRequirement.catalog_year))
+        .join(matching, matching.c.requirement_id == Requirement.id)
+        .outerjoin(DegreePlan, DegreePlan.id == Requirement.plan_id)
+        .outerjoin(DegreeRequirement, DegreeRequirement.id == Requirement.requirement_set_id)
+        .order_by(Requirement.plan_id, Requirement.requirement_set_id, Requirement.position)
+    ).all()
+    return [
+        {"plan": plan, "program": program, "catalog_year": catalog_year, **requirement_entry(requirement)}
+        for requirement, plan, program, catalog_year in rows
+    ]
+
+
+def requirement_entry(requirement) -> Dict[str, Any]:
+    # A Requirement or a row of its columns
+    return {
+        "section": requirement.section,
+        "term": requirement.term,
+        "name": requirement.name,
+        "kind": requirement.kind,
+        "credits": requirement.credits,
+    }
+
+
+def audit_students(db: Session, owner_ids: Sequence[Optional[int]], taken_sets: Sequence[Iterable[str]], by: str = "plan") -> List[List[Row]]:
+    """
+    Unmet requirements of many students in one query. Student i follows
+    owner_ids[i], a degree plan id (by="plan") or a requirement set id
+    (by="requirements"); students may follow different owners. Taken
+    courses are loaded into temporary tables and joined to the option and
+    prefix indexes; a requirement is unmet while fewer than its
+    min_courses distinct taken courses match it. Electives have nothing
+    to match, so they stay unmet, as in the planner. Each student gets rows
+    of the requirement columns (id, position, section, term, name, kind,
+    credits) in plan order.
+    """
+    missing: List[List[Row]] = [[] for _ in owner_ids]
+    students = [{"student": i, "owner_id": owner_id} for i, owner_id in enumerate(owner_ids) if owner_id is not None]
+    if not students:
+        return missing
+    owner = Requirement.plan_id if by == "plan" else Requirement.requirement_set_id
+    s, t = _audit_students, _audit_taken
+
+    # 1. Load the students and their courses. The tables live as long as the
+    # connection (sessions on another engine create them here) and are reused
+    # by its next audit, so earlier rows are cleared rather than trusted
+    connection = db.connection()
+    if "audit_tables" not in connection.info:
+        _audit_metadata.create_all(connection, checkfirst=True)
+    # Postgres never vacuums temporary tables: a rolled-back TRUNCATE takes
+    # its inserts with it, where deleted rows would pile up on the connection
+    if connection.dialect.name == "postgresql":
+        db.execute(text("TRUNCATE audit_students, audit_taken"))
+    else:
+        db.execute(delete(t))
+        db.execute(delete(s))
+    db.execute(insert(s), students)
+    taken = []
+    for row in students:
+        for code in {normalize_course_code(code) for code in taken_sets[row["student"]]}:
+            prefix, level = split_course_code(code)
+            taken.append({"student": row["student"], "course_code": code, "prefix": prefix, "level": level})
+    if taken:
+        db.execute(insert(t), taken)
+
+    # 2. (student, requirement, course) matches through either index, then counts
+    by_option = (
+        select(t.c.student, Requirement.id.label("requirement_id"), t.c.course_code)
+        .join(s, s.c.student == t.c.student)
+        .join(RequirementOption, RequirementOption.course_code == t.c.course_code)
+        .join(Requirement, and_(Requirement.id == RequirementOption.requirement_id, owner == s.c.owner_id))
+    )
+    by_prefix = (
+        select(t.c.student, Requirement.id.label("requirement_id"), t.c.course_code)
+        .join(s, s.c.student == t.c.student)
+        .join(RequirementPrefix, and_(RequirementPrefix.prefix == t.c.prefix, RequirementPrefix.min_level <= t.c.level))
+        .join(Requirement, and_(Requirement.id == RequirementPrefix.requirement_id, owner == s.c.owner_id))
+    )
+    matches = union(by_option, by_prefix).subquery()
+    matched = (
+        select(matches.c.student, matches.c.requirement_id, func.count().label("courses"))
+        .group_by(matches.c.student, matches.c.requirement_id)
+        .subquery()
+    )
+
+    # 3. Every requirement of the student's owner that is short of courses
+    unmet = db.execute(
+        select(s.c.student, Requirement.id, Requirement.position, Requirement.section, Requirement.term, Requirement.name, Requirement.kind, Requirement.credits)
+        .select_from(s)
+        .join(Requirement, owner == s.c.owner_id)
+        .outerjoin(matched, and_(matched.c.student == s.c.student, matched.c.requirement_id == Requirement.id))
+        .where(func.coalesce(matched.c.courses, 0) < Requirement.min_courses)
+        .order_by(s.c.student, Requirement.position)
+    ).all()
+
+    for row in unmet:
+        missing[row.student].append(row)
+    return missing
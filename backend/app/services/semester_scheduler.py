@@ -0,0 +1,162 @@
+import json
+import math
+import os
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from glob import glob
+from typing import Any, Dict, FrozenSet, List
+
+from app.services.plan_index import RequirementSlot
+from app.services.prereq_graph import PrerequisiteGraph
+
+# Catalog JSON files (data/olemiss/<program>/<year>/policies.json)
+CATALOG_DATA_DIR = os.getenv(
+    "CATALOG_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "olemiss"),
+)
+# Preferred semester load; the scheduler balances around it within policy limits
+PLANNER_TARGET_CREDITS = int(os.getenv("PLANNER_TARGET_CREDITS", "15"))
+
+
+@dataclass(frozen=True)
+class SchedulingPolicy:
+    credit_min_fulltime: int = 12
+    credit_max_standard: int = 19
+    credit_max_overload: int = 22
+    overload_gpa_threshold: float = 3.0
+    target_credits: int = PLANNER_TARGET_CREDITS
+
+    def max_load(self, gpa: float) -> int:
+        if gpa >= self.overload_gpa_threshold:
+            return self.credit_max_overload
+        return self.credit_max_standard
+
+
+@lru_cache(maxsize=32)
+def load_scheduling_policy(program: str, catalog_year: str) -> SchedulingPolicy:
+    year_dir = catalog_year.replace("-", "_")
+    for policies_file in sorted(glob(os.path.join(CATALOG_DATA_DIR, "*", year_dir, "policies.json"))):
+        with open(policies_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if program.lower() not in data.get("program", "").lower():
+            continue
+        policies = data.get("policies", {})
+        defaults = SchedulingPolicy()
+        return SchedulingPolicy(
+            credit_min_fulltime=policies.get("credit_min_fulltime", defaults.credit_min_fulltime),
+            credit_max_standard=policies.get("credit_max_standard", defaults.credit_max_standard),
+            credit_max_overload=policies.get("credit_max_overload", defaults.credit_max_overload),
+            overload_gpa_threshold=policies.get("overload_gpa_threshold", defaults.overload_gpa_threshold),
+        )
+    return SchedulingPolicy()
+
+
+class SemesterScheduler:
+    """
+    Packs missing requirement slots into semesters in topological order.
+    A course is only placed after every prerequisite group is satisfied by a
+    taken course or by a course placed in an earlier semester. Among ready
+    courses, the ones heading the longest remaining prerequisite chain go first
+    so the critical path (and therefore graduation) is not delayed.
+    """
+
+    def __init__(self, graph: PrerequisiteGraph, policy: SchedulingPolicy):
+        self.graph = graph
+        self.policy = policy
+
+    def schedule(self, slots: List[RequirementSlot], taken_courses: FrozenSet[str], gpa: float) -> List[List[Dict[str, Any]]]:
+        if not slots:
+            return []
+
+        blockers = self._blocking_groups(slots, taken_courses)
+        depth = self._chain_depth(len(slots), blockers)
+        catalog_depth = [max((self.graph.depth.get(code, 1) for code in slot.options), default=0) for slot in slots]
+        priority = sorted(range(len(slots)), key=lambda i: (-depth[i], -catalog_depth[i], i))
+
+        # Balance the load: enough semesters for the credits and the longest chain,
+        # then spread the remaining credits evenly over the remaining semesters
+        load_cap = min(self.policy.target_credits, self.policy.max_load(gpa))
+        remaining_credits = sum(slot.credits for slot in slots)
+        semesters_needed = max(math.ceil(remaining_credits / load_cap), max(depth))
+
+        done = set()
+        schedule = []
+        while len(done) < len(slots):
+            ready = [i for i in priority if i not in done and all(not group.isdisjoint(done) for group in blockers[i])]
+            if not ready:
+                # Only reachable through a prerequisite cycle in the catalog data; break it
+                ready = [next(i for i in priority if i not in done)]
+
+            semesters_left = max(semesters_needed - len(schedule), 1)
+            target_load = math.ceil(remaining_credits / semesters_left)
+            target_load = min(max(target_load, self.policy.credit_min_fulltime), load_cap)
+
+            semester, load = [], 0
+            for i in ready:
+                credits = slots[i].credits
+                if not semester or load + credits <= target_load:
+                    semester.append(i)
+                    load += credits
+
+            schedule.append([slots[i].requirement for i in semester])
+            done.update(semester)
+            remaining_credits -= load
+        return schedule
+
+    def _blocking_groups(self, slots: List[RequirementSlot], taken_courses: FrozenSet[str]) -> List[List[FrozenSet[int]]]:
+        # Map every prerequisite group onto the slots that could satisfy it
+        providers: Dict[str, List[int]] = {}
+        for i, slot in enumerate(slots):
+            for code in slot.options:
+                providers.setdefault(code, []).append(i)
+
+        blockers = []
+        for i, slot in enumerate(slots):
+            slot_blockers = []
+            for group in self._slot_groups(slot):
+                if not group.isdisjoint(taken_courses):
+                    continue
+                satisfying = frozenset(j for code in group for j in providers.get(code, ()) if j != i)
+                # Nothing in the plan satisfies it (placement, transfer credit...): not ours to schedule
+                if satisfying:
+                    slot_blockers.append(satisfying)
+            blockers.append(slot_blockers)
+        return blockers
+
+    def prerequisite_codes(self, slots: List[RequirementSlot]) -> FrozenSet[str]:
+        # The only taken courses schedule() looks at, besides the slots themselves
+        return frozenset(code for slot in slots for group in self._slot_groups(slot) for code in group)
+
+    def _slot_groups(self, slot: RequirementSlot) -> List[FrozenSet[str]]:
+        groups = list(slot.prerequisites)
+        for code in slot.options:
+            if self.graph.groups_for(code):
+                groups.extend(self.graph.groups_for(code))
+                break
+        return groups
+
+    def _chain_depth(self, size: int, blockers: List[List[FrozenSet[int]]]) -> List[int]:
+        # Longest chain of remaining slots starting at each slot (Kahn's order, reversed)
+        dependents: List[set] = [set() for _ in range(size)]
+        in_degree = [0] * size
+        for i, groups in enumerate(blockers):
+            prereqs = set().union(*groups) if groups else set()
+            in_degree[i] = len(prereqs)
+            for j in prereqs:
+                dependents[j].add(i)
+
+        queue = deque(i for i in range(size) if in_degree[i] == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in dependents[i]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    queue.append(j)
+
+        depth = [1] * size
+        for i in reversed(order):
+            depth[i] = 1 + max((depth[j] for j in dependents[i]), default=0)
+        return depth
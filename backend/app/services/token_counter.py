@@ -0,0 +1,66 @@
+import logging
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# cl100k is not Gemini's tokenizer, but it is local and close enough for budgets
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+# Fallback when the encoding cannot be loaded (tiktoken downloads it on first use)
+CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """
+    Counts and truncates text in tokens with tiktoken, loaded on first use.
+    Without network access to fetch the encoding it falls back to a
+    characters-per-token estimate, so budgets still hold approximately.
+    """
+
+    def __init__(self, encoding_name: str = TOKEN_ENCODING):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.encoding_name if self._get_encoding() else f"{CHARS_PER_TOKEN} chars/token"
+
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        # Cut at max_tokens, then back to the last line or sentence end if one is close
+        encoding = self._get_encoding()
+        if encoding is None:
+            cut = text[:max_tokens * CHARS_PER_TOKEN]
+        else:
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            cut = encoding.decode(tokens[:max_tokens])
+        if len(cut) >= len(text):
+            return text
+        boundary = max(cut.rfind("\n"), cut.rfind(". ") + 1)
+        return cut[:boundary].rstrip() if boundary > len(cut) * 0.7 else cut.rstrip()
+
+    def _get_encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception as e:
+                        logger.warning(f"tiktoken encoding {self.encoding_name} unavailable ({e}); estimating tokens.")
+                    self._loaded = True
+        return self._encoding
+
+
+token_counter = TokenCounter()
@@ -0,0 +1,143 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple, Union
+
+from app.schemas.student import StudentProfile
+from app.services.transcript_parser import parser_service
+
+# Worker processes parsing PDFs (pdfplumber is CPU-bound and holds the GIL)
+TRANSCRIPT_WORKERS = int(os.getenv("TRANSCRIPT_WORKERS", str(os.cpu_count() or 1)))
+# Parses running + waiting before new uploads are rejected
+TRANSCRIPT_MAX_PENDING = int(os.getenv("TRANSCRIPT_MAX_PENDING", str(TRANSCRIPT_WORKERS * 4)))
+TRANSCRIPT_PARSE_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIPT_PARSE_TIMEOUT_SECONDS", "30"))
+# How long a batch waits before retrying when single uploads filled the queue
+BATCH_BUSY_RETRY_SECONDS = 0.5
+
+
+class ParserBusyError(Exception):
+    """Raised when the parse queue is full; the API maps it to 429."""
+
+
+class ParseTimeoutError(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ParseTimeoutError("Transcript parsing timed out")
+
+
+def _parse_in_worker(source: Union[str, bytes], timeout: float) -> StudentProfile:
+    # Runs in a pool process. SIGALRM stops a runaway parse inside the worker,
+    # so a pathological PDF cannot hold the process after the request gave up.
+    use_alarm = hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return parser_service.parse_pdf(source)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class TranscriptExecutor:
+    """
+    Runs transcript parsing in a process pool so uploads never block the
+    event loop. At most `max_pending` parses are accepted at once; beyond that
+    `parse_pdf` raises ParserBusyError immediately instead of queueing.
+    """
+
+    def __init__(
+        self,
+        workers: int = TRANSCRIPT_WORKERS,
+        max_pending: int = TRANSCRIPT_MAX_PENDING,
+        timeout_seconds: float = TRANSCRIPT_PARSE_TIMEOUT_SECONDS,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._pending = 0
+
+    def is_full(self) -> bool:
+        return self._pending >= self.max_pending
+
+    async def parse_pdf(self, source: Union[str, bytes]) -> StudentProfile:
+        # `source` is a path or the PDF bytes (bytes avoid a temp file round-trip).
+        # _pending is only touched from the event loop thread, so a plain counter is enough
+        if self.is_full():
+            raise ParserBusyError(f"{self._pending} transcripts are already being parsed")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_pool(), _parse_in_worker, source, self.timeout_seconds)
+            try:
+                # The worker enforces the timeout itself; the grace period covers time spent queued
+                return await asyncio.wait_for(future, self.timeout_seconds * 2)
+            except asyncio.TimeoutError:
+                raise ParseTimeoutError("Transcript parsing timed out")
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool for the next upload
+                self.shutdown()
+                raise
+        finally:
+            self._pending -= 1
+
+    async def parse_batch(
+        self, jobs: Iterable[Tuple[str, Callable[[], Awaitable[bytes]]]]
+    ) -> AsyncIterator[Tuple[str, Union[StudentProfile, Exception]]]:
+        """
+        Parses (name, loader) jobs, at most `workers` at a time, and yields
+        (name, profile or exception) as each one finishes. Loaders run only
+        when a slot is free, so a large batch is never fully in memory. A full
+        queue delays the batch instead of failing it.
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def run(name, load):
+            async with semaphore:
+                try:
+                    source = await load()
+                    while True:
+                        try:
+                            return name, await self.parse_pdf(source)
+                        except ParserBusyError:
+                            await asyncio.sleep(BATCH_BUSY_RETRY_SECONDS)
+                except Exception as e:
+                    return name, e
+
+        tasks = [asyncio.create_task(run(name, load)) for name, load in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away (or the consumer stopped): drop what is left
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        return {"workers": self.workers, "pending": self._pending, "max_pending": self.max_pending}
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use; "spawn" avoids forking the threads of a running server
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+
+transcript_executor = TranscriptExecutor()
@@ -1,44 +1,161 @@
+import glob
+import io
+import json
+import logging
+import os
 import re
 import pdfplumber
-from typing import List
-from app.schemas.student import StudentProfile, CourseGrade
+from typing import Any, BinaryIO, FrozenSet, Iterator, Optional, Set, Union
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.database import SessionLocal
+from app.models.course import Course
+from app.schemas.student import StudentProfile
+from app.services.course_codes import normalize_course_code, parse_course_options
+from app.services.semester_scheduler import CATALOG_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# The GPA summary closes the academic record; pages after it are legends/keys
+TRAILER_PATTERN = re.compile(r"Cumulative GPA\s*[:]\s*\d+\.\d+")
+
+# Always recognised, on top of whatever the catalog and the courses table list
+DEFAULT_DEPARTMENTS = frozenset({
+    "CSCI", "CIS", "MATH", "WRIT", "BISC", "CHEM", "PHYS", "ECON", "PSY", "SOC", "ENGR", "HON",
+})
+
+# The text is scanned once, line by line: each line is split into tokens and
+# matched positionally, so there is no regex backtracking over long lines.
+#   "Fall 2023"                                   term header
+#   "CSCI 111  Computer Science I   3.00   A ..."  dept (one or two tokens,
+#       e.g. "EL E"), 3-digit number, then the last credits token that is
+#       followed by a grade token (titles come first, quality points last)
+#   "Cumulative GPA: 3.45"                        GPA (the last one wins)
+# Departments are looked up in a set, so the cost does not grow with the
+# number of departments the way a regex alternation does.
+SEASONS = frozenset({"Fall", "Spring", "Summer", "Winter", "Intersession"})
+YEAR_PATTERN = re.compile(r"(?:19|20)\d\d")
+CREDITS_PATTERN = re.compile(r"\d+\.\d\d")
+GRADE_PATTERN = re.compile(r"[A-Z][+-]?")
+GPA_PATTERN = re.compile(r"Cumulative GPA\s*[:]\s*(\d+\.\d+)")
+
+
+def _codes_in_catalog(node: Any, codes: Set[str]):
+    # Walks the catalog JSON collecting codes from "course"/"code"/"options"/"title" fields
+    if isinstance(node, list):
+        for item in node:
+            _codes_in_catalog(item, codes)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            if key in ("course", "code") and isinstance(value, str):
+                codes.update(parse_course_options(value) or [])
+            elif key == "options" and isinstance(value, list):
+                for option in value:
+                    if isinstance(option, str):
+                        codes.update(parse_course_options(option) or [])
+            elif key == "title" and isinstance(value, str) and ":" in value:
+                # csci_courses_full.json titles: "CIS 111: Computer Science I"
+                codes.update(parse_course_options(value.split(":", 1)[0]) or [])
+            else:
+                _codes_in_catalog(value, codes)
+
+
+def load_catalog_departments(data_dir: str = CATALOG_DATA_DIR) -> Set[str]:
+    codes: Set[str] = set()
+    for path in glob.glob(os.path.join(data_dir, "*", "*", "*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _codes_in_catalog(json.load(f), codes)
+        except (OSError, json.JSONDecodeError):
+            continue
+    return {code.rsplit(" ", 1)[0] for code in codes}
+
+
+def load_database_departments() -> Set[str]:
+    db = SessionLocal()
+    try:
+        return {normalize_course_code(code).rsplit(" ", 1)[0] for (code,) in db.query(Course.course_code).all() if code}
+    except SQLAlchemyError:
+        # No database (e.g. parsing offline); the catalog files still cover it
+        return set()
+    finally:
+        db.close()
 
 class TranscriptParser:
-    def parse_pdf(self, file_path: str) -> StudentProfile:
-        text_content = ""
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text_content += page.extract_text() + "\n"
+    def __init__(self, departments: Optional[Set[str]] = None):
+        # Loaded on first parse (per process) unless given explicitly
+        self._departments: Optional[FrozenSet[str]] = frozenset(departments) if departments else None
+
+    @property
+    def departments(self) -> FrozenSet[str]:
+        if self._departments is None:
+            self._departments = DEFAULT_DEPARTMENTS | load_catalog_departments() | load_database_departments()
+            logger.info(f"Transcript parser knows {len(self._departments)} department codes.")
+        return self._departments
+
+    def parse_pdf(self, source: Union[str, bytes, BinaryIO]) -> StudentProfile:
+        # Accepts a path, raw bytes or any binary file object (e.g. an upload's spooled file)
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+
+        with pdfplumber.open(source) as pdf:
+            text_content = "\n".join(self._page_texts(pdf))
         
         return self._extract_data_from_text(text_content)
 
+    def _page_texts(self, pdf) -> Iterator[str]:
+        # Pages are extracted one at a time and released right after
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            page.close()
+            yield text
+            if TRAILER_PATTERN.search(text):
+                return
+
     def _extract_data_from_text(self, text: str) -> StudentProfile:
-        profile = StudentProfile()
-        
-        # 1. Extract Courses (Simple Regex based on Ole Miss format commonly seen)
-        # Pattern: CSCI 111  Computer Science I   3.00   A
-        # This is a heuristic and might need fine-tuning with real usage
-        course_pattern = re.compile(r"(CSCI|MATH|WRIT|BISC|CHEM|PHYS|ECON|PSY|SOC|Fine Arts|Humanities)\s+(\d{3})\s+.*?\s+(\d+\.\d{2})\s+([A-Z][+-]?)")
-        
-        matches = course_pattern.findall(text)
-        for m in matches:
-            dept, num, creds, grade = m
-            profile.taken_courses.append(CourseGrade(
-                course_code=f"{dept} {num}",
-                grade=grade,
-                credits=float(creds)
-            ))
-
-        # 2. Extract GPA
-        # Pattern: Cumulative GPA: 3.56
-        gpa_pattern = re.compile(r"Cumulative GPA\s*[:]\s*(\d+\.\d+)")
-        gpa_match = gpa_pattern.search(text)
-        if gpa_match:
-            profile.gpa = float(gpa_match.group(1))
-
-        # 3. Calculate total credits
-        profile.credits_earned = sum(c.credits for c in profile.taken_courses)
-
-        return profile
+        departments = self.departments
+        courses = []
+        term = None
+        gpa = 0.0
+
+        for line in text.splitlines():
+            tokens = line.split()
+            if len(tokens) < 2:
+                continue
+
+            # 1. Course line: dept and number lead, credits and grade follow the title
+            if tokens[0] in departments:
+                start = 1
+            elif len(tokens) > 2 and f"{tokens[0]} {tokens[1]}" in departments:
+                start = 2
+            else:
+                start = 0
+            if start and len(tokens[start]) == 3 and tokens[start].isdigit():
+                # From the right: the pair sits at the end, before any quality points
+                for i in range(len(tokens) - 2, start, -1):
+                    if GRADE_PATTERN.fullmatch(tokens[i + 1]) and CREDITS_PATTERN.fullmatch(tokens[i]):
+                        dept = " ".join(tokens[:start])
+                        courses.append({"course_code": f"{dept} {tokens[start]}", "grade": tokens[i + 1], "semester": term, "credits": float(tokens[i])})
+                        break
+                continue
+
+            # 2. Term header ("Fall 2023"), wherever it sits on the line
+            if not SEASONS.isdisjoint(tokens):
+                for season, year in zip(tokens, tokens[1:]):
+                    if season in SEASONS and YEAR_PATTERN.fullmatch(year):
+                        term = f"{season} {year}"
+                continue
+
+            # 3. GPA: the last cumulative figure is the final one
+            if "GPA" in line:
+                gpa_match = GPA_PATTERN.search(line)
+                if gpa_match:
+                    gpa = float(gpa_match.group(1))
+
+        # 4. Calculate total credits; the profile validates all courses in one call
+        return StudentProfile(
+            taken_courses=courses,
+            gpa=gpa,
+            credits_earned=sum(course["credits"] for course in courses),
+        )
 
 parser_service = TranscriptParser()
@@ -0,0 +1,135 @@
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# text-embedding-004; every collection in langchain_pg_embedding must use the same size
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "768"))
+# "hnsw" (default: no training, handles incremental ingest), "ivfflat" or "none" (exact scans)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+# Per-query defaults; raise for recall, lower for latency
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+# 0 = size the lists from the row count (rows / 1000, sqrt(rows) past 1M rows)
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "0"))
+
+# Metadata keys queries may filter on (exact match)
+FILTER_KEYS = ("catalog_year", "page_type")
+
+INDEX_NAMES = {"hnsw": "ix_langchain_pg_embedding_hnsw", "ivfflat": "ix_langchain_pg_embedding_ivfflat"}
+
+# Cosine distance (<=>), the PGVector default, so vector_cosine_ops indexes apply
+SEARCH_SQL = """
+    SELECT e.id, e.document, e.cmetadata, e.embedding <=> CAST(:embedding AS vector) AS distance
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+    WHERE c.name = :collection {filters}
+    ORDER BY e.embedding <=> CAST(:embedding AS vector)
+    LIMIT :k
+"""
+
+
+def ivfflat_lists(rows: int) -> int:
+    # pgvector's guidance for the number of IVFFlat clusters
+    if IVFFLAT_LISTS:
+        return IVFFLAT_LISTS
+    return max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows)))
+
+
+def ensure_vector_index(db: Session, index_type: str = VECTOR_INDEX_TYPE, dimensions: int = EMBEDDING_DIMENSIONS, rebuild: bool = False):
+    """
+    Brings langchain_pg_embedding's indexes in line with `index_type`. Run
+    after an ingest: HNSW is created once and maintained by inserts; IVFFlat
+    clusters are trained on the rows present, so it is rebuilt when `rebuild`
+    is set (the ingest passes True whenever chunks changed).
+    """
+    # 1. ANN indexes need a typed column; langchain creates `vector` without a size
+    typmod = db.execute(text("""
+        SELECT atttypmod FROM pg_attribute
+        WHERE attrelid = 'langchain_pg_embedding'::regclass AND attname = 'embedding'
+    """)).scalar()
+    if typmod is not None and typmod < 0:
+        logger.info(f"Typing langchain_pg_embedding.embedding as vector({dimensions}).")
+        db.execute(text(f"ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector({dimensions})"))
+
+    # 2. Drop the index type we are not using
+    for name, index_name in INDEX_NAMES.items():
+        if name != index_type or (rebuild and name == "ivfflat"):
+            db.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+    # 3. Create the wanted one
+    if index_type == "hnsw":
+        db.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {INDEX_NAMES['hnsw']} ON langchain_pg_embedding "
+            f"USING hnsw (embedding vector_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+        ))
+    elif index_type == "ivfflat":
+        rows = db.execute(text("SELECT count(*) FROM langchain_pg_embedding")).scalar()
+        db.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {INDEX_NAMES['ivfflat']} ON langchain_pg_embedding "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {ivfflat_lists(rows)})"
+        ))
+    elif index_type != "none":
+        raise ValueError(f"Unknown VECTOR_INDEX_TYPE {index_type!r}")
+
+    db.commit()
+    db.execute(text("ANALYZE langchain_pg_embedding"))
+    db.commit()
+    logger.info(f"Vector index: {index_type}.")
+
+
+def filter_clause(filters: Optional[Dict[str, str]]) -> Tuple[str, Dict[str, Any]]:
+    # jsonb containment, served by langchain's GIN index on cmetadata (ix_cmetadata_gin)
+    if not filters:
+        return "", {}
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot filter on {sorted(unknown)}; supported: {FILTER_KEYS}")
+    clauses, params = [], {}
+    for key, value in filters.items():
+        clauses.append(f"AND e.cmetadata @> CAST(:filter_{key} AS jsonb)")
+        params[f"filter_{key}"] = json.dumps({key: value})
+    return " ".join(clauses), params
+
+
+async def search_vectors(
+    db: AsyncSession,
+    collection_name: str,
+    embedding: List[float],
+    k: int,
+    filters: Optional[Dict[str, str]] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+) -> List[Tuple[Document, float]]:
+    """
+    Nearest chunks of `collection_name` by cosine distance. `ef_search`
+    (HNSW) and `probes` (IVFFlat) trade recall for latency and only apply to
+    this query's transaction; `filters` restricts to matching metadata.
+    """
+    filter_sql, params = filter_clause(filters)
+    async with db.begin():
+        # set_config(..., true) is transaction-local, like SET LOCAL, but takes parameters
+        await db.execute(text("SELECT set_config('hnsw.ef_search', :ef_search, true), set_config('ivfflat.probes', :probes, true)"), {
+            "ef_search": str(ef_search or HNSW_EF_SEARCH),
+            "probes": str(probes or IVFFLAT_PROBES),
+        })
+        rows = await db.execute(text(SEARCH_SQL.format(filters=filter_sql)), {
+            "collection": collection_name,
+            "embedding": "[" + ",".join(str(float(x)) for x in embedding) + "]",
+            "k": k,
+            **params,
+        })
+        return [
+            (Document(id=str(row.id), page_content=row.document, metadata=row.cmetadata or {}), row.distance)
+            for row in rows
+        ]
@@ -0,0 +1,100 @@
+"""
+Re-planning a department: per-student DegreePlannerService.generate_plan calls
+(what the /planner/generate endpoint does) versus one generate_plans batch.
+
+Uses a throwaway SQLite database loaded with the 2024-2025 BSCS plan and
+course catalog unless DATABASE_URL is already set. Run from the backend
+directory:
+    python -m benchmarks.bench_batch_planner
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_planner.db')}")
+
+from app.core.database import Base, SessionLocal, engine
+from app.models.course import Course, DegreePlan
+from app.schemas.student import CourseGrade, StudentProfile
+from app.services.degree_planner import DegreePlannerService
+from app.services.plan_index import plan_index
+from app.services.prereq_parser import parse_prerequisites
+from app.services.requirement_tables import sync_requirements
+from app.services.semester_scheduler import CATALOG_DATA_DIR
+
+STUDENTS = [500, 5000]
+CATALOG_DIR = os.path.join(CATALOG_DATA_DIR, "bscs", "2024_2025")
+
+
+def load_catalog(db):
+    Base.metadata.create_all(bind=engine)
+    if db.query(DegreePlan).first():
+        return
+    with open(os.path.join(CATALOG_DIR, "four_year_plan.json"), "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    db.add(DegreePlan(name=f"{plan['program']} {plan['catalog_year']}", catalog_year=plan["catalog_year"], plan_structure=plan["plan"]))
+    with open(os.path.join(CATALOG_DIR, "csci_courses_full.json"), "r", encoding="utf-8") as f:
+        for course in json.load(f):
+            code = course["title"].split(":", 1)[0].strip()
+            db.add(Course(
+                course_code=code,
+                credits=int(course["credits"]) if course["credits"].isdigit() else 3,
+                prerequisites_raw=course["prerequisites"],
+                metadata_json={"prerequisite_ast": parse_prerequisites(course["prerequisites"], code)},
+            ))
+    # The planner reads the plan's requirements from the normalized tables, as data/ingest_structured.py loads them
+    db.flush()
+    sync_requirements(db)
+    db.commit()
+
+
+def make_profiles(count: int, plan_codes, extra_codes, rng: random.Random):
+    # Cohorts move through the plan in order; some students dropped a course
+    # or brought something from outside the plan
+    profiles = []
+    for i in range(count):
+        taken = plan_codes[:rng.randint(0, len(plan_codes))]
+        if taken and rng.random() < 0.3:
+            taken.remove(rng.choice(taken))
+        if rng.random() < 0.3:
+            taken.append(rng.choice(extra_codes))
+        profiles.append(StudentProfile(
+            student_name=f"Student {i}",
+            gpa=round(rng.uniform(2.0, 4.0), 2),
+            taken_courses=[CourseGrade(course_code=code, grade="B") for code in taken],
+        ))
+    return profiles
+
+
+def main():
+    rng = random.Random(3)
+    db = SessionLocal()
+    load_catalog(db)
+    compiled_plan = plan_index.get(db, "Computer Science", "2024-2025")
+    plan_codes = [slot.code for slot in compiled_plan.slots if slot.code]
+    extra_codes = sorted({code for (code,) in db.query(Course.course_code).all()} - set(plan_codes))
+
+    print(f"{'students':>8} {'per-student s':>13} {'batch s':>8} {'speedup':>8} {'same output':>11}")
+    for count in STUDENTS:
+        profiles = make_profiles(count, plan_codes, extra_codes, rng)
+
+        start = time.perf_counter()
+        single = [DegreePlannerService(db).generate_plan(profile) for profile in profiles]
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = sorted(DegreePlannerService(db).generate_plans(profiles), key=lambda result: result["index"])
+        batch_seconds = time.perf_counter() - start
+
+        same = all(
+            a["missing_count"] == b["missing_count"] and a["recommended_schedule"] == b["recommended_schedule"]
+            for a, b in zip(single, batch)
+        )
+        print(f"{count:>8} {single_seconds:>13.2f} {batch_seconds:>8.2f} {single_seconds / batch_seconds:>7.1f}x {str(same):>11}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
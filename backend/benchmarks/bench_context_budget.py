@@ -0,0 +1,57 @@
+"""
+Prompt context before and after ContextBuilder, for both chunkers.
+
+For each labelled question in eval_chunking, the top-k chunks from BM25 are
+turned into context two ways:
+  raw        the chunks joined as retrieved (what RAGService used to send)
+  assembled  deduplicated, same-page chunks merged, fitted to the budget
+and the benchmark reports mean context tokens and how many answers the
+context still contains (an answer lost to truncation shows up here).
+
+Run from the repo root:
+    PYTHONPATH=backend python -m benchmarks.bench_context_budget
+"""
+import os
+import time
+
+import numpy as np
+
+from app.services.context_builder import CONTEXT_TOKEN_BUDGET, ContextBuilder
+from app.services.token_counter import token_counter
+from benchmarks.eval_chunking import CHUNKERS, QUESTIONS, bm25_ranker, normalize
+from data.ingest_rag import chunk_documents, create_splitter, load_documents
+
+TOP_K = int(os.getenv("BENCH_TOP_K", "8"))
+BUDGETS = [int(budget) for budget in os.getenv("BENCH_BUDGETS", f"{CONTEXT_TOKEN_BUDGET},800").split(",")]
+
+
+def main():
+    print(f"{len(QUESTIONS)} questions, top {TOP_K}, tokens: {token_counter.name}")
+    print(f"{'chunker':>10} {'context':>14} {'mean tokens':>12} {'max tokens':>11} {'answers kept':>13} {'build ms':>9}")
+    for name in CHUNKERS:
+        chunks = list(chunk_documents(load_documents(), create_splitter(name)))
+        rank = bm25_ranker(chunks, top_k=TOP_K)
+        retrieved = [[chunks[i] for i in rank(question)] for question, _ in QUESTIONS]
+
+        runs = {"raw": [("\n\n".join(doc.page_content for doc in docs), 0.0) for docs in retrieved]}
+        for budget in BUDGETS:
+            builder = ContextBuilder(token_budget=budget)
+            contexts = []
+            for docs in retrieved:
+                start = time.perf_counter()
+                text = builder.build(docs).text
+                contexts.append((text, time.perf_counter() - start))
+            runs[f"budget {budget}"] = contexts
+
+        for label, contexts in runs.items():
+            tokens = [token_counter.count(text) for text, _ in contexts]
+            kept = sum(normalize(answer) in normalize(text) for (_, answer), (text, _) in zip(QUESTIONS, contexts))
+            build_ms = np.mean([elapsed for _, elapsed in contexts]) * 1000
+            print(
+                f"{name:>10} {label:>14} {np.mean(tokens):>12.0f} {max(tokens):>11} "
+                f"{kept:>6}/{len(QUESTIONS):<6} {build_ms:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
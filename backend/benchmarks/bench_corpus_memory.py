@@ -0,0 +1,115 @@
+"""
+Peak memory of loading + chunking a scrape corpus, eager (the old
+readlines()/list-of-Documents path) versus the streaming generators in
+data/ingest_rag.py, plus the streaming preview generator.
+
+Synthetic JSONL records mimic the scraper output (~60 KB html_raw, ~5 KB
+text_clean). Sizes in MB come from BENCH_CORPUS_SIZES_MB; the eager path is
+only run up to BENCH_EAGER_MAX_MB because it grows with the corpus.
+
+Run from the repo root:
+    PYTHONPATH=backend python -m benchmarks.bench_corpus_memory
+"""
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+CORPUS_SIZES_MB = [int(size) for size in os.getenv("BENCH_CORPUS_SIZES_MB", "100,500,2000").split(",")]
+EAGER_MAX_MB = int(os.getenv("BENCH_EAGER_MAX_MB", "500"))
+
+WORDS = "student course credit hours prerequisite semester catalog major minor grade advisor degree elective".split()
+
+
+def write_corpus(path: str, size_mb: int):
+    rng = random.Random(size_mb)
+    html_filler = "<div class='nav'><a href='/x'>link</a></div>" * 1400
+    written, i = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size_mb * 1024 * 1024:
+            paragraphs = ["\n".join(" ".join(rng.choices(WORDS, k=12)) for _ in range(6)) for _ in range(6)]
+            record = {
+                "url": f"https://catalog.olemiss.edu/page/{i}",
+                "title": f"Page {i}",
+                "page_type": "program",
+                "fetched_at": "2025-01-01T00:00:00",
+                "catalog_year": "2024-2025",
+                "text_clean": "\n\n".join(paragraphs),
+                "html_raw": f"<html>{i}{html_filler}</html>",
+                "links_out": [f"https://catalog.olemiss.edu/page/{j}" for j in range(40)],
+            }
+            line = json.dumps(record) + "\n"
+            f.write(line)
+            written += len(line)
+            i += 1
+
+
+def eager(path: str) -> int:
+    from langchain_core.documents import Document
+    from data.ingest_rag import RecursiveCharacterTextSplitter
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    docs = []
+    for line in lines:
+        item = json.loads(line)
+        docs.append(Document(page_content=item["text_clean"], metadata={"source": item["url"]}))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, separators=["\n\n", "\n", " ", ""])
+    return len(splitter.split_documents(docs))
+
+
+def streaming(path: str) -> int:
+    import data.ingest_rag as ingest_rag
+
+    ingest_rag.DATA_FILE = path
+    return sum(1 for _ in ingest_rag.chunk_documents(ingest_rag.load_documents()))
+
+
+def preview(path: str) -> int:
+    import data.generate_preview as generate_preview
+
+    generate_preview.INPUT_FILE = path
+    generate_preview.OUTPUT_FILE = os.devnull
+    generate_preview.main()
+    return 0
+
+
+def measure(target, path: str, results):
+    start = time.perf_counter()
+    chunks = target(path)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((chunks, peak_mb, time.perf_counter() - start))
+
+
+def run(target, path: str):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure, args=(target, path, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    print(f"{'corpus MB':>9} {'mode':>10} {'chunks':>8} {'peak RSS MB':>11} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in CORPUS_SIZES_MB:
+            path = os.path.join(tmp, f"corpus_{size_mb}.jsonl")
+            write_corpus(path, size_mb)
+            for name, target in (("eager", eager), ("streaming", streaming), ("preview", preview)):
+                if name == "eager" and size_mb > EAGER_MAX_MB:
+                    print(f"{size_mb:>9} {name:>10} {'skipped':>8}")
+                    continue
+                chunks, peak_mb, seconds = run(target, path)
+                print(f"{size_mb:>9} {name:>10} {chunks:>8} {peak_mb:>11.0f} {seconds:>8.1f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Size and read throughput of the columnar corpus store (data/corpus_store.py)
+against the scraper's JSONL.
+
+The corpus is data/olemiss_data.jsonl repeated BENCH_COPIES times under
+distinct URLs (pages compress one by one, so copies do not flatter the
+ratio). Reads, best of BENCH_REPEATS with the files in the page cache:
+  ingest scan     url/title/page_type/... + text_clean (what ingest_rag reads)
+  metadata scan   url, title, page_type (what a listing or diff needs)
+  lookup          BENCH_LOOKUPS random URLs, title + text_clean; JSONL has
+                  no index, so a lookup is a scan until the URL is found
+The store is read through mmap and through pread.
+
+Run from the repo root:
+    PYTHONPATH=backend:. python -m benchmarks.bench_corpus_store
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Optional, Sequence
+
+from data.corpus import RECORD_FIELDS, iter_records
+from data.corpus_store import CorpusStore, convert
+
+COPIES = int(os.getenv("BENCH_COPIES", "50"))
+REPEATS = int(os.getenv("BENCH_REPEATS", "3"))
+LOOKUPS = int(os.getenv("BENCH_LOOKUPS", "200"))
+# Each JSONL lookup is a scan; a few are enough for its mean
+JSONL_LOOKUPS = int(os.getenv("BENCH_JSONL_LOOKUPS", "10"))
+SOURCE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "olemiss_data.jsonl")
+METADATA_FIELDS = ("url", "title", "page_type")
+
+
+def write_corpus(path: str):
+    with open(SOURCE, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    with open(path, "w", encoding="utf-8") as f:
+        for copy in range(COPIES):
+            for record in records:
+                f.write(json.dumps({**record, "url": f"{record['url']}?copy={copy}"}, ensure_ascii=False) + "\n")
+
+
+def best_of(run: Callable[[], int]) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def scan_jsonl(path: str, fields: Sequence[str]) -> int:
+    return sum(1 for _ in iter_records(path, fields))
+
+
+def scan_store(path: str, fields: Sequence[str], use_mmap: bool) -> int:
+    with CorpusStore(path, use_mmap=use_mmap) as store:
+        return sum(1 for _ in store.iter_records(fields))
+
+
+def lookup_jsonl(path: str, url: str) -> Optional[dict]:
+    for record in iter_records(path, ("url", "title", "text_clean")):
+        if record and record["url"] == url:
+            return record
+    return None
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, "corpus.jsonl")
+        store_path = os.path.join(tmp, "store")
+        write_corpus(jsonl_path)
+        start = time.perf_counter()
+        records = convert(jsonl_path, store_path)
+        convert_s = time.perf_counter() - start
+
+        # 1. Size
+        jsonl_mb = os.path.getsize(jsonl_path) / 1e6
+        with CorpusStore(store_path) as store:
+            columns = {field: size / 1e6 for field, size in store.column_bytes().items()}
+        index_mb = sum(os.path.getsize(os.path.join(store_path, name)) for name in os.listdir(store_path) if name.endswith(".idx")) / 1e6
+        store_mb = index_mb + sum(columns.values())
+        print(f"{records} records; converted in {convert_s:.1f}s")
+        print(f"JSONL {jsonl_mb:.1f} MB; store {store_mb:.1f} MB ({jsonl_mb / store_mb:.1f}x smaller): "
+              f"index {index_mb:.2f} MB, " + ", ".join(f"{field} {mb:.2f} MB" for field, mb in columns.items()))
+
+        # 2. Scans
+        print(f"\n{'read':>14} {'format':>12} {'seconds':>8} {'records/s':>10} {'JSONL MB/s':>11}")
+        for name, fields in (("ingest scan", RECORD_FIELDS), ("metadata scan", METADATA_FIELDS)):
+            runs = {
+                "jsonl": lambda: scan_jsonl(jsonl_path, fields),
+                "store mmap": lambda: scan_store(store_path, fields, True),
+                "store pread": lambda: scan_store(store_path, fields, False),
+            }
+            for label, run in runs.items():
+                seconds = best_of(run)
+                print(f"{name:>14} {label:>12} {seconds:>8.3f} {records / seconds:>10.0f} {jsonl_mb / seconds:>11.0f}")
+
+        # 3. Random access by URL
+        with CorpusStore(store_path) as store:
+            urls = random.Random(0).sample(store.urls(), min(LOOKUPS, len(store)))
+        print(f"\n{'lookup':>14} {'format':>12} {'ms/lookup':>10}")
+        for use_mmap in (True, False):
+            start = time.perf_counter()
+            with CorpusStore(store_path, use_mmap=use_mmap) as store:
+                opened = time.perf_counter() - start
+                seconds = best_of(lambda: [store.get(url, ("title", "text_clean")) for url in urls])
+            label = "store mmap" if use_mmap else "store pread"
+            print(f"{'by URL':>14} {label:>12} {seconds / len(urls) * 1000:>10.3f}   (open + index load {opened * 1000:.0f} ms)")
+        start = time.perf_counter()
+        for url in urls[:JSONL_LOOKUPS]:
+            assert lookup_jsonl(jsonl_path, url) is not None
+        print(f"{'by URL':>14} {'jsonl':>12} {(time.perf_counter() - start) / JSONL_LOOKUPS * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
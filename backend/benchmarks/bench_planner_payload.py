@@ -0,0 +1,80 @@
+"""
+Response size and serialization time of POST /planner/generate: the old
+untyped response (profile + whole plan echoed, response_model=dict) versus the
+typed compact, diff and full views.
+
+Serialization mirrors what FastAPI does with a response_model: validate the
+returned value against the model, then dump it to JSON bytes. Uses the same
+throwaway SQLite database as bench_batch_planner unless DATABASE_URL is set.
+Run from the backend directory:
+    python -m benchmarks.bench_planner_payload
+"""
+import time
+
+from pydantic import TypeAdapter
+
+from benchmarks.bench_batch_planner import load_catalog
+from app.core.database import SessionLocal
+from app.schemas.planner import PlanResponse, PlanView
+from app.schemas.student import CourseGrade, StudentProfile
+from app.services.degree_planner import DegreePlannerService
+
+ITERATIONS = 2000
+
+# A sophomore halfway through the plan, with a transcript's worth of courses
+PROFILE = StudentProfile(
+    student_name="Sample Student",
+    gpa=3.2,
+    credits_earned=45,
+    taken_courses=[
+        CourseGrade(course_code=code, grade="B", semester="Fall 2024")
+        for code in ["CSCI 111", "CSCI 112", "CSCI 211", "MATH 261", "MATH 262", "WRIT 101", "WRIT 102",
+                     "CSCI 223", "MATH 301", "BISC 160", "BISC 161", "HIST 130", "PSY 201", "ENGL 224", "SPCH 102"]
+    ],
+)
+
+
+def old_response(planner: DegreePlannerService):
+    # The pre-typed response: everything, as a plain dict
+    result = planner.generate_plan(PROFILE, PlanView.full)
+    return {
+        "status": "success",
+        "student": result["student"],
+        "missing_count": result["missing_count"],
+        "recommended_schedule": result["recommended_schedule"],
+        "raw_plan": result["raw_plan"],
+    }
+
+
+def measure(build, adapter: TypeAdapter):
+    body = adapter.dump_json(adapter.validate_python(build()))
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        result = build()
+    generate_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        adapter.dump_json(adapter.validate_python(result))
+    serialize_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+    return len(body), generate_us, serialize_us
+
+
+def main():
+    db = SessionLocal()
+    load_catalog(db)
+    planner = DegreePlannerService(db)
+    typed = TypeAdapter(PlanResponse)
+
+    cases = [("old (dict)", lambda: old_response(planner), TypeAdapter(dict))]
+    for view in PlanView:
+        cases.append((view.value, lambda view=view: planner.generate_plan(PROFILE, view), typed))
+
+    print(f"{'view':>10} {'bytes':>7} {'generate us':>11} {'serialize us':>12}")
+    for name, build, adapter in cases:
+        size, generate_us, serialize_us = measure(build, adapter)
+        print(f"{name:>10} {size:>7} {generate_us:>11.1f} {serialize_us:>12.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cold start and per-request overhead of the RAG service.
+
+1. Time to import the FastAPI app (no Gemini/PGVector clients are built).
+2. Per-request chain overhead: rebuilding the LCEL pipeline on every call
+   versus reusing the chain built once in RAGService.__init__.
+3. First-request latency with and without the lifespan warm-up.
+
+Fake embeddings, an in-memory vector store and a fake chat model are used so
+only our own overhead is measured. Run from the backend directory:
+    python -m benchmarks.bench_rag_startup
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.vectorstores import InMemoryVectorStore
+
+REQUESTS = 500
+
+
+def make_service():
+    from app.services.rag_service import RAGService
+
+    embeddings = DeterministicFakeEmbedding(size=768)
+    vector_store = InMemoryVectorStore(embeddings)
+    vector_store.add_documents([Document(page_content=f"Course {i} covers topic {i}.", metadata={"source": f"doc{i}"}) for i in range(200)])
+    llm = FakeListChatModel(responses=["Take CSCI 111 first, then CSCI 112."])
+    return RAGService(embeddings=embeddings, vector_store=vector_store, llm=llm)
+
+
+def import_time() -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env={**os.environ, "PYTHONPATH": "."})
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+
+async def chain_overhead(service):
+    inputs = {"context": "CSCI 111 has no prerequisites.", "question": "What comes after CSCI 111?"}
+    rebuilt, prebuilt = [], []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        chain = service.prompt | service.llm | StrOutputParser()
+        await chain.ainvoke(inputs)
+        rebuilt.append((time.perf_counter() - start) * 1_000_000)
+
+        start = time.perf_counter()
+        await service.answer_chain.ainvoke(inputs)
+        prebuilt.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(rebuilt), statistics.median(prebuilt)
+
+
+async def first_request(warm: bool) -> float:
+    service = make_service()
+    if warm:
+        await service.warm_up()
+    start = time.perf_counter()
+    await service.get_answer("Which course comes after CSCI 111?")
+    return (time.perf_counter() - start) * 1000
+
+
+async def main():
+    print(f"app import: {import_time():.0f} ms")
+
+    service = make_service()
+    rebuilt, prebuilt = await chain_overhead(service)
+    print(f"chain p50: rebuilt per call {rebuilt:.0f} us, prebuilt {prebuilt:.0f} us")
+
+    cold = await first_request(warm=False)
+    warm = await first_request(warm=True)
+    print(f"first request: cold {cold:.1f} ms, after warm-up {warm:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
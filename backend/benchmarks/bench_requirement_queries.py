@@ -0,0 +1,164 @@
+"""
+Cross-plan requirement queries over the normalized requirement tables
+(app/services/requirement_tables.py) versus reading the plan_structure and
+blocks JSON of every plan.
+
+The catalog is the BSCS 2024-2025 directory cloned into BENCH_DEPARTMENTS
+departments; each clone renames CSCI to its own prefix (XAA, XAB, ...), so
+a department course is required by one plan while MATH 261 is required by
+all of them. Queries, best of BENCH_REPEATS:
+  lookup     every plan slot and requirement a course counts toward
+  audit      missing plan slots of BENCH_STUDENTS students spread over all
+             plans: one SQL query, against compiling each student's plan
+             from its JSON row (and, for reference, the planner's warm
+             in-memory plan cache)
+The SQL audit's missing counts are checked against the planner's.
+
+The catalog tables are emptied before and after, so point DATABASE_URL at
+a disposable database (a throwaway SQLite file is used if it is unset). Run
+from the repo root:
+    PYTHONPATH=backend:. python -m benchmarks.bench_requirement_queries
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_requirements.db')}")
+
+from sqlalchemy import select, text
+
+from app.core.database import SessionLocal
+from app.models.course import DegreePlan, DegreeRequirement
+from app.models.requirement import Requirement, RequirementOption, RequirementPrefix
+from app.services.course_codes import normalize_course_code
+from app.services.plan_index import compile_plan
+from app.services.requirement_tables import audit_students, plan_requirements, requirement_set_requirements, requirements_with_course, split_course_code
+from benchmarks.bench_structured_ingest import DEPARTMENTS, clear_tables, write_catalog
+from data.ingest_structured import init_db, ingest_catalog
+
+STUDENTS = int(os.getenv("BENCH_STUDENTS", "2000"))
+REPEATS = int(os.getenv("BENCH_REPEATS", "3"))
+
+
+def department_prefix(department: int) -> str:
+    return "X" + chr(ord("A") + department // 26) + chr(ord("A") + department % 26)
+
+
+def rename_department_courses(data_dir: str):
+    # The cloned plans and requirement files all list CSCI; give each its own subject
+    for department in range(DEPARTMENTS):
+        catalog_dir = os.path.join(data_dir, f"dept{department:03d}", "2024_2025")
+        for name in ("four_year_plan.json", "degree_requirements.json"):
+            path = os.path.join(catalog_dir, name)
+            with open(path, "r", encoding="utf-8") as f:
+                data = f.read()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data.replace("CSCI", department_prefix(department)))
+
+
+def best_of(run: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def lookup_json(db, course_code: str) -> List[Dict]:
+    # What answering the lookup takes without the tables: parse every blob
+    code = normalize_course_code(course_code)
+    prefix, level = split_course_code(code)
+    found = []
+    for name, plan_structure in db.execute(select(DegreePlan.name, DegreePlan.plan_structure)):
+        found += [(name, row["name"]) for row in plan_requirements(plan_structure) if code in row["options"]]
+    for program, blocks in db.execute(select(DegreeRequirement.program, DegreeRequirement.blocks)):
+        found += [
+            (program, row["name"]) for row in requirement_set_requirements(blocks)
+            if code in row["options"] or row["prefixes"].get(prefix, level + 1) <= level
+        ]
+    return found
+
+
+def audit_json(db, plan_ids: List[int], taken_sets: List[frozenset]) -> List[int]:
+    # Fetch and compile each student's plan from its row, as a cold planner would
+    compiled = {}
+    counts = []
+    for plan_id, taken in zip(plan_ids, taken_sets):
+        if plan_id not in compiled:
+            compiled[plan_id] = compile_plan(db.get(DegreePlan, plan_id))
+        counts.append(len(compiled[plan_id].missing_slots(taken)))
+    return counts
+
+
+def make_students(db) -> Tuple[List[int], List[frozenset]]:
+    rng = random.Random(0)
+    plans = db.execute(select(DegreePlan.id, DegreePlan.plan_structure)).all()
+    plan_ids, taken_sets = [], []
+    for _ in range(STUDENTS):
+        plan_id, plan_structure = rng.choice(plans)
+        codes = sorted({code for row in plan_requirements(plan_structure) for code in row["options"]})
+        plan_ids.append(plan_id)
+        taken_sets.append(frozenset(rng.sample(codes, rng.randint(0, len(codes)))))
+    return plan_ids, taken_sets
+
+
+def main():
+    init_db()
+    clear_tables()
+    data_dir = tempfile.mkdtemp()
+    db = SessionLocal()
+    try:
+        write_catalog(data_dir)
+        rename_department_courses(data_dir)
+        start = time.perf_counter()
+        ingest_catalog(data_dir)
+        print(f"ingest with requirement rebuild: {time.perf_counter() - start:.1f}s; database: {db.bind.dialect.name}\n")
+        if db.bind.dialect.name == "postgresql":
+            # Statistics autovacuum would gather after a load this size
+            db.execute(text("ANALYZE"))
+        counts = {model.__tablename__: db.query(model).count() for model in (Requirement, RequirementOption, RequirementPrefix)}
+        print(", ".join(f"{table} {count}" for table, count in counts.items()) + "\n")
+
+        # 1. Lookup
+        print(f"{'lookup':>22} {'matches':>8} {'json ms':>9} {'sql ms':>8}")
+        for code in (f"{department_prefix(7)} 311", "MATH 261", f"{department_prefix(7)} 450"):
+            matches = len(requirements_with_course(db, code))
+            assert matches == len(lookup_json(db, code)), code
+            json_s = best_of(lambda: lookup_json(db, code))
+            sql_s = best_of(lambda: requirements_with_course(db, code))
+            print(f"{code:>22} {matches:>8} {json_s * 1000:>9.1f} {sql_s * 1000:>8.2f}")
+
+        # 2. Audit
+        plan_ids, taken_sets = make_students(db)
+        sql_counts = [len(missing) for missing in audit_students(db, plan_ids, taken_sets)]
+        assert sql_counts == audit_json(db, plan_ids, taken_sets)
+        json_s = best_of(lambda: (db.expire_all(), audit_json(db, plan_ids, taken_sets)))
+        sql_s = best_of(lambda: audit_students(db, plan_ids, taken_sets))
+        compiled = {plan_id: compile_plan(db.get(DegreePlan, plan_id)) for plan_id in set(plan_ids)}
+        warm_s = best_of(lambda: [compiled[plan_id].missing_slots(taken) for plan_id, taken in zip(plan_ids, taken_sets)])
+        print(f"\naudit of {STUDENTS} students over {len(set(plan_ids))} plans (missing counts agree)")
+        print(f"  json rows, compiled per plan  {json_s:.3f}s")
+        print(f"  one SQL query                 {sql_s:.3f}s")
+        print(f"  warm plan cache (in memory)   {warm_s:.3f}s")
+
+        if db.bind.dialect.name == "postgresql":
+            code = f"{department_prefix(7)} 311"
+            prefix, level = split_course_code(code)
+            explain = db.execute(text(
+                "EXPLAIN SELECT requirement_id FROM requirement_options WHERE course_code = :code "
+                "UNION SELECT requirement_id FROM requirement_prefixes WHERE prefix = :prefix AND min_level <= :level"
+            ), {"code": code, "prefix": prefix, "level": level}).scalars().all()
+            print("\nlookup plan:\n  " + "\n  ".join(explain))
+        db.commit()
+    finally:
+        db.close()
+        shutil.rmtree(data_dir)
+        clear_tables()
+
+
+if __name__ == "__main__":
+    main()
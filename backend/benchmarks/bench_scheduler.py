@@ -0,0 +1,85 @@
+"""
+Per-request latency of the prerequisite-aware semester scheduler on synthetic
+catalogs of increasing size.
+
+Run from the backend directory:
+    python -m benchmarks.bench_scheduler
+"""
+import itertools
+import random
+import statistics
+import string
+import time
+
+from app.services.plan_index import RequirementSlot
+from app.services.prereq_graph import PrerequisiteGraph
+from app.services.prereq_parser import parse_prerequisites
+from app.services.semester_scheduler import SchedulingPolicy, SemesterScheduler
+
+CATALOG_SIZES = [100, 1_000, 10_000]
+REQUESTS_PER_SIZE = 200
+COURSES_PER_PLAN = 45
+COURSES_PER_DEPT = 200
+
+
+def make_catalog(size: int, rng: random.Random):
+    depts = ["X" + "".join(letters) for letters in itertools.product(string.ascii_uppercase, repeat=3)]
+    codes = [f"{depts[i // COURSES_PER_DEPT]} {100 + i % COURSES_PER_DEPT * 2}" for i in range(size)]
+    rows = []
+    for i, code in enumerate(codes):
+        clauses = []
+        # Prerequisites only point at lower-numbered courses so the catalog is a DAG
+        for _ in range(rng.choice([0, 0, 1, 1, 2, 3]) if i else 0):
+            options = rng.sample(codes[max(0, i - 300):i], min(i, rng.choice([1, 1, 2, 3])))
+            clauses.append(" or ".join(f"{option} (Minimum grade C-)" for option in options))
+        raw = "Prerequisite: " + "; ".join(clauses) if clauses else None
+        rows.append((code, rng.choice([1, 3, 3, 3, 4]), raw, {"prerequisite_ast": parse_prerequisites(raw, code)}))
+    return rows
+
+
+def make_request(graph: PrerequisiteGraph, codes, rng: random.Random):
+    # A plan is a few upper-level goals plus the prerequisite chains behind them
+    plan = []
+    stack = rng.sample(codes[len(codes) // 2:], 5)
+    while stack and len(plan) < COURSES_PER_PLAN:
+        code = stack.pop()
+        if code in plan:
+            continue
+        plan.append(code)
+        stack.extend(sorted(group)[0] for group in graph.groups_for(code))
+    while len(plan) < COURSES_PER_PLAN:
+        plan.append(rng.choice(codes))
+
+    slots = [RequirementSlot("course", "", "", {"course": code, "credits": graph.credits.get(code, 3)}, frozenset([code]), code) for code in plan]
+    taken = frozenset(rng.sample(plan, len(plan) // 4))
+    missing = [slot for slot in slots if slot.code not in taken]
+    return missing, taken
+
+
+def main():
+    rng = random.Random(42)
+    policy = SchedulingPolicy()
+    print(f"{'catalog':>8} {'build ms':>9} {'p50 us':>8} {'p95 us':>8} {'semesters':>9}")
+    for size in CATALOG_SIZES:
+        rows = make_catalog(size, rng)
+        start = time.perf_counter()
+        graph = PrerequisiteGraph(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        scheduler = SemesterScheduler(graph, policy)
+        codes = [row[0] for row in rows]
+        timings, semesters = [], []
+        for _ in range(REQUESTS_PER_SIZE):
+            missing, taken = make_request(graph, codes, rng)
+            start = time.perf_counter()
+            schedule = scheduler.schedule(missing, taken, gpa=rng.uniform(2.0, 4.0))
+            timings.append((time.perf_counter() - start) * 1_000_000)
+            semesters.append(len(schedule))
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{size:>8} {build_ms:>9.1f} {statistics.median(timings):>8.0f} {p95:>8.0f} {statistics.mean(semesters):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Loading a full-university catalog: the old per-course ingest (one SELECT and
+one INSERT per course) versus the bulk ON CONFLICT upsert in
+data/ingest_structured.py.
+
+The catalog is the BSCS 2024-2025 directory cloned into BENCH_DEPARTMENTS
+departments under new course codes (87 courses each; 345 departments is
+~30,000 courses). Database time of each run, in one transaction:
+  old, empty table    the previous ingest_courses loop
+  bulk, empty table   every course inserted
+  bulk, re-run        nothing changed
+  bulk, 5% changed    descriptions edited in every 20th course
+
+The courses table is emptied between runs, so point DATABASE_URL at a
+disposable database (a throwaway SQLite file is used if it is unset). Run
+from the repo root:
+    PYTHONPATH=backend:. python -m benchmarks.bench_structured_ingest
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_ingest.db')}")
+
+from sqlalchemy import delete
+
+from app.core.database import SessionLocal
+from app.models.course import CatalogPolicy, Course, DegreePlan, DegreeRequirement
+from app.models.requirement import Requirement, RequirementOption, RequirementPrefix
+from app.services.bulk_upsert import upsert_rows
+from data.ingest_structured import CATALOG_DATA_DIR, init_db, ingest_catalog, load_catalog_rows
+
+DEPARTMENTS = int(os.getenv("BENCH_DEPARTMENTS", "345"))
+SOURCE_DIR = os.path.join(CATALOG_DATA_DIR, "bscs", "2024_2025")
+
+
+def write_catalog(data_dir: str):
+    with open(os.path.join(SOURCE_DIR, "csci_courses_full.json"), "r", encoding="utf-8") as f:
+        courses = json.load(f)
+    for department in range(DEPARTMENTS):
+        catalog_dir = os.path.join(data_dir, f"dept{department:03d}", "2024_2025")
+        os.makedirs(catalog_dir)
+        prefix = f"D{department:03d}"
+        # "CIS 111: ..." -> "D000-CIS 111: ..."
+        cloned = [{**course, "title": f"{prefix}-{course['title']}"} for course in courses]
+        with open(os.path.join(catalog_dir, "dept_courses_full.json"), "w", encoding="utf-8") as f:
+            json.dump(cloned, f)
+        for name in ("four_year_plan.json", "policies.json", "degree_requirements.json"):
+            with open(os.path.join(SOURCE_DIR, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with open(os.path.join(catalog_dir, name), "w", encoding="utf-8") as f:
+                json.dump({**data, "program": f"{data['program']} ({prefix})"}, f)
+
+
+def edit_descriptions(data_dir: str, every: int = 20):
+    for department in range(DEPARTMENTS):
+        path = os.path.join(data_dir, f"dept{department:03d}", "2024_2025", "dept_courses_full.json")
+        with open(path, "r", encoding="utf-8") as f:
+            courses = json.load(f)
+        for i in range(0, len(courses), every):
+            courses[i]["description"] += " (Revised.)"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(courses, f)
+
+
+def clear_tables():
+    db = SessionLocal()
+    try:
+        # Requirement rows first: SQLite does not cascade the plan deletes to them
+        for model in (RequirementOption, RequirementPrefix, Requirement, Course, DegreePlan, DegreeRequirement, CatalogPolicy):
+            db.execute(delete(model))
+        db.commit()
+    finally:
+        db.close()
+
+
+def old_ingest(rows):
+    # data/ingest_structured.ingest_courses before the bulk loader
+    db = SessionLocal()
+    try:
+        for row in rows:
+            existing = db.query(Course).filter(Course.course_code == row["course_code"]).first()
+            if not existing:
+                db.add(Course(**row))
+        db.commit()
+    finally:
+        db.close()
+
+
+def bulk_ingest(rows):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        result = upsert_rows(db, Course, rows, ["course_code"])
+        db.commit()
+        return time.perf_counter() - start, result
+    finally:
+        db.close()
+
+
+def main():
+    init_db()
+    data_dir = tempfile.mkdtemp()
+    try:
+        write_catalog(data_dir)
+        start = time.perf_counter()
+        rows = load_catalog_rows(data_dir)
+        parse_s = time.perf_counter() - start
+        print(f"{len(rows['courses'])} courses in {DEPARTMENTS} departments; reading + compiling prerequisites {parse_s:.1f}s")
+        print(f"database: {SessionLocal().bind.dialect.name}\n")
+
+        clear_tables()
+        start = time.perf_counter()
+        old_ingest(rows["courses"])
+        old_s = time.perf_counter() - start
+
+        runs = []
+        clear_tables()
+        for label, prepare in (("bulk, empty table", None), ("bulk, re-run", None), ("bulk, 5% changed", edit_descriptions)):
+            if prepare:
+                prepare(data_dir)
+                rows = load_catalog_rows(data_dir)
+            runs.append((label, *bulk_ingest(rows["courses"])))
+
+        start = time.perf_counter()
+        ingest_catalog(data_dir)
+        end_to_end_s = time.perf_counter() - start
+
+        print(f"\n{'courses':>18} {'db seconds':>11} {'result':>40}")
+        print(f"{'old, empty table':>18} {old_s:>11.2f} {len(rows['courses']):>10} inserted (changed rows never updated)")
+        for label, seconds, result in runs:
+            print(f"{label:>18} {seconds:>11.2f} {str(result):>40}")
+        print(f"ingest_catalog end to end (read, compile, upsert all four tables): {end_to_end_s:.2f}s")
+    finally:
+        shutil.rmtree(data_dir)
+        clear_tables()
+
+
+if __name__ == "__main__":
+    main()
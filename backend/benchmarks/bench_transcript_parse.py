@@ -0,0 +1,73 @@
+"""
+Transcript parsing latency and peak Python memory: the previous path (temp
+file + pdfplumber over every page + `+=` concatenation) versus
+TranscriptParser.parse_pdf on the in-memory bytes (lazy pages, early stop
+at the Cumulative GPA trailer, single join).
+
+Run from the backend directory:
+    python -m benchmarks.bench_transcript_parse
+"""
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import pdfplumber
+
+from app.services.transcript_parser import parser_service
+from benchmarks.synthetic_transcripts import make_transcript_pdf
+
+# (courses on the record, legend pages after the trailer)
+CASES = [(40, 1), (120, 2), (400, 4)]
+RUNS = 15
+
+
+def parse_previous(data: bytes):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+    try:
+        text_content = ""
+        with pdfplumber.open(tmp_path) as pdf:
+            for page in pdf.pages:
+                text_content += page.extract_text() + "\n"
+        return parser_service._extract_data_from_text(text_content)
+    finally:
+        os.remove(tmp_path)
+
+
+def parse_current(data: bytes):
+    return parser_service.parse_pdf(data)
+
+
+def measure(parse, data: bytes):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        profile = parse(data)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    parse(data)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return statistics.median(timings), peak, profile
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'courses':>7} {'pages':>5} {'path':>9} {'p50 ms':>8} {'peak MB':>8} {'courses found':>13}")
+    for courses, legend_pages in CASES:
+        data = make_transcript_pdf(courses, legend_pages, rng)
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            pages = len(pdf.pages)
+        for name, parse in (("previous", parse_previous), ("current", parse_current)):
+            p50, peak, profile = measure(parse, data)
+            print(f"{courses:>7} {pages:>5} {name:>9} {p50:>8.1f} {peak:>8.1f} {len(profile.taken_courses):>13}")
+
+
+if __name__ == "__main__":
+    main()
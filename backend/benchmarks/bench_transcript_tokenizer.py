@@ -0,0 +1,85 @@
+"""
+Throughput and accuracy of transcript text extraction on a deterministic
+corpus of synthetic transcripts: the previous per-call regex (hard-coded
+departments, lazy match) versus the single-pass module-level tokenizer.
+
+A course is correct when code, credits and grade match the ground truth
+("with term" also requires the term); "correct courses/s" is the useful
+throughput, since the previous parser is fast partly because it skips
+departments it does not know.
+
+Run from the backend directory:
+    python -m benchmarks.bench_transcript_tokenizer
+"""
+import re
+import time
+from collections import Counter
+
+from app.schemas.student import CourseGrade, StudentProfile
+from app.services.transcript_parser import DEFAULT_DEPARTMENTS, TranscriptParser, load_catalog_departments
+from benchmarks.synthetic_transcripts import transcript_corpus
+
+CORPUS_SIZE = 2000
+REPEATS = 5
+
+
+def parse_previous(text: str):
+    # TranscriptParser._extract_data_from_text before the tokenizer
+    profile = StudentProfile()
+    course_pattern = re.compile(r"(CSCI|MATH|WRIT|BISC|CHEM|PHYS|ECON|PSY|SOC|Fine Arts|Humanities)\s+(\d{3})\s+.*?\s+(\d+\.\d{2})\s+([A-Z][+-]?)")
+    for dept, num, creds, grade in course_pattern.findall(text):
+        profile.taken_courses.append(CourseGrade(course_code=f"{dept} {num}", grade=grade, credits=float(creds)))
+    gpa_match = re.compile(r"Cumulative GPA\s*[:]\s*(\d+\.\d+)").search(text)
+    if gpa_match:
+        profile.gpa = float(gpa_match.group(1))
+    profile.credits_earned = sum(c.credits for c in profile.taken_courses)
+    return profile
+
+
+def make_parse_current():
+    # Departments come from the catalog JSON and the defaults; no database needed here
+    parser = TranscriptParser(load_catalog_departments() | DEFAULT_DEPARTMENTS)
+    return parser._extract_data_from_text
+
+
+def score(parse, corpus):
+    # Best of several passes: the machine noise is larger than the difference otherwise
+    elapsed = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        results = [parse(text) for text, _ in corpus]
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    expected_total = found_total = correct = exact = gpa_correct = 0
+    for profile, (_, expected) in zip(results, corpus):
+        wanted = [(c["course_code"], c["credits"], c["grade"], c["semester"]) for c in expected["taken_courses"]]
+        got = [(c.course_code, c.credits, c.grade, c.semester) for c in profile.taken_courses]
+        expected_total += len(wanted)
+        found_total += len(got)
+        # correct: code, credits and grade; exact: the term as well
+        correct += sum((Counter(w[:3] for w in wanted) & Counter(g[:3] for g in got)).values())
+        exact += sum((Counter(wanted) & Counter(got)).values())
+        gpa_correct += profile.gpa == expected["gpa"]
+    return {
+        "docs/s": len(corpus) / elapsed,
+        "correct courses/s": correct / elapsed,
+        "found": found_total / expected_total,
+        "correct": correct / expected_total,
+        "with term": exact / expected_total,
+        "gpa": gpa_correct / len(corpus),
+    }
+
+
+def main():
+    corpus = list(transcript_corpus(CORPUS_SIZE))
+    print(f"{'parser':>9} {'docs/s':>8} {'correct courses/s':>17} {'found':>7} {'correct':>8} {'with term':>9} {'gpa':>6}")
+    for name, parse in (("previous", parse_previous), ("current", make_parse_current())):
+        r = score(parse, corpus)
+        print(
+            f"{name:>9} {r['docs/s']:>8.0f} {r['correct courses/s']:>17.0f} {r['found']:>7.1%} "
+            f"{r['correct']:>8.1%} {r['with term']:>9.1%} {r['gpa']:>6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Compares the catalog-aware chunker with the original RecursiveCharacterTextSplitter
+(1000 chars, 200 overlap) on data/olemiss_data.jsonl:
+
+  chunks / tokens   what gets embedded and stored (cl100k tokens as a proxy
+                    for Gemini's tokenizer; ~4 chars per token if tiktoken
+                    cannot fetch its encoding offline)
+  hit@1, hit@5      share of the labelled questions below whose answer text
+                    lies whole inside one of the top-k retrieved chunks
+  context tokens    mean tokens of the top-5 chunks, i.e. what one question
+                    sends to Gemini
+
+Retrieval is BM25 over the chunks (the lexical half of the hybrid retriever),
+so the harness runs offline. With GOOGLE_API_KEY set, text-embedding-004
+rankings are evaluated as well.
+
+Run from the repo root:
+    PYTHONPATH=backend python -m benchmarks.eval_chunking
+"""
+import math
+import os
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.services.token_counter import token_counter
+from data.catalog_chunker import strip_markdown
+from data.ingest_rag import chunk_documents, create_splitter, load_documents
+
+TOP_K = 5
+CHUNKERS = ["recursive", "catalog"]
+
+# (question, text the retrieved context must contain to answer it)
+QUESTIONS: List[Tuple[str, str]] = [
+    ("How many honors credit hours does the Honors College require?", "minimum of 30 hours of honors credit"),
+    ("How many total credit hours are required for the BS in computer science?", "Minimum Total Credit Hours: 127"),
+    ("What is CIS 333?", "CIS 333: Digital Design and 3D Printing"),
+    ("What is Csci 311?", "Csci 311: Models of Computation"),
+    ("What is Engr 660?", "Engr 660: Software Engineering II"),
+    ("What is a semester hour?", "no less than one hour of classroom or direct faculty instruction"),
+    ("Who can use the Z grade option?", "classified as a junior or senior may elect to take one course"),
+    ("Can a National Guard member withdraw when called to duty?", "member of the Mississippi National Guard"),
+    ("When is priority registration for summer and fall 2025?", "March 31 to April 14 | Monday to Monday | Priority Registration"),
+    ("How many hours of lab science does the CS degree require?", "Complete 8 hours of laboratory science"),
+    ("What ACT math score do I need to enter the School of Engineering?", "24 or higher on the Math portion of the ACT"),
+    ("When can I declare a major?", "Students who have completed at least 12 hours at the university"),
+    ("Can I take a course without its prerequisites?", "A student may not take a course unless these prerequisites have been met"),
+    ("How are exercise and leisure activity courses graded?", "The pass-fail basis is the only grading available"),
+    ("Which courses satisfy First Year Writing I?", "Complete Hon 101, Writ 100 or Writ 101 with a passing grade"),
+    ("How much credit by examination can count toward a degree?", "no more than half of the total hours required for the degree program"),
+    ("Is a co-op student considered full-time?", "considered full-time for insurance purposes"),
+    ("What happens to honors students on probation?", "will lose privileges like early registration"),
+    ("What is the maximum course load in the fall?", "Total Fall terms | 12 | 19"),
+    ("How many times can I repeat a lower-division course?", "A lower-division course may be repeated twice"),
+    ("How many grade points is a B+ worth?", "B+ = 3.3"),
+    ("What is the deadline to drop a course?", "the 35th day in which classes meet"),
+    ("I have three final exams in one day, can I move one?", "three or four final examinations in one day"),
+    ("How do I find my registration window?", "Check Registration Window"),
+    ("Who decides which transfer credits apply to my degree?", "determines which transfer credits will apply to the degree program"),
+    ("When can an instructor change a reported grade?", "only if the original grade was incorrectly assigned"),
+]
+
+STOPWORDS = set("a an and are as at be by can do does for from how i in is it my of on or the to what when which who with".split())
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    # Chunkers differ in markdown and whitespace, not in the words
+    return " ".join(strip_markdown(text).lower().split())
+
+
+def terms(text: str) -> List[str]:
+    return [term for term in TOKEN_RE.findall(text.lower()) if term not in STOPWORDS]
+
+
+def bm25_ranker(chunks: Sequence[Document], k1: float = 1.2, b: float = 0.75, top_k: int = TOP_K) -> Callable[[str], List[int]]:
+    counts = [Counter(terms(chunk.page_content)) for chunk in chunks]
+    lengths = np.array([sum(count.values()) for count in counts], dtype=float)
+    document_frequency = Counter(term for count in counts for term in count)
+    average = lengths.mean()
+
+    def rank(question: str) -> List[int]:
+        scores = np.zeros(len(chunks))
+        for term in set(terms(question)):
+            if term not in document_frequency:
+                continue
+            idf = math.log(1 + (len(chunks) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            tf = np.array([count.get(term, 0) for count in counts], dtype=float)
+            scores += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / average))
+        return list(np.argsort(-scores)[:top_k])
+
+    return rank
+
+
+def embedding_ranker(chunks: Sequence[Document]) -> Callable[[str], List[int]]:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=os.environ["GOOGLE_API_KEY"])
+    matrix = np.array(embeddings.embed_documents([chunk.page_content for chunk in chunks]))
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def rank(question: str) -> List[int]:
+        query = np.array(embeddings.embed_query(question))
+        return list(np.argsort(-(matrix @ query))[:TOP_K])
+
+    return rank
+
+
+def evaluate(chunks: List[Document], rank: Callable[[str], List[int]], count_tokens: Callable[[str], int]) -> Dict[str, float]:
+    normalized = [normalize(chunk.page_content) for chunk in chunks]
+    hits1 = hits5 = 0
+    context_tokens = []
+    for question, answer in QUESTIONS:
+        top = rank(question)
+        found = [normalize(answer) in normalized[i] for i in top]
+        hits1 += found[0]
+        hits5 += any(found)
+        context_tokens.append(sum(count_tokens(chunks[i].page_content) for i in top))
+    return {
+        "hit@1": hits1 / len(QUESTIONS),
+        "hit@5": hits5 / len(QUESTIONS),
+        "context_tokens": float(np.mean(context_tokens)),
+    }
+
+
+def main():
+    tokenizer, count_tokens = token_counter.name, token_counter.count
+    rankers = {"bm25": bm25_ranker}
+    if os.getenv("GOOGLE_API_KEY"):
+        rankers["embedding"] = embedding_ranker
+
+    # Answers no chunker could return (not in the corpus at all) are a bug in the list
+    corpus = [normalize(doc.page_content) for doc in load_documents()]
+    for _, answer in QUESTIONS:
+        assert any(normalize(answer) in text for text in corpus), answer
+
+    print(f"{len(QUESTIONS)} questions, top {TOP_K}, tokens: {tokenizer}")
+    print(f"{'chunker':>10} {'chunks':>7} {'tokens':>8} {'tok/chunk':>10} {'ranker':>10} {'hit@1':>6} {'hit@5':>6} {'ctx tokens':>11}")
+    for name in CHUNKERS:
+        chunks = list(chunk_documents(load_documents(), create_splitter(name)))
+        tokens = [count_tokens(chunk.page_content) for chunk in chunks]
+        for ranker_name, make_ranker in rankers.items():
+            result = evaluate(chunks, make_ranker(chunks), count_tokens)
+            print(
+                f"{name:>10} {len(chunks):>7} {sum(tokens):>8} {np.mean(tokens):>10.0f} {ranker_name:>10} "
+                f"{result['hit@1']:>6.2f} {result['hit@5']:>6.2f} {result['context_tokens']:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Synthetic transcripts for benchmarks: text with the expected parse (a corpus
+with ground truth) and hand-written PDFs (no PDF library needed).
+Each PDF page holds `LINES_PER_PAGE` lines of Helvetica text; the academic
+record ends with a "Cumulative GPA" trailer followed by legend pages, like the
+registrar's printout.
+"""
+import random
+from typing import Dict, Iterator, List, Tuple
+
+LINES_PER_PAGE = 55
+DEPARTMENTS = ["CSCI", "CIS", "MATH", "WRIT", "BISC", "CHEM", "PHYS", "ECON", "PSY", "SOC", "ENGR", "HON"]
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "D", "F", "W"]
+TERMS = ["Fall", "Spring", "Summer"]
+
+
+def synthetic_transcript(courses: int, rng: random.Random) -> Tuple[List[str], Dict]:
+    """Returns the transcript lines and what a correct parser should extract."""
+    lines = ["UNIVERSITY OF MISSISSIPPI - UNOFFICIAL TRANSCRIPT", "Name: Synthetic Student", ""]
+    expected = []
+    term = None
+    for i in range(courses):
+        if i % 5 == 0:
+            term = f"{TERMS[i // 5 % 3]} {2020 + i // 15}"
+            lines += ["", term, f"Page {i // 5 + 1} of {courses // 5 + 1}"]
+        code = f"{rng.choice(DEPARTMENTS)} {rng.randint(100, 499)}"
+        credits = rng.choice(["1.00", "3.00", "4.00"])
+        grade = rng.choice(GRADES)
+        title = rng.choice(["Intro to Programming", "Calculus I", "General Chemistry Lab", "Honors Seminar: Ethics, Society and Technology in the Modern World"])
+        lines.append(f"{code}  {title}   {credits}   {grade}   {float(credits) * 3:.2f}")
+        expected.append({"course_code": code, "credits": float(credits), "grade": grade, "semester": term})
+    gpa = round(rng.uniform(2.0, 4.0), 2)
+    lines += ["", f"Cumulative GPA: {gpa:.2f}"]
+    return lines, {"taken_courses": expected, "gpa": gpa}
+
+
+def transcript_corpus(size: int, seed: int = 12) -> Iterator[Tuple[str, Dict]]:
+    # Deterministic: the same seed always yields the same corpus
+    rng = random.Random(seed)
+    for _ in range(size):
+        lines, expected = synthetic_transcript(rng.randint(8, 60), rng)
+        yield "\n".join(lines), expected
+
+
+def transcript_lines(courses: int, rng: random.Random) -> List[str]:
+    return synthetic_transcript(courses, rng)[0]
+
+
+def legend_lines(pages: int) -> List[str]:
+    return [f"Grading legend entry {i}: explanation of symbols and repeat policy." for i in range(pages * LINES_PER_PAGE)]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: List[str]) -> bytes:
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>",
+    ]
+    for i, page_lines in enumerate(pages):
+        content = "BT /F1 10 Tf 40 760 Td 13 TL " + " ".join(f"({_escape(line)}) '" for line in page_lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def make_transcript_pdf(courses: int, legend_pages: int, rng: random.Random) -> bytes:
+    return make_pdf(transcript_lines(courses, rng) + legend_lines(legend_pages))
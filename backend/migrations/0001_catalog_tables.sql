@@ -0,0 +1,34 @@
+-- Catalog tables loaded by the bulk ingest (data/ingest_structured.py).
+-- Fresh databases get the same schema from init_db; apply these files in
+-- order to a database created before them:
+--     psql "$DATABASE_URL" -f backend/migrations/0001_catalog_tables.sql
+-- Every statement is idempotent.
+
+BEGIN;
+
+-- Plans are upserted by name
+CREATE UNIQUE INDEX IF NOT EXISTS uq_degree_plans_name ON degree_plans (name);
+
+CREATE TABLE IF NOT EXISTS degree_requirements (
+    id SERIAL NOT NULL,
+    program VARCHAR NOT NULL,
+    catalog_year VARCHAR NOT NULL,
+    min_total_credits INTEGER,
+    blocks JSON,
+    PRIMARY KEY (id),
+    CONSTRAINT uq_degree_requirements_program_year UNIQUE (program, catalog_year)
+);
+CREATE INDEX IF NOT EXISTS ix_degree_requirements_id ON degree_requirements (id);
+
+CREATE TABLE IF NOT EXISTS catalog_policies (
+    id SERIAL NOT NULL,
+    program VARCHAR NOT NULL,
+    catalog_year VARCHAR NOT NULL,
+    key VARCHAR NOT NULL,
+    value JSON,
+    PRIMARY KEY (id),
+    CONSTRAINT uq_catalog_policies_program_year_key UNIQUE (program, catalog_year, key)
+);
+CREATE INDEX IF NOT EXISTS ix_catalog_policies_id ON catalog_policies (id);
+
+COMMIT;
@@ -0,0 +1,50 @@
+-- Normalized requirements (app/models/requirement.py): one row per plan
+-- slot or requirement-set entry, with the courses and course prefixes
+-- that count toward it. The rows are derived from the plan_structure and
+-- blocks JSON; the next run of data/ingest_structured.py fills them for
+-- every plan and requirement set that has none.
+--     psql "$DATABASE_URL" -f backend/migrations/0002_requirement_tables.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS requirements (
+    id SERIAL NOT NULL,
+    plan_id INTEGER,
+    requirement_set_id INTEGER,
+    position INTEGER NOT NULL,
+    section VARCHAR NOT NULL,
+    term VARCHAR,
+    name VARCHAR NOT NULL,
+    kind VARCHAR NOT NULL,
+    credits INTEGER,
+    min_courses INTEGER NOT NULL,
+    notes TEXT,
+    PRIMARY KEY (id),
+    CONSTRAINT ck_requirements_one_owner CHECK ((plan_id IS NULL) <> (requirement_set_id IS NULL)),
+    FOREIGN KEY (plan_id) REFERENCES degree_plans (id) ON DELETE CASCADE,
+    FOREIGN KEY (requirement_set_id) REFERENCES degree_requirements (id) ON DELETE CASCADE
+);
+-- A plan's or requirement set's rows, in order
+CREATE INDEX IF NOT EXISTS ix_requirements_plan ON requirements (plan_id, position);
+CREATE INDEX IF NOT EXISTS ix_requirements_requirement_set ON requirements (requirement_set_id, position);
+
+CREATE TABLE IF NOT EXISTS requirement_options (
+    requirement_id INTEGER NOT NULL,
+    course_code VARCHAR NOT NULL,
+    PRIMARY KEY (requirement_id, course_code),
+    FOREIGN KEY (requirement_id) REFERENCES requirements (id) ON DELETE CASCADE
+);
+-- Course -> requirements it fills, across all plans
+CREATE INDEX IF NOT EXISTS ix_requirement_options_course ON requirement_options (course_code, requirement_id);
+
+CREATE TABLE IF NOT EXISTS requirement_prefixes (
+    requirement_id INTEGER NOT NULL,
+    prefix VARCHAR NOT NULL,
+    min_level INTEGER NOT NULL,
+    PRIMARY KEY (requirement_id, prefix),
+    FOREIGN KEY (requirement_id) REFERENCES requirements (id) ON DELETE CASCADE
+);
+-- Subject (and level) -> requirements it fills
+CREATE INDEX IF NOT EXISTS ix_requirement_prefixes_prefix ON requirement_prefixes (prefix, min_level, requirement_id);
+
+COMMIT;
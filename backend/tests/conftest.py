@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Run from backend/: python -m pytest. The data/ scripts import from the repo root.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.dirname(BACKEND_DIR)]
+
+# Always a throwaway SQLite database, even when the environment (e.g. the
+# docker-compose backend container) or .env names one: tests empty tables.
+# Set before app.core.database is imported (load_dotenv does not override).
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
@@ -0,0 +1,20 @@
+from app.services.answer_cache import AnswerCache
+
+
+def test_stats_count_misses_in_both_tiers():
+    cache = AnswerCache(max_entries=4)
+    cache.put("What is Csci 111?", [1.0, 0.0], "Computer Science I.")
+
+    assert cache.get_exact("what is CSCI 111") == "Computer Science I."
+    # A fast-path question: exact miss, never reaches the semantic tier
+    assert cache.get_exact("Who teaches Csci 211?") is None
+    # An exact miss answered by the semantic tier, and one answered by neither
+    assert cache.get_exact("Tell me about Csci 111") is None
+    assert cache.get_similar("Tell me about Csci 111", [0.99, 0.01]) == "Computer Science I."
+    assert cache.get_exact("Tell me about Csci 112") is None
+    assert cache.get_similar("Tell me about Csci 112", [0.99, 0.01]) is None
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["exact_misses"], stats["semantic_hits"], stats["semantic_misses"]) == (1, 3, 1, 1)
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from starlette.requests import Request
+
+from app.api.endpoints import chat
+from app.api.endpoints.chat import rag_service_dependency
+from app import main
+from app.main import app
+from app.services.rag_service import RAGService
+
+SOURCE = Document(page_content="Csci 111 requires Math 121.", metadata={"title": "Csci 111: Computer Science I", "page_type": "course"})
+
+
+class FakeChatModel(BaseChatModel):
+    # Streams `tokens`, then raises if `error` is set; records whether the stream was closed.
+    # With `stall_after`, hangs after that many tokens like a stuck upstream call
+    tokens: List[str]
+    error: Optional[str] = None
+    stall_after: Optional[int] = None
+    events: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self.tokens)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        try:
+            for i, token in enumerate(self.tokens):
+                if i == self.stall_after:
+                    await asyncio.sleep(60)
+                self.events.append(f"sent {token}")
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if self.error:
+                raise RuntimeError(self.error)
+            self.events.append("finished")
+        finally:
+            self.events.append("closed")
+
+
+def make_client(llm: FakeChatModel) -> TestClient:
+    service = RAGService(embeddings=DeterministicFakeEmbedding(size=8), vector_store=object(), llm=llm)
+
+    async def prepare(question, filters=None):
+        # Retrieval is not under test: no cache hit, one source document
+        return None, None, [SOURCE]
+
+    service._prepare = prepare
+    app.dependency_overrides[rag_service_dependency] = lambda: service
+    return TestClient(app)
+
+
+def read_events(client: TestClient) -> List[tuple]:
+    events = []
+    with client.stream("POST", "/api/v1/chat/stream", json={"message": "What does Csci 111 require?"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for block in response.read().decode().split("\n\n"):
+            if block:
+                event, data = block.split("\n")
+                events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def teardown_function():
+    app.dependency_overrides.clear()
+
+
+def test_stream_sends_retrieval_then_tokens_then_done():
+    llm = FakeChatModel(tokens=["Math ", "121", "."])
+    events = read_events(make_client(llm))
+
+    assert [event for event, _ in events] == ["retrieval", "token", "token", "token", "done"]
+    retrieval = events[0][1]
+    assert retrieval["cached"] is False
+    assert retrieval["sources"][0]["title"] == "Csci 111: Computer Science I"
+    assert "".join(data for event, data in events if event == "token") == "Math 121."
+    assert llm.events[-2:] == ["finished", "closed"]
+
+
+def test_stream_reports_upstream_errors():
+    llm = FakeChatModel(tokens=["Math "], error="quota exceeded")
+    events = read_events(make_client(llm))
+
+    assert [event for event, _ in events] == ["retrieval", "token", "error"]
+    assert events[-1][1] == {"detail": "quota exceeded"}
+
+
+def test_disconnect_mid_token_cancels_upstream_stream(monkeypatch):
+    # The upstream stalls after the first token; the client leaves while it waits
+    llm = FakeChatModel(tokens=["a", "b", "c"], stall_after=1)
+
+    async def is_disconnected(self):
+        return "sent a" in llm.events
+
+    monkeypatch.setattr(Request, "is_disconnected", is_disconnected)
+    monkeypatch.setattr(chat, "STREAM_DISCONNECT_POLL_SECONDS", 0.01)
+    start = time.perf_counter()
+    events = read_events(make_client(llm))
+
+    assert time.perf_counter() - start < 5
+    assert [event for event, _ in events] == ["retrieval", "token"]
+    assert llm.events == ["sent a", "closed"]
+
+
+def test_shutdown_waits_for_cancelled_warm_up(monkeypatch):
+    states = []
+
+    async def init_rag_service():
+        states.append("started")
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            states.append("cancelled")
+            raise
+
+    monkeypatch.setattr(main, "init_rag_service", init_rag_service)
+    monkeypatch.setattr(main.transcript_executor, "shutdown", lambda: states.append("shutdown"))
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+    # The warm-up unwinds before the pools are torn down, and shutdown does not raise
+    assert states == ["started", "cancelled", "shutdown"]
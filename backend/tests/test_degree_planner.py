@@ -0,0 +1,83 @@
+from app.core.database import Base, SessionLocal, engine
+from app.models.course import DegreePlan, DegreeRequirement
+from app.models.requirement import Requirement, RequirementOption
+from app.schemas.planner import PlanView
+from app.schemas.student import CourseGrade, StudentProfile
+from app.services.degree_planner import DegreePlannerService
+from app.services.plan_index import plan_index
+from app.services.requirement_tables import find_requirement_set, sync_requirements
+
+PLAN = {
+    "freshman": {
+        "fall": [{"course": "CSCI 111", "credits": 3}, {"course": "MATH 261 or MATH 263", "credits": 3}],
+        "spring": [{"course": "CSCI 211", "credits": 3}, {"course": "CSCI 300+ Elective", "credits": 3}],
+    },
+}
+
+
+def load_plan(db):
+    Base.metadata.create_all(bind=engine)
+    db.query(RequirementOption).delete()
+    db.query(Requirement).delete()
+    db.query(DegreePlan).delete()
+    db.add(DegreePlan(name="B.S. Computer Science 2024-2025", catalog_year="2024-2025", plan_structure=PLAN))
+    db.flush()
+    sync_requirements(db)
+    db.commit()
+    plan_index.invalidate()
+
+
+def profile(*codes, major="Computer Science"):
+    return StudentProfile(student_name="Student", major=major, taken_courses=[CourseGrade(course_code=code, grade="B") for code in codes])
+
+
+def test_missing_slots_come_from_the_requirement_tables():
+    db = SessionLocal()
+    try:
+        load_plan(db)
+        planner = DegreePlannerService(db)
+
+        result = planner.generate_plan(profile("Csci 111", "MATH 263", "ANTH 101"), PlanView.diff)
+        assert [entry["course"] for entry in result["missing"]] == ["CSCI 211", "CSCI 300+ Elective"]
+        assert result["outside_plan"] == ["ANTH 101"]
+
+        # The scratch tables outlive a rolled-back request
+        db.rollback()
+        result = planner.generate_plan(profile(), PlanView.diff)
+        assert result["missing_count"] == 4
+
+        # One audit for the whole batch; a student without a plan gets an error entry
+        results = sorted(planner.generate_plans([profile("CSCI 111", "CSCI 211"), profile(major="Basket Weaving"), profile("MATH 261")]), key=lambda r: r["index"])
+        assert [r["status"] for r in results] == ["success", "error", "success"]
+        assert [r.get("missing_count") for r in results] == [2, None, 3]
+    finally:
+        db.close()
+
+
+def test_program_lookup_prefers_exact_names_and_escapes_wildcards():
+    db = SessionLocal()
+    try:
+        Base.metadata.create_all(bind=engine)
+        db.query(DegreePlan).delete()
+        db.query(DegreeRequirement).delete()
+        db.add_all([
+            DegreePlan(name="BS in Computer Science 2024-2025", catalog_year="2024-2025", plan_structure=PLAN),
+            DegreePlan(name="BS in Computer Science (Data Science) 2025-2026", catalog_year="2025-2026", plan_structure=PLAN),
+            DegreeRequirement(program="BS in Computer Science", catalog_year="2024-2025", blocks={}),
+            DegreeRequirement(program="BS in Computer Science (Data Science)", catalog_year="2025-2026", blocks={}),
+        ])
+        db.commit()
+        plan_index.invalidate()
+
+        # A containing name of the requested year loses to the exact name of another year
+        assert plan_index.get(db, "bs in computer science", "2025-2026").name == "BS in Computer Science 2024-2025"
+        assert find_requirement_set(db, "bs in computer science", "2025-2026").program == "BS in Computer Science"
+        # Substrings still match when nothing is exact
+        assert plan_index.get(db, "Data Science", "2025-2026").name == "BS in Computer Science (Data Science) 2025-2026"
+        assert find_requirement_set(db, "Computer Science", "2024-2025").program == "BS in Computer Science"
+        # LIKE wildcards in the major are literal text
+        assert plan_index.get(db, "%", "2024-2025") is None
+        assert plan_index.get(db, "BS_in Computer Science", "2024-2025") is None
+        assert find_requirement_set(db, "%Science", "2024-2025") is None
+    finally:
+        db.close()
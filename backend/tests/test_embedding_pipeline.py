@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from data import embedding_pipeline
+from data.embedding_pipeline import EmbeddingPipeline
+
+
+class FlakyEmbeddings(DeterministicFakeEmbedding):
+    # Rate limited on the first call; fails for good on the `fail_on`-th call
+    calls: int = 0
+    fail_on: int = 0
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        if self.calls == self.fail_on:
+            raise RuntimeError("connection reset")
+        return self.embed_documents(texts)
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.rows = {}
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids):
+        for chunk_id, text, vector in zip(ids, texts, embeddings):
+            self.rows[chunk_id] = (text, vector)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(embedding_pipeline, "EMBED_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(embedding_pipeline.random, "uniform", lambda low, high: 0.0)
+
+
+def chunks(count=10):
+    return [(f"chunk-{i}", Document(page_content=f"text {i}", metadata={"source": f"page-{i}"})) for i in range(count)]
+
+
+def run(pipeline, items):
+    return asyncio.run(pipeline.run(iter(items)))
+
+
+def test_batches_retry_on_rate_limit():
+    store = FakeVectorStore()
+    stats = run(EmbeddingPipeline(FlakyEmbeddings(size=8), store, batch_size=3, concurrency=2), chunks())
+
+    assert stats["embedded"] == 10 and stats["batches"] == 4 and stats["retries"] == 1
+    assert set(store.rows) == {f"chunk-{i}" for i in range(10)}
+
+
+def test_failure_stops_the_run_and_keeps_inserted_batches():
+    store = FakeVectorStore()
+    # Call 1 is rate limited, calls 2-3 insert two batches, call 4 fails
+    pipeline = EmbeddingPipeline(FlakyEmbeddings(size=8, fail_on=4), store, batch_size=3, concurrency=1)
+    with pytest.raises(RuntimeError, match="connection reset"):
+        run(pipeline, chunks())
+    assert sorted(store.rows) == [f"chunk-{i}" for i in range(6)]
@@ -0,0 +1,66 @@
+from langchain_core.documents import Document
+
+from app.core.database import Base, SessionLocal, engine
+from app.models.course import Course
+from app.services.hybrid_retriever import KnowledgeIndex, build_knowledge_index
+
+
+def policy(content: str) -> Document:
+    return Document(page_content=content, metadata={"page_type": "policy"})
+
+
+def make_index() -> KnowledgeIndex:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(Course).delete()
+        db.add_all([
+            # As in the catalog scrape: cross-listed under CIS and Csci, mixed case
+            Course(course_code="CIS 111", title="Computer Science I", credits=3, prerequisites_raw="Non-engineering Majors Only"),
+            Course(course_code="Csci 111", title="Computer Science I", credits=3, prerequisites_raw="Math 121"),
+            Course(course_code="csci 423", title="Operating Systems", credits=3, prerequisites_raw="Csci 223"),
+        ])
+        db.commit()
+        index = build_knowledge_index(db)
+    finally:
+        db.close()
+    index.policies = {
+        "minor_or_tech_elective_policy": [policy("Students must complete a minor or 18 hours of technical electives.")],
+        "credit_max_standard": [policy("Students may take at most 19 credit hours per semester without an overload.")],
+        "credit_max_overload": [policy("With an approved overload, students may take up to 21 credit hours per semester.")],
+    }
+    return index
+
+
+def titles(match):
+    return [doc.metadata["title"] for doc in match.docs]
+
+
+def test_course_codes_are_normalized_and_cross_listings_returned():
+    index = make_index()
+    assert index.departments == {"CIS", "CSCI"}
+
+    match = index.lookup("What is the prerequisite for CSCI 111?")
+    assert match.complete
+    assert titles(match) == ["Csci 111: Computer Science I", "CIS 111: Computer Science I"]
+
+    match = index.lookup("what are prereqs for CSCI 423")
+    assert titles(match) == ["csci 423: Operating Systems"]
+
+
+def test_unknown_codes_and_plain_numbers():
+    index = make_index()
+    # A code the index lacks needs a search; a bare number is not a course
+    assert index.lookup("What is MATH 261?") is None
+    assert index.lookup("what is for 111 about") is None
+
+
+def test_policy_match_short_circuits_only_when_it_covers_the_question():
+    index = make_index()
+
+    match = index.lookup("How many credits can I take with an overload?")
+    assert match.complete and len(match.docs) == 2
+
+    match = index.lookup("I want to minor in math, which courses?")
+    assert not match.complete
+    assert [doc.page_content for doc in match.docs] == ["Students must complete a minor or 18 hours of technical electives."]
@@ -0,0 +1,101 @@
+import functools
+import json
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.services.embedding_cache import CachedEmbeddings
+from data import ingest_rag
+from data.embedding_pipeline import EmbeddingPipeline
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    texts: list = []
+
+    async def aembed_documents(self, texts):
+        self.texts.extend(texts)
+        return self.embed_documents(texts)
+
+
+class FakePGVector:
+    """The langchain_pg_embedding rows of one collection; `fail_on` breaks the n-th insert."""
+
+    rows = {}
+    inserts = 0
+    fail_on = 0
+
+    def __init__(self, **kwargs):
+        pass
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids):
+        FakePGVector.inserts += 1
+        if FakePGVector.inserts == FakePGVector.fail_on:
+            raise ConnectionError("server closed the connection unexpectedly")
+        FakePGVector.rows.update(zip(ids, texts))
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            FakePGVector.rows.pop(chunk_id, None)
+
+
+@pytest.fixture
+def ingest(tmp_path, monkeypatch):
+    data_file = tmp_path / "pages.jsonl"
+    with open(data_file, "w", encoding="utf-8") as f:
+        for i in range(12):
+            text = f"Test page {i} for the resume test. " * 3
+            f.write(json.dumps({"url": f"https://catalog.test/resume/{i}", "title": f"Page {i}", "text_clean": text}) + "\n")
+    index_calls = []
+    FakePGVector.rows, FakePGVector.inserts, FakePGVector.fail_on = {}, 0, 0
+
+    monkeypatch.setattr(ingest_rag, "DATA_FILE", str(data_file))
+    monkeypatch.setattr(ingest_rag, "PGVector", FakePGVector)
+    monkeypatch.setattr(ingest_rag, "get_existing_ids", lambda collection_name: set(FakePGVector.rows))
+    monkeypatch.setattr(ingest_rag, "EmbeddingPipeline", functools.partial(EmbeddingPipeline, batch_size=4, concurrency=1))
+    # Postgres-only DDL; the calls are recorded instead
+    monkeypatch.setattr(ingest_rag, "ensure_fulltext_index", lambda db: index_calls.append("fulltext"))
+    monkeypatch.setattr(ingest_rag, "ensure_vector_index", lambda db, rebuild=False: index_calls.append(f"vector rebuild={rebuild}"))
+
+    def run(fail_on=0):
+        # A fresh process each time: new model client, empty in-memory cache
+        model = CountingEmbeddings(size=8, texts=[])
+        monkeypatch.setattr(ingest_rag, "create_embeddings", lambda: CachedEmbeddings(model))
+        FakePGVector.inserts, FakePGVector.fail_on = 0, fail_on
+        index_calls.clear()
+        ingest_rag.ingest_vectors()
+        return model.texts, list(index_calls)
+
+    wanted = {ingest_rag.chunk_id(chunk) for chunk in ingest_rag.chunk_documents(ingest_rag.load_documents())}
+    return run, wanted
+
+
+def collection_version():
+    from app.core.database import SessionLocal
+    from app.services.collection_versions import get_collection_version
+    with SessionLocal() as db:
+        return get_collection_version(db, ingest_rag.COLLECTION_NAME)
+
+
+def test_interrupted_ingest_resumes_from_the_store_and_the_embedding_cache(ingest):
+    run, wanted = ingest
+    assert len(wanted) == 12
+    version = collection_version()
+
+    # The second insert fails: one batch stored, the second embedded (and cached) but not stored
+    embedded, index_calls = run(fail_on=2)
+    assert len(FakePGVector.rows) == 4
+    assert len(embedded) == 8
+    assert index_calls == [] and collection_version() == version
+
+    # The rerun adds what is missing; only never-embedded chunks reach the model
+    embedded, index_calls = run()
+    assert set(FakePGVector.rows) == wanted
+    assert len(embedded) == 4
+    assert index_calls == ["fulltext", "vector rebuild=True"]
+    assert collection_version() == version + 1
+
+    # Nothing changed: indexes are still ensured, the version stays
+    embedded, index_calls = run()
+    assert embedded == []
+    assert index_calls == ["fulltext", "vector rebuild=False"]
+    assert collection_version() == version + 1
@@ -0,0 +1,33 @@
+from app.services.prereq_parser import course_groups, parse_prerequisites
+
+# Csci 391 as scraped: the headings run into each other with no space
+CSCI_391 = (
+    "Math 262: Unified Calculus & Analytic Geometry IICsci 223: Computer Org. &  Assembly Language"
+    "Pre-Requisite: 24 Earned HoursPrerequisite: Csci 211 OR CIS 211 or Csci 356 or CIS 356"
+)
+
+
+def test_run_together_code_headings_are_split():
+    node = parse_prerequisites(CSCI_391, "Csci 391")
+    assert node == {"type": "and", "args": [
+        {"type": "course", "code": "MATH 262"},
+        {"type": "course", "code": "CSCI 223"},
+        {"type": "hours", "min": 24},
+        {"type": "or", "args": [
+            {"type": "course", "code": "CSCI 211"},
+            {"type": "course", "code": "CIS 211"},
+            {"type": "course", "code": "CSCI 356"},
+            {"type": "course", "code": "CIS 356"},
+        ]},
+    ]}
+    assert [sorted(group) for group in course_groups(node)] == [
+        ["MATH 262"], ["CSCI 223"], ["CIS 211", "CIS 356", "CSCI 211", "CSCI 356"],
+    ]
+
+
+def test_all_caps_code_heading_is_split_whole():
+    node = parse_prerequisites("Math 261: Unified CalculusCIS 111: Computer Science I")
+    assert node == {"type": "and", "args": [
+        {"type": "course", "code": "MATH 261"},
+        {"type": "course", "code": "CIS 111"},
+    ]}
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from data import scraper
+from data.corpus import count_records, iter_records
+from data.scraper import CrawlState, Crawler, ShardWriter
+
+SITE = {
+    "/": '<title>Home</title><a href="/a">a</a><a href="/b#top">b</a><a href="/private/x">p</a>'
+         '<a href="/slow">s</a><a href="http://elsewhere.test/">e</a><a href="mailto:x@y.test">m</a>',
+    "/a": '<title>A</title><a href="/a/courses">courses</a><a href="/">home</a>',
+    "/a/courses": "<title>Courses</title>Csci 111",
+    "/b": "<title>B</title>b page",
+    "/private/x": "<title>Private</title>",
+    "/slow": "<title>Slow</title>slow page",
+}
+
+
+class FixtureSite:
+    """A local catalog: robots.txt disallows /private, pages carry ETags, /slow waits for `release`."""
+
+    def __init__(self):
+        self.pages = dict(SITE)
+        self.hits = []  # (path, status)
+        self.slow_requested = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/robots.txt":
+                    return self.reply(200, b"User-agent: *\nDisallow: /private\n", "text/plain")
+                if self.path == "/slow":
+                    site.slow_requested.set()
+                    site.release.wait(10)
+                if self.path not in site.pages:
+                    return self.reply(404)
+                body = site.pages[self.path].encode()
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self.reply(304)
+                self.reply(200, body, "text/html", {"ETag": etag})
+
+            def reply(self, status, body=b"", content_type=None, headers=None):
+                site.hits.append((self.path, status))
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def fetched(self, status=200):
+        return sorted(path for path, hit_status in self.hits if hit_status == status and path != "/robots.txt")
+
+
+@pytest.fixture
+def site():
+    site = FixtureSite()
+    yield site
+    site.release.set()
+    site.server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(scraper, "RETRY_BACKOFF", 0.01)
+
+
+def make_crawler(site: FixtureSite, crawl_dir: str) -> Crawler:
+    return Crawler(
+        seeds=[{"url": f"{site.base}/", "type": "program"}],
+        crawl_dir=crawl_dir,
+        allowed_prefixes=[f"{site.base}/"],
+        concurrency=4,
+        host_delay=0.0,
+        # No crawl4ai needed: strip the tags
+        to_markdown=lambda html, url: re.sub(r"<[^>]+>", " ", html),
+    )
+
+
+def statuses(crawl_dir: str, base: str):
+    state = CrawlState(os.path.join(crawl_dir, "state.jsonl"))
+    state.close()
+    return {url[len(base):]: page["status"] for url, page in state.pages.items()}, state
+
+
+def test_robots_disallow_and_conditional_rerun(site, tmp_path):
+    crawl_dir = str(tmp_path)
+
+    stats = asyncio.run(make_crawler(site, crawl_dir).run())
+    assert stats == {"new": 5, "disallowed": 1}
+    pages, state = statuses(crawl_dir, site.base)
+    assert pages == {"/": "fetched", "/a": "fetched", "/a/courses": "fetched", "/b": "fetched", "/slow": "fetched", "/private/x": "disallowed"}
+    assert state.complete
+    assert state.pages[f"{site.base}/a/courses"]["page_type"] == "course_list"
+    # Disallowed by robots.txt: never requested
+    assert "/private/x" not in [path for path, _ in site.hits]
+
+    # Second run: every page is re-checked with If-None-Match; only /b changed
+    site.pages["/b"] = "<title>B2</title>b page, changed"
+    site.hits.clear()
+    stats = asyncio.run(make_crawler(site, crawl_dir).run())
+    assert stats == {"not_modified": 4, "changed": 1, "disallowed": 1}
+    assert site.fetched(304) == ["/", "/a", "/a/courses", "/slow"]
+    assert site.fetched(200) == ["/b"]
+
+    # The shard keeps both versions of /b; readers see the latest
+    assert count_records(crawl_dir) == 5
+    titles = {record["url"][len(site.base):]: record["title"] for record in iter_records(crawl_dir)}
+    assert titles["/b"] == "B2"
+
+
+def test_cancelled_crawl_resumes_pending_pages(site, tmp_path):
+    crawl_dir = str(tmp_path)
+    site.release.clear()
+
+    async def cancel_on_slow_page():
+        run = asyncio.create_task(make_crawler(site, crawl_dir).run())
+        while not site.slow_requested.is_set():
+            await asyncio.sleep(0.01)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+    asyncio.run(cancel_on_slow_page())
+    pages, state = statuses(crawl_dir, site.base)
+    assert not state.complete
+    assert pages["/slow"] == "pending"
+    fetched_before = {path for path, status in pages.items() if status == "fetched"}
+    assert "/" in fetched_before
+
+    # Resuming fetches only what was still pending, then completes the run
+    site.release.set()
+    site.hits.clear()
+    stats = asyncio.run(make_crawler(site, crawl_dir).run())
+    assert "/slow" in site.fetched()
+    assert not fetched_before & set(site.fetched())
+    pages, state = statuses(crawl_dir, site.base)
+    assert state.complete
+    assert set(pages.values()) == {"fetched", "disallowed"}
+    assert stats["new"] == 5 - len(fetched_before)
+    assert count_records(crawl_dir) == 5
+
+
+def test_shard_writer_rotates_and_resumes_last_shard(tmp_path):
+    crawl_dir = str(tmp_path)
+    writer = ShardWriter(crawl_dir, max_bytes=100)
+    for i in range(5):
+        writer.write({"url": f"u{i % 4}", "text_clean": "x" * 40 + str(i)})
+    writer.close()
+    assert sorted(os.listdir(crawl_dir)) == ["pages-00000.jsonl", "pages-00001.jsonl", "pages-00002.jsonl"]
+
+    # A new writer appends to the last shard, which still has room, instead of starting over
+    writer = ShardWriter(crawl_dir, max_bytes=100)
+    assert writer.index == 2
+    assert writer.write({"url": "u0", "text_clean": "final"}) == "pages-00002.jsonl"
+    writer.close()
+
+    latest = {record["url"]: record["text_clean"][-5:] for record in iter_records(crawl_dir)}
+    assert latest == {"u0": "final", "u1": "xxxx1", "u2": "xxxx2", "u3": "xxxx3"}
@@ -0,0 +1,60 @@
+import io
+import json
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import transcript
+from app.main import app
+from app.schemas.student import StudentProfile
+from app.services.transcript_executor import transcript_executor
+
+
+async def fake_parse_pdf(source):
+    # pdfplumber is not under test: a "PDF" here is a header plus the student's name
+    if not source.startswith(b"%PDF"):
+        raise ValueError("No /Root object! - Is this really a PDF?")
+    return StudentProfile(student_name=source[len(b"%PDF "):].decode())
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_batch_reports_every_file_and_archive_member(monkeypatch):
+    monkeypatch.setattr(transcript_executor, "parse_pdf", fake_parse_pdf)
+    monkeypatch.setattr(transcript, "TRANSCRIPT_MAX_BYTES", 64)
+    archive = make_zip({
+        "fall/ann.pdf": b"%PDF Ann",
+        "fall/broken.pdf": b"not a pdf",
+        "fall/huge.pdf": b"%PDF " + b"x" * 100,
+        "fall/readme.txt": b"skipped",
+    })
+    files = [
+        ("files", ("bob.pdf", b"%PDF Bob", "application/pdf")),
+        ("files", ("fall.zip", archive, "application/zip")),
+        ("files", ("notes.txt", b"hello", "text/plain")),
+        ("files", ("bad.zip", b"PK not really", "application/zip")),
+    ]
+
+    response = TestClient(app).post("/api/v1/transcript/batch", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert sorted(line["completed"] for line in lines) == [1, 2, 3, 4, 5, 6]
+    assert {line["total"] for line in lines} == {6}
+    results = {line["file"]: line for line in lines}
+    assert results["bob.pdf"]["profile"]["student_name"] == "Bob"
+    assert results["fall.zip/fall/ann.pdf"]["profile"]["student_name"] == "Ann"
+    errors = {name: line["error"] for name, line in results.items() if not line["success"]}
+    assert errors == {
+        "fall.zip/fall/broken.pdf": "Error parsing transcript: No /Root object! - Is this really a PDF?",
+        "fall.zip/fall/huge.pdf": "Error parsing transcript: Transcript PDF is too large",
+        "notes.txt": "Error parsing transcript: Only PDF or zip files are allowed",
+        "bad.zip": "Error parsing transcript: Not a valid zip archive",
+    }
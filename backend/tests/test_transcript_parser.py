@@ -0,0 +1,39 @@
+import time
+
+from app.services.transcript_parser import TranscriptParser
+
+TRANSCRIPT = """UNIVERSITY OF MISSISSIPPI - UNOFFICIAL TRANSCRIPT
+Fall 2023
+Page 1 of 2
+CSCI 111  Computer Science I   3.00   A   12.00
+EL E 235  Circuits 2.00 Lab   4.00   B+
+PAGE 123  not a course   3.00   A
+Term: Spring 2024
+MATH 262  Calculus II   3.00   W
+Cumulative GPA: 3.10
+Cumulative GPA: 3.45
+"""
+
+
+def parse(text):
+    return TranscriptParser({"CSCI", "MATH", "EL E"})._extract_data_from_text(text)
+
+
+def test_courses_terms_and_gpa_in_one_scan():
+    profile = parse(TRANSCRIPT)
+    assert [(c.course_code, c.credits, c.grade, c.semester) for c in profile.taken_courses] == [
+        ("CSCI 111", 3.0, "A", "Fall 2023"),
+        ("EL E 235", 4.0, "B+", "Fall 2023"),
+        ("MATH 262", 3.0, "W", "Spring 2024"),
+    ]
+    assert profile.gpa == 3.45
+    assert profile.credits_earned == 10.0
+
+
+def test_long_line_without_grade_is_linear():
+    # Course-like tokens over 16k characters made the lazy regex backtrack quadratically
+    text = "Fall 2023\n" + "CSCI 111 3.00 " * 1200 + "\nCumulative GPA: 3.00"
+    start = time.perf_counter()
+    profile = parse(text)
+    assert time.perf_counter() - start < 0.05
+    assert profile.taken_courses == []
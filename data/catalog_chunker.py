@@ -0,0 +1,211 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Upper bound for a section chunk; course entries and table rows are never split
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1500"))
+# Sections shorter than this are merged with the sections that follow them
+CHUNK_MIN_CHARS = int(os.getenv("CHUNK_MIN_CHARS", "200"))
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]*)\]\((?:[^()]|\([^)]*\))*\)")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[*+-]|\d+\.)\s+(.*)$")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*-{2,}\s*(?:\|\s*-{2,}\s*)*\|?\s*$")
+# "CIS 111: Computer Science I", "Csci 111: ...", "G St 201: ..."
+COURSE_ENTRY_RE = re.compile(r"^([A-Za-z]{2,4}(?: [A-Za-z]{1,2})? \d{3}):\s+(.+)$")
+
+# Site chrome the scraper keeps: catalog search/picker, contacts, footers.
+# A section with one of these headings is dropped with its subsections.
+BOILERPLATE_HEADINGS = re.compile(
+    r"^(search courses|.*\bcatalog|select a different catalog|contacts?|information for|regional campuses|"
+    r"social media links|primary sidebar|page not found|perhaps you meant:?|search (courses|schools)|"
+    r"take the next steps|quick links|resources)$",
+    re.IGNORECASE,
+)
+
+
+def strip_markdown(text: str) -> str:
+    # Images go, links keep their text: URLs are tokens that never answer a question
+    text = IMAGE_RE.sub("", text)
+    text = LINK_RE.sub(lambda m: m.group(1), text)
+    return text.replace("**", "").replace("\\(", "(").replace("\\)", ")").strip()
+
+
+def is_link_item(line: str) -> bool:
+    match = LIST_ITEM_RE.match(line)
+    return bool(match) and bool(re.fullmatch(r"\s*(\[[^\]]*\]\([^)]*\)\s*)+", IMAGE_RE.sub("", match.group(1))))
+
+
+@dataclass
+class Section:
+    path: Tuple[str, ...]
+    lines: List[str] = field(default_factory=list)
+
+
+def iter_sections(markdown: str) -> Iterator[Section]:
+    """
+    Splits a scraped page into heading sections with their heading path.
+    Everything before the first H1 (site navigation) and boilerplate
+    sections are dropped, as are lists that are only links (menus,
+    breadcrumbs) unless they list courses.
+    """
+    lines = markdown.splitlines()
+    first_h1 = next((i for i, line in enumerate(lines) if line.startswith("# ")), 0)
+
+    path: List[Tuple[int, str]] = []
+    skip_level: Optional[int] = None
+    section = Section(path=())
+    list_block: List[str] = []
+
+    def flush_list():
+        # A list that is mostly bare links is navigation
+        links = sum(1 for line in list_block if is_link_item(line))
+        courses = sum(1 for line in list_block if COURSE_ENTRY_RE.match(strip_markdown(LIST_ITEM_RE.match(line).group(1))))
+        if courses or links * 2 < len(list_block):
+            section.lines.extend(list_block)
+        list_block.clear()
+
+    for line in lines[first_h1:]:
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush_list()
+            level, title = len(heading.group(1)), strip_markdown(heading.group(2))
+            if skip_level is not None and level > skip_level:
+                continue
+            skip_level = None
+            if BOILERPLATE_HEADINGS.match(title):
+                skip_level = level
+                continue
+            if section.path or section.lines:
+                yield section
+            path = [(l, t) for l, t in path if l < level] + [(level, title)]
+            section = Section(path=tuple(t for _, t in path if t))
+            continue
+        if skip_level is not None:
+            continue
+        if LIST_ITEM_RE.match(line):
+            list_block.append(line)
+            continue
+        flush_list()
+        if line.strip():
+            section.lines.append(line)
+    flush_list()
+    if section.path or section.lines:
+        yield section
+
+
+def _table_rows(lines: List[str]) -> List[str]:
+    return [strip_markdown(line) for line in lines if not TABLE_SEPARATOR_RE.match(line)]
+
+
+def _blocks(section: Section) -> Iterator[Tuple[str, str]]:
+    # (kind, text): "course" list entries, "table" runs of rows, "text" paragraphs
+    table: List[str] = []
+    for line in section.lines:
+        if "|" in line:
+            table.append(line)
+            continue
+        if table:
+            yield "table", "\n".join(_table_rows(table))
+            table = []
+        item = LIST_ITEM_RE.match(line)
+        text = strip_markdown(item.group(1) if item else line)
+        if item and COURSE_ENTRY_RE.match(text):
+            yield "course", text
+        elif text:
+            yield "text", ("- " + text) if item else text
+    if table:
+        yield "table", "\n".join(_table_rows(table))
+
+
+class CatalogChunker:
+    """
+    Structure-aware chunking of scraped catalog markdown: one chunk per
+    course entry, and one per heading section (split at paragraph or table
+    row boundaries only when longer than `max_chars`), with no overlap.
+    Each chunk starts with its heading path and carries it as `section`
+    metadata, so "Prerequisites" under Registration and under a program
+    stay distinguishable.
+    """
+
+    def __init__(self, max_chars: int = CHUNK_MAX_CHARS, min_chars: int = CHUNK_MIN_CHARS):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        # Last resort for a single paragraph longer than max_chars
+        self._splitter = RecursiveCharacterTextSplitter(chunk_size=max_chars, chunk_overlap=0, separators=[". ", " ", ""])
+
+    def split_documents(self, docs: Iterable[Document]) -> Iterator[Document]:
+        for doc in docs:
+            yield from self.split_document(doc)
+
+    def split_document(self, doc: Document) -> Iterator[Document]:
+        pending: Optional[Tuple[Tuple[str, ...], List[str]]] = None
+        for section in iter_sections(doc.page_content):
+            parts: List[str] = []
+            courses = 0
+            for kind, text in _blocks(section):
+                if kind == "course":
+                    code = COURSE_ENTRY_RE.match(text).group(1)
+                    courses += 1
+                    yield self._chunk(doc, section.path, text, "course", course_code=code.upper())
+                else:
+                    parts.append(text)
+
+            if pending and not pending[1] and section.path[:len(pending[0])] == pending[0]:
+                # A bare parent heading is already part of this section's path
+                pending = None
+            if not parts and (courses or not section.path):
+                continue
+            if not parts and pending is None:
+                # Bare headings carry content too ("Minimum Total Credit Hours: 127")
+                pending = (section.path, [])
+                continue
+
+            # Short sections ride along with the next one, their headings kept inline
+            if pending:
+                path, previous = pending
+                shared = next((i for i, (a, b) in enumerate(zip(path, section.path)) if a != b), min(len(path), len(section.path)))
+                body = previous + [" > ".join(section.path[shared:])] + parts if section.path != path else previous + parts
+            else:
+                path, body = section.path, parts
+            if sum(len(part) for part in body) < self.min_chars:
+                pending = (path, body)
+                continue
+            pending = None
+            yield from self._pack(doc, path, body)
+        if pending:
+            yield from self._pack(doc, *pending)
+
+    def _pack(self, doc: Document, path: Tuple[str, ...], parts: List[str]) -> Iterator[Document]:
+        current: List[str] = []
+        size = 0
+        for part in self._fit(parts):
+            if current and size + len(part) > self.max_chars:
+                yield self._chunk(doc, path, "\n".join(current), "section")
+                current, size = [], 0
+            current.append(part)
+            size += len(part) + 1
+        if current:
+            yield self._chunk(doc, path, "\n".join(current), "section")
+
+    def _fit(self, parts: List[str]) -> Iterator[str]:
+        # Tables are cut between rows, prose between sentences
+        for part in parts:
+            if len(part) <= self.max_chars:
+                yield part
+            elif "|" in part:
+                yield from part.split("\n")
+            else:
+                yield from self._splitter.split_text(part)
+
+    def _chunk(self, doc: Document, path: Tuple[str, ...], text: str, chunk_type: str, **metadata) -> Document:
+        heading = " > ".join(path)
+        return Document(
+            page_content=f"{heading}\n{text}" if heading else text,
+            metadata={**doc.metadata, "section": heading, "chunk_type": chunk_type, **metadata},
+        )
@@ -0,0 +1,81 @@
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from data.corpus_store import CorpusStore, is_corpus_store
+
+# Everything the ingest and preview tools read; html_raw and links_out are dropped
+RECORD_FIELDS = ("url", "source", "title", "page_type", "fetched_at", "catalog_year", "text_clean")
+
+# Shards written by the crawler (data/scraper.py): pages-00000.jsonl, pages-00001.jsonl, ...
+SHARD_RE = re.compile(r"^pages-(\d{5})\.jsonl$")
+
+
+def shard_paths(directory: str) -> List[str]:
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if SHARD_RE.match(name))
+
+
+def iter_records(path: str, fields: Optional[Sequence[str]] = RECORD_FIELDS) -> Iterator[Optional[Dict]]:
+    """
+    Yields one scrape record per line, keeping only `fields` (all of them
+    when None), so memory is bounded by the largest single record rather
+    than the corpus. Lines that are not valid JSON yield None (callers
+    decide whether to report them). `path` may also be a crawl directory of
+    append-only shards, in which case only the latest record of each URL is
+    yielded, or a corpus store (data/corpus_store.py), which decodes only
+    the requested fields.
+    """
+    if is_corpus_store(path):
+        with CorpusStore(path) as store:
+            yield from store.iter_records(fields)
+        return
+    if os.path.isdir(path):
+        yield from _iter_latest(path, fields)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+                continue
+            yield _select(item, fields)
+
+
+def count_records(path: str) -> int:
+    if is_corpus_store(path):
+        with CorpusStore(path) as store:
+            return len(store)
+    if os.path.isdir(path):
+        return len(_latest_positions(path))
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def _latest_positions(directory: str) -> Dict[str, Tuple[int, int]]:
+    # url -> (shard, line) of its newest record; re-crawled pages are appended again
+    latest: Dict[str, Tuple[int, int]] = {}
+    for shard, path in enumerate(shard_paths(directory)):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                try:
+                    latest[json.loads(line)["url"]] = (shard, line_no)
+                except (json.JSONDecodeError, KeyError):
+                    continue
+    return latest
+
+
+def _iter_latest(directory: str, fields: Optional[Sequence[str]]) -> Iterator[Optional[Dict]]:
+    # Two passes keep memory at one position per URL instead of one record per URL
+    latest = set(_latest_positions(directory).values())
+    for shard, path in enumerate(shard_paths(directory)):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                if (shard, line_no) not in latest:
+                    continue
+                yield _select(json.loads(line), fields)
+
+
+def _select(item: Dict, fields: Optional[Sequence[str]]) -> Dict:
+    return item if fields is None else {field: item[field] for field in fields if field in item}
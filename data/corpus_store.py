@@ -0,0 +1,262 @@
+import json
+import mmap
+import os
+import re
+import sys
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zlib is slower to decompress but always there
+    zstandard = None
+
+# Large fields are stored compressed, one frame per record, column by column;
+# the rest (url, title, page_type, ...) lives uncompressed in the shard index.
+# Value: how the field is encoded before compression.
+BLOB_FIELDS = {"text_clean": "text", "html_raw": "text", "links_out": "json"}
+# Records per shard; a shard's index (its metadata) is held in memory while writing
+SHARD_MAX_RECORDS = int(os.getenv("CORPUS_SHARD_MAX_RECORDS", "1000"))
+COMPRESSION_LEVEL = int(os.getenv("CORPUS_COMPRESSION_LEVEL", "6"))
+
+INDEX_RE = re.compile(r"^corpus-(\d{5})\.idx$")
+FORMAT_VERSION = 1
+
+
+def is_corpus_store(path: str) -> bool:
+    return os.path.isdir(path) and any(INDEX_RE.match(name) for name in os.listdir(path))
+
+
+def _compressor(codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress
+    return lambda data: zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def _decompressor(codec: str):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This corpus store is zstd-compressed; install zstandard to read it.")
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+
+class CorpusWriter:
+    """
+    Writes scrape records into a columnar corpus store: per shard, a data
+    file holding each large field's compressed frames contiguously
+    (corpus-NNNNN.dat) and a JSON index with the small fields and every
+    frame's offset (corpus-NNNNN.idx). The index is written last, so a shard
+    without one was never finished and is ignored.
+    """
+
+    def __init__(self, directory: str, shard_max_records: int = SHARD_MAX_RECORDS):
+        self.directory = directory
+        self.shard_max_records = shard_max_records
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self._compress = _compressor(self.codec)
+        os.makedirs(directory, exist_ok=True)
+        # New shards go after existing ones; readers let later shards win per URL
+        existing = [int(INDEX_RE.match(name).group(1)) for name in os.listdir(directory) if INDEX_RE.match(name)]
+        self.index = max(existing) + 1 if existing else 0
+        self._start_shard()
+
+    def write(self, record: Dict):
+        row: Dict = {}
+        for field, value in record.items():
+            if field not in BLOB_FIELDS:
+                row[field] = value
+                continue
+            if value is None:
+                continue
+            data = value.encode("utf-8") if BLOB_FIELDS[field] == "text" else json.dumps(value, ensure_ascii=False).encode("utf-8")
+            frame = self._compress(data)
+            column = self._columns.get(field)
+            if column is None:
+                column = self._columns[field] = open(self._path(f"{field}.tmp"), "w+b")
+                self._frames[field] = {}
+            self._frames[field][len(self._rows)] = (column.tell(), len(frame))
+            column.write(frame)
+        self._rows.append(row)
+        if len(self._rows) >= self.shard_max_records:
+            self._finish_shard()
+            self.index += 1
+            self._start_shard()
+
+    def close(self):
+        if self._rows:
+            self._finish_shard()
+        else:
+            self._discard_columns()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start_shard(self):
+        self._rows: List[Dict] = []
+        self._columns: Dict = {}
+        self._frames: Dict[str, Dict[int, Tuple[int, int]]] = {}
+
+    def _finish_shard(self):
+        # 1. Concatenate the column files; frame offsets become offsets into the data file
+        columns = {}
+        with open(self._path("dat"), "wb") as data:
+            for field, column in self._columns.items():
+                base = data.tell()
+                column.seek(0)
+                while chunk := column.read(1024 * 1024):
+                    data.write(chunk)
+                frames = self._frames[field]
+                columns[field] = {
+                    "encoding": BLOB_FIELDS[field],
+                    "offset": base,
+                    "length": data.tell() - base,
+                    # [offset, length] per row; [0, 0] where the record had no value
+                    "frames": [[base + frames[row][0], frames[row][1]] if row in frames else [0, 0] for row in range(len(self._rows))],
+                }
+        self._discard_columns()
+
+        # 2. The index makes the shard visible
+        index = {"version": FORMAT_VERSION, "codec": self.codec, "data": os.path.basename(self._path("dat")), "rows": self._rows, "columns": columns}
+        tmp_path = self._path("idx.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path("idx"))
+
+    def _discard_columns(self):
+        for field, column in self._columns.items():
+            column.close()
+            os.remove(self._path(f"{field}.tmp"))
+        self._columns = {}
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"corpus-{self.index:05d}.{suffix}")
+
+
+class _Shard:
+    def __init__(self, directory: str, index_name: str, use_mmap: bool):
+        with open(os.path.join(directory, index_name), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.rows: List[Dict] = index["rows"]
+        self.columns: Dict[str, Dict] = index["columns"]
+        self.decompress = _decompressor(index["codec"])
+        self._file = open(os.path.join(directory, index["data"]), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap and size else None
+        self._view = memoryview(self._mmap) if self._mmap is not None else None
+
+    def blob(self, field: str, row: int):
+        column = self.columns.get(field)
+        if column is None:
+            return None
+        offset, length = column["frames"][row]
+        if not length:
+            return None
+        if self._view is not None:
+            # A slice of the mapping: no read() call and no intermediate copy
+            data = self.decompress(self._view[offset:offset + length])
+        else:
+            data = self.decompress(os.pread(self._file.fileno(), length, offset))
+        return data.decode("utf-8") if column["encoding"] == "text" else json.loads(data)
+
+    def close(self):
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+        self._file.close()
+
+
+class CorpusStore:
+    """
+    Reads a corpus store written by CorpusWriter. Only the requested fields
+    are decoded (metadata needs no decompression at all; text_clean never
+    touches html_raw), any record can be fetched by URL, and the data files
+    are memory-mapped unless `use_mmap` is False.
+    """
+
+    def __init__(self, directory: str, use_mmap: bool = True):
+        names = sorted(name for name in os.listdir(directory) if INDEX_RE.match(name))
+        self._shards = [_Shard(directory, name, use_mmap) for name in names]
+        # url -> (shard, row) of its latest record
+        self._positions: Dict[str, Tuple[int, int]] = {}
+        for shard_no, shard in enumerate(self._shards):
+            for row_no, row in enumerate(shard.rows):
+                self._positions[row.get("url")] = (shard_no, row_no)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._positions
+
+    def urls(self) -> List[str]:
+        return list(self._positions)
+
+    def column_bytes(self) -> Dict[str, int]:
+        # Compressed size of each large field across shards
+        sizes: Dict[str, int] = {}
+        for shard in self._shards:
+            for field, column in shard.columns.items():
+                sizes[field] = sizes.get(field, 0) + column["length"]
+        return sizes
+
+    def get(self, url: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        position = self._positions.get(url)
+        return self._record(*position, fields) if position else None
+
+    def iter_records(self, fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        # Storage order, which keeps reads of each column sequential
+        for shard_no, shard in enumerate(self._shards):
+            for row_no, row in enumerate(shard.rows):
+                if self._positions.get(row.get("url")) == (shard_no, row_no):
+                    yield self._record(shard_no, row_no, fields)
+
+    def close(self):
+        for shard in self._shards:
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record(self, shard_no: int, row_no: int, fields: Optional[Sequence[str]]) -> Dict:
+        shard = self._shards[shard_no]
+        row = shard.rows[row_no]
+        if fields is None:
+            fields = list(row) + [field for field in shard.columns if field not in row]
+        record = {}
+        for field in fields:
+            if field in shard.columns:
+                value = shard.blob(field, row_no)
+                if value is not None:
+                    record[field] = value
+            elif field in row:
+                record[field] = row[field]
+        return record
+
+
+def convert(source: str, destination: str) -> int:
+    # Any scrape JSONL file or crawl shard directory; every field is kept
+    from data.corpus import iter_records
+
+    written = 0
+    with CorpusWriter(destination) as writer:
+        for record in iter_records(source, fields=None):
+            if record is None:
+                continue
+            writer.write(record)
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m data.corpus_store <olemiss_data.jsonl | crawl dir> <store dir>")
+        sys.exit(1)
+    count = convert(sys.argv[1], sys.argv[2])
+    print(f"Wrote {count} records to {sys.argv[2]}")
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Chunks per embedding request / bulk insert
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Embedding requests in flight at once
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+EMBED_BACKOFF_SECONDS = float(os.getenv("EMBED_BACKOFF_SECONDS", "2"))
+
+
+def is_rate_limited(error: Exception) -> bool:
+    message = f"{type(error).__name__} {error}".lower()
+    return "429" in message or "resourceexhausted" in message or "rate limit" in message or "quota" in message
+
+
+class EmbeddingPipeline:
+    """
+    Embeds (chunk_id, Document) pairs in batches with a fixed number of
+    concurrent requests and bulk-inserts the vectors with add_embeddings.
+
+    A 429 pauses every worker (not just the one that hit it) with exponential
+    backoff. A failed run keeps the batches it inserted; the ingest resumes by
+    diffing chunk ids against the store, and vectors that were embedded but
+    not inserted are read back from the embedding cache (CachedEmbeddings).
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        vector_store,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        max_retries: int = EMBED_MAX_RETRIES,
+    ):
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._cooldown_until = 0.0
+        self._insert_lock = asyncio.Lock()
+        self._error: Optional[BaseException] = None
+        self.stats: Dict[str, float] = {}
+
+    async def run(self, chunks: Iterable[Tuple[str, Document]]) -> Dict[str, float]:
+        start = time.perf_counter()
+        self.stats = {"embedded": 0, "batches": 0, "retries": 0}
+        self._error = None
+
+        # Workers pull batches from a bounded queue, so chunks stream in as they are consumed
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue, start)) for _ in range(self.concurrency)]
+
+        try:
+            pending = []
+            for chunk_id, doc in chunks:
+                if self._error:
+                    break
+                pending.append((chunk_id, doc))
+                if len(pending) == self.batch_size:
+                    await queue.put(pending)
+                    pending = []
+            if pending and not self._error:
+                await queue.put(pending)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+        if self._error:
+            raise self._error
+
+        elapsed = time.perf_counter() - start
+        self.stats["seconds"] = round(elapsed, 2)
+        self.stats["chunks_per_second"] = round(self.stats["embedded"] / elapsed, 1) if elapsed else 0.0
+        logger.info(
+            f"Embedded {self.stats['embedded']} chunks in {elapsed:.1f}s "
+            f"({self.stats['chunks_per_second']} chunks/s, {self.stats['retries']} retries)."
+        )
+        return self.stats
+
+    async def _worker(self, queue: asyncio.Queue, start: float):
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            if self._error:
+                # Another worker failed; drain the queue so the producer never blocks
+                continue
+            try:
+                await self._process(batch, start)
+            except Exception as e:
+                self._error = e
+
+    async def _process(self, batch: List[Tuple[str, Document]], start: float):
+        ids = [chunk_id for chunk_id, _ in batch]
+        texts = [doc.page_content for _, doc in batch]
+        metadatas = [doc.metadata for _, doc in batch]
+
+        vectors = await self._embed(texts)
+        async with self._insert_lock:
+            await asyncio.to_thread(self.vector_store.add_embeddings, texts, vectors, metadatas, ids)
+
+        self.stats["embedded"] += len(batch)
+        self.stats["batches"] += 1
+        elapsed = time.perf_counter() - start
+        logger.info(f"Embedded {self.stats['embedded']} chunks ({self.stats['embedded'] / elapsed:.1f} chunks/s).")
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            # Respect a cooldown started by any worker
+            wait = self._cooldown_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                delay = EMBED_BACKOFF_SECONDS * 2 ** attempt + random.uniform(0, 1)
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                self.stats["retries"] += 1
+                logger.warning(f"Rate limited; backing off {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}).")
@@ -1,7 +1,9 @@
-import json
 import os
 
-INPUT_FILE = "data/olemiss_data.jsonl"
+from data.corpus import count_records, iter_records
+
+# A scrape file, the crawler's shard directory (data/crawl) or a corpus store
+INPUT_FILE = os.getenv("PREVIEW_INPUT", "data/olemiss_data.jsonl")
 OUTPUT_FILE = "data/data_preview.md"
 
 def main():
@@ -9,38 +11,35 @@ def main():
         print(f"File {INPUT_FILE} not found.")
         return
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f_in, \
-         open(OUTPUT_FILE, "w", encoding="utf-8") as f_out:
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f_out:
         
         f_out.write("# Ole Miss Data Preview\n\n")
         f_out.write(f"Generated from `{INPUT_FILE}` for easier verification.\n\n")
         
-        lines = f_in.readlines()
-        f_out.write(f"**Total Records:** {len(lines)}\n\n")
+        # Counting lines is a cheap pass that keeps nothing in memory
+        f_out.write(f"**Total Records:** {count_records(INPUT_FILE)}\n\n")
         f_out.write("---\n\n")
 
-        for i, line in enumerate(lines):
-            try:
-                record = json.loads(line)
-                
-                # Header
-                f_out.write(f"## {i+1}. {record.get('title', 'No Title')}\n")
-                f_out.write(f"- **URL**: {record.get('url')}\n")
-                f_out.write(f"- **Type**: `{record.get('page_type')}`\n")
-                f_out.write(f"- **Fetched At**: {record.get('fetched_at')}\n\n")
-                
-                # Content Preview (Truncated if too long, or full?)
-                # Let's show full content but in a quote block or code block if it's markdown
-                f_out.write("### Content Preview:\n")
-                content = record.get('text_clean', '')
-                
-                # Add a visual separator for the content
-                f_out.write("> " + content.replace("\n", "\n> ") + "\n\n")
-                
-                f_out.write("---\n\n")
-                
-            except json.JSONDecodeError:
+        for i, record in enumerate(iter_records(INPUT_FILE)):
+            if record is None:
                 f_out.write(f"## Error reading line {i+1}\n\n---\n\n")
+                continue
+                
+            # Header
+            f_out.write(f"## {i+1}. {record.get('title', 'No Title')}\n")
+            f_out.write(f"- **URL**: {record.get('url')}\n")
+            f_out.write(f"- **Type**: `{record.get('page_type')}`\n")
+            f_out.write(f"- **Fetched At**: {record.get('fetched_at')}\n\n")
+            
+            # Content Preview (Truncated if too long, or full?)
+            # Let's show full content but in a quote block or code block if it's markdown
+            f_out.write("### Content Preview:\n")
+            content = record.get('text_clean', '')
+            
+            # Add a visual separator for the content
+            f_out.write("> " + content.replace("\n", "\n> ") + "\n\n")
+            
+            f_out.write("---\n\n")
 
     print(f"Preview generated at: {OUTPUT_FILE}")
 
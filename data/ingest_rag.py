@@ -1,119 +1,229 @@
 import os
-import json
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict
+import time
+from typing import Iterable, Iterator, Set
 
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_postgres import PGVector
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
 from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
 # Re-load env to ensure GOOGLE_API_KEY is picked up
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
 # Import DB URL
-from app.core.database import DATABASE_URL
+from app.core.database import DATABASE_URL, SessionLocal, async_engine
+from app.services.collection_versions import bump_collection_version
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.hybrid_retriever import ensure_fulltext_index
+from app.services.vector_index import ensure_vector_index
+from data.catalog_chunker import CatalogChunker
+from data.corpus import iter_records
+from data.embedding_pipeline import EmbeddingPipeline
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Config
-COLLECTION_NAME = "olemiss_knowledge_base"
+# Google embeddings are 768-d, so they live in their own collection (the old MiniLM one was "olemiss_knowledge_base")
+COLLECTION_NAME = "olemiss_knowledge_base_gemini"
 # Google's latest embedding model
 EMBEDDING_MODEL_NAME = "models/text-embedding-004" 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "olemiss_data.jsonl")
+# A scrape file, the crawler's shard directory (data/crawl) or a corpus store
+DATA_FILE = os.getenv("INGEST_DATA", os.path.join(os.path.dirname(__file__), "olemiss_data.jsonl"))
+# Local runs without API calls: deterministic fake vectors of the Gemini dimension
+USE_FAKE_EMBEDDINGS = os.getenv("INGEST_FAKE_EMBEDDINGS", "").lower() in ("1", "true", "yes")
+# "catalog" (one chunk per course entry / heading section) or "recursive" (the original fixed-size splitter)
+CHUNKER = os.getenv("INGEST_CHUNKER", "catalog").lower()
 
-def load_documents() -> List[Document]:
+def load_documents() -> Iterator[Document]:
+    # Generator: records are parsed and turned into Documents one line at a time
     logger.info(f"Loading data from {DATA_FILE}...")
-    docs = []
     if not os.path.exists(DATA_FILE):
         logger.error("Data file not found!")
-        return []
-
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                item = json.loads(line)
-                # Skip duplicate/empty content
-                text = item.get("text_clean", "")
-                if not text or len(text) < 50:
-                    continue
-                
-                # Metadata
-                metadata = {
-                    "source": item.get("source") or item.get("url"),
-                    "title": item.get("title"),
-                    "page_type": item.get("page_type"),
-                    "catalog_year": item.get("catalog_year")
-                }
-                
-                docs.append(Document(page_content=text, metadata=metadata))
-            except json.JSONDecodeError:
-                continue
-    
-    logger.info(f"Loaded {len(docs)} documents.")
-    return docs
-
-def chunk_documents(docs: List[Document]) -> List[Document]:
-    logger.info("Chunking documents...")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", " ", ""]
-    )
-    chunks = text_splitter.split_documents(docs)
-    logger.info(f"Created {len(chunks)} chunks.")
-    return chunks
-
-def ingest_vectors():
-    # 1. Load Data
-    raw_docs = load_documents()
-    if not raw_docs:
         return
-    
-    # 2. Chunk Data
-    chunks = chunk_documents(raw_docs)
-    
-    # 3. Create Embeddings (Google Gemini)
+
+    loaded = 0
+    for item in iter_records(DATA_FILE):
+        if item is None:
+            continue
+        # Skip duplicate/empty content
+        text = item.get("text_clean", "")
+        if not text or len(text) < 50:
+            continue
+
+        # Metadata
+        metadata = {
+            "source": item.get("source") or item.get("url"),
+            "title": item.get("title"),
+            "page_type": item.get("page_type"),
+            "catalog_year": item.get("catalog_year")
+        }
+
+        loaded += 1
+        yield Document(page_content=text, metadata=metadata)
+
+    logger.info(f"Loaded {loaded} documents.")
+
+def create_splitter(name: str = CHUNKER):
+    if name == "recursive":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            separators=["\n\n", "\n", " ", ""]
+        )
+    if name == "catalog":
+        return CatalogChunker()
+    raise ValueError(f"Unknown INGEST_CHUNKER {name!r}")
+
+def chunk_documents(docs: Iterable[Document], text_splitter=None) -> Iterator[Document]:
+    text_splitter = text_splitter or create_splitter()
+    created = 0
+    for doc in docs:
+        for chunk in text_splitter.split_documents([doc]):
+            created += 1
+            yield chunk
+    logger.info(f"Created {created} chunks.")
+
+def chunk_id(chunk: Document) -> str:
+    # Same page + same text => same ID, so unchanged chunks are recognised across runs
+    key = "\n".join([str(chunk.metadata.get("source")), str(chunk.metadata.get("catalog_year")), chunk.page_content])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def get_existing_ids(collection_name: str) -> Set[str]:
+    session = SessionLocal()
+    try:
+        rows = session.execute(
+            text(
+                "SELECT e.id FROM langchain_pg_embedding e "
+                "JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
+                "WHERE c.name = :name"
+            ),
+            {"name": collection_name},
+        )
+        return {row[0] for row in rows}
+    except SQLAlchemyError:
+        # First run: PGVector has not created its tables yet
+        session.rollback()
+        return set()
+    finally:
+        session.close()
+
+def create_embeddings():
+    if USE_FAKE_EMBEDDINGS:
+        logger.info("Using deterministic fake embeddings (INGEST_FAKE_EMBEDDINGS is set).")
+        return CachedEmbeddings(DeterministicFakeEmbedding(size=768))
+
     google_api_key = os.getenv("GOOGLE_API_KEY")
     if not google_api_key:
         logger.error("GOOGLE_API_KEY not found in environment!")
-        return
+        return None
 
     logger.info(f"Initializing Embedding Model: {EMBEDDING_MODEL_NAME} with Google API.")
-    embeddings = GoogleGenerativeAIEmbeddings(
+    # Chunks already embedded once (by any run, for any page) are read back from the cache table
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(
         model=EMBEDDING_MODEL_NAME,
         google_api_key=google_api_key
-    )
+    ))
+
+async def run_pipeline(pipeline: EmbeddingPipeline, chunks):
+    try:
+        await pipeline.run(chunks)
+    finally:
+        # The cache's async connections belong to this event loop
+        await async_engine.dispose()
+
+def ingest_vectors():
+    start = time.perf_counter()
+
+    # 1. First pass: hash every chunk; only the IDs are kept in memory
+    if not os.path.exists(DATA_FILE):
+        logger.error("Data file not found!")
+        return
+    wanted_ids = {chunk_id(chunk) for chunk in chunk_documents(load_documents())}
+    if not wanted_ids:
+        return
+    
+    # 2. Create Embeddings (Google Gemini)
+    embeddings = create_embeddings()
+    if embeddings is None:
+        return
     
-    # 4. Store in PGVector
+    # 3. Store in PGVector
     logger.info(f"Connecting to PGVector at: {DATABASE_URL.replace(':' + DATABASE_URL.split(':')[-1].split('@')[0], ':****')}") # Mask password
     
     connection_string = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://")
 
     try:
-        # Re-create the collection (this handles overwrite/append, but for clean start we assume it's fine)
-        # Note: If dimensions differ (Google is 768 vs MiniLM 384), this MIGHT error on existing table.
-        # Best practice: Drop table first if switching models, but PGVector might handle it if collection name is same but table structure... 
-        # Actually, PGVector implementation stores vectors in `langchain_pg_embedding`. 
-        # If we switch dimensions, we MUST drop the table or use a different collection name.
-        # Strategy: Use a NEW collection name to be safe.
-        
-        NEW_COLLECTION_NAME = "olemiss_knowledge_base_gemini"
-        
         vector_store = PGVector(
             embeddings=embeddings,
-            collection_name=NEW_COLLECTION_NAME,
+            collection_name=COLLECTION_NAME,
             connection=connection_string,
             use_jsonb=True,
         )
-        
-        # Add documents (chunks)
-        logger.info(f"Adding documents to vector store '{NEW_COLLECTION_NAME}'...")
-        vector_store.add_documents(chunks)
-        logger.info("Successfully ingested vectors with Google Gemini!")
+
+        # 4. Diff against what is already stored
+        existing_ids = get_existing_ids(COLLECTION_NAME)
+        new_ids = wanted_ids - existing_ids
+        stale_ids = sorted(existing_ids - wanted_ids)
+        unchanged = len(wanted_ids) - len(new_ids)
+        logger.info(f"{len(wanted_ids)} unique chunks: {len(new_ids)} new, {len(stale_ids)} stale, {unchanged} unchanged.")
+
+        # 5. Second pass: stream only the new/changed chunks into the embedding pipeline,
+        #    then drop the stale ones (adding first means a question never sees a page with no chunks)
+        changed_sources: Set[str] = set()
+
+        def new_chunks():
+            pending = set(new_ids)
+            for chunk in chunk_documents(load_documents()):
+                content_hash = chunk_id(chunk)
+                if content_hash not in pending:
+                    continue
+                # Identical chunks are embedded once
+                pending.discard(content_hash)
+                chunk.metadata["content_hash"] = content_hash
+                changed_sources.add(chunk.metadata.get("source") or "")
+                yield content_hash, chunk
+
+        if new_ids:
+            embeddings.ensure_store()
+            pipeline = EmbeddingPipeline(embeddings, vector_store)
+            asyncio.run(run_pipeline(pipeline, new_chunks()))
+            logger.info(f"Embedding cache: {embeddings.stats()}")
+        if stale_ids:
+            vector_store.delete(ids=stale_ids)
+
+        for source in sorted(changed_sources):
+            logger.info(f"  changed: {source}")
+        logger.info(
+            f"Ingest finished in {time.perf_counter() - start:.1f}s: "
+            f"added {len(new_ids)}, deleted {len(stale_ids)}, unchanged {unchanged} "
+            f"({len(changed_sources)} pages changed)."
+        )
+
+        changed = bool(new_ids or stale_ids)
+        if not changed:
+            logger.info(f"Collection '{COLLECTION_NAME}' is already up to date.")
+
+        session = SessionLocal()
+        try:
+            # Every run: creates indexes a collection ingested before they existed is missing
+            ensure_fulltext_index(session)
+            # Chunks changed: (re)build the ANN index for the new contents
+            ensure_vector_index(session, rebuild=changed)
+            if changed:
+                # Tell running API processes to drop answers cached from the old collection
+                version = bump_collection_version(session, COLLECTION_NAME)
+                logger.info(f"Collection '{COLLECTION_NAME}' is now at version {version}.")
+        finally:
+            session.close()
         
     except Exception as e:
         logger.error(f"Failed to ingest vectors: {e}")
@@ -1,95 +1,136 @@
 import os
 import json
-import asyncio
-from sqlalchemy.future import select
+import time
+from glob import glob
+from typing import Dict, Iterator, List
+
 from app.core.database import SessionLocal, engine, Base
-from app.models.course import Course, DegreePlan
+from app.models.course import CatalogPolicy, Course, DegreePlan, DegreeRequirement
+from app.services.bulk_upsert import UpsertResult, upsert_rows
+from app.services.prereq_parser import parse_prerequisites
+from app.services.requirement_tables import sync_requirements
 
-# Import for filesystem traversal
-BASE_DATA_DIR = os.path.join(os.path.dirname(__file__), "olemiss", "bscs", "2024_2025")
+# One directory per program and catalog year: data/olemiss/<program>/<year>/
+CATALOG_DATA_DIR = os.path.join(os.path.dirname(__file__), "olemiss")
 
 def init_db():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist; the plan upsert needs its unique index
+    for index in DegreePlan.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
     print("Tables created.")
 
-def ingest_courses():
-    session = SessionLocal()
-    try:
-        courses_file = os.path.join(BASE_DATA_DIR, "csci_courses_full.json")
-        if not os.path.exists(courses_file):
-            print(f"File not found: {courses_file}")
-            return
-
-        with open(courses_file, "r", encoding="utf-8") as f:
-            courses_data = json.load(f)
-
-        print(f"Found {len(courses_data)} courses. Ingesting...")
-        
-        for c_data in courses_data:
-            # Extract code from title (e.g., "CIS 111: ...")
-            title_parts = c_data["title"].split(":", 1)
-            code = title_parts[0].strip()
-            title = title_parts[1].strip() if len(title_parts) > 1 else c_data["title"]
-            
-            # Check if exists
-            existing = session.query(Course).filter(Course.course_code == code).first()
-            if not existing:
-                new_course = Course(
-                    course_code=code,
-                    title=title,
-                    credits=int(c_data["credits"]) if c_data["credits"].isdigit() else 3, # Default to 3 if weird
-                    description=c_data["description"],
-                    prerequisites_raw=c_data["prerequisites"],
-                    metadata_json=c_data
-                )
-                session.add(new_course)
-        
-        session.commit()
-        print("Courses ingested successfully.")
+def iter_catalog_dirs(data_dir: str = CATALOG_DATA_DIR) -> Iterator[str]:
+    for path in sorted(glob(os.path.join(data_dir, "*", "*"))):
+        if os.path.isdir(path):
+            yield path
 
-    except Exception as e:
-        print(f"Error ingesting courses: {e}")
-        session.rollback()
-    finally:
-        session.close()
+def read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def catalog_year_of(catalog_dir: str, data: Dict) -> str:
+    # Files name their catalog year; the directory (2024_2025) is the fallback
+    return data.get("catalog_year") or os.path.basename(catalog_dir).replace("_", "-")
+
+def course_row(c_data: Dict) -> Dict:
+    # Extract code from title (e.g., "CIS 111: ...")
+    title_parts = c_data["title"].split(":", 1)
+    code = title_parts[0].strip()
+    title = title_parts[1].strip() if len(title_parts) > 1 else c_data["title"]
+
+    # Compile the free-text prerequisites once here so the API never re-parses them
+    metadata = dict(c_data)
+    metadata["prerequisite_ast"] = parse_prerequisites(c_data["prerequisites"], code)
+    return {
+        "course_code": code,
+        "title": title,
+        "credits": int(c_data["credits"]) if c_data["credits"].isdigit() else 3, # Default to 3 if weird
+        "description": c_data["description"],
+        "prerequisites_raw": c_data["prerequisites"],
+        "metadata_json": metadata,
+    }
+
+def load_catalog_rows(data_dir: str = CATALOG_DATA_DIR) -> Dict[str, List[Dict]]:
+    """
+    Reads every catalog directory into rows per table. Courses come from
+    *courses_full.json (catalog scrapes), plans from four_year_plan.json,
+    requirements from degree_requirements*.json and policies from
+    policies.json plus the "policies" of requirement files. A course listed
+    by several catalogs keeps its last (newest) entry.
+    """
+    rows: Dict[str, List[Dict]] = {"courses": [], "degree_plans": [], "degree_requirements": [], "policies": []}
+    for catalog_dir in iter_catalog_dirs(data_dir):
+        for path in sorted(glob(os.path.join(catalog_dir, "*courses_full.json"))):
+            rows["courses"].extend(course_row(c_data) for c_data in read_json(path))
+
+        plan_file = os.path.join(catalog_dir, "four_year_plan.json")
+        if os.path.exists(plan_file):
+            plan_data = read_json(plan_file)
+            catalog_year = catalog_year_of(catalog_dir, plan_data)
+            rows["degree_plans"].append({
+                "name": f"{plan_data.get('program', 'BSCS')} {catalog_year}",
+                "catalog_year": catalog_year,
+                "plan_structure": plan_data.get("plan"),
+            })
+
+        for path in sorted(glob(os.path.join(catalog_dir, "degree_requirements*.json"))):
+            requirements = read_json(path)
+            rows["degree_requirements"].append({
+                "program": requirements["program"],
+                "catalog_year": catalog_year_of(catalog_dir, requirements),
+                "min_total_credits": requirements.get("min_total_credits"),
+                "blocks": requirements.get("blocks", {}),
+            })
+
+        for path in sorted(glob(os.path.join(catalog_dir, "degree_requirements*.json"))) + [os.path.join(catalog_dir, "policies.json")]:
+            if not os.path.exists(path):
+                continue
+            data = read_json(path)
+            rows["policies"].extend(
+                {"program": data["program"], "catalog_year": catalog_year_of(catalog_dir, data), "key": key, "value": value}
+                for key, value in data.get("policies", {}).items()
+            )
+    return rows
+
+def ingest_catalog(data_dir: str = CATALOG_DATA_DIR) -> Dict[str, UpsertResult]:
+    start = time.perf_counter()
+    rows = load_catalog_rows(data_dir)
+    print(f"Found {len(rows['courses'])} courses, {len(rows['degree_plans'])} degree plans, "
+          f"{len(rows['degree_requirements'])} requirement sets and {len(rows['policies'])} policies. Ingesting...")
 
-def ingest_degree_plan():
     session = SessionLocal()
+    results: Dict[str, UpsertResult] = {}
     try:
-        plan_file = os.path.join(BASE_DATA_DIR, "four_year_plan.json")
-        if not os.path.exists(plan_file):
-            print(f"File not found: {plan_file}")
-            return
-
-        with open(plan_file, "r", encoding="utf-8") as f:
-            plan_data = json.load(f)
-
-        plan_name = f"{plan_data.get('program', 'BSCS')} {plan_data.get('catalog_year', 'Unknown')}"
-        
-        # Check if exists
-        existing = session.query(DegreePlan).filter(DegreePlan.name == plan_name).first()
-        if not existing:
-            new_plan = DegreePlan(
-                name=plan_name,
-                catalog_year=plan_data.get("catalog_year"),
-                plan_structure=plan_data.get("plan")
-            )
-            session.add(new_plan)
-            print(f"Ingested Degree Plan: {plan_name}")
-        else:
-            print(f"Degree Plan {plan_name} already exists.")
-            
+        # One transaction: the API never sees a half-loaded catalog
+        results["courses"] = upsert_rows(session, Course, rows["courses"], ["course_code"])
+        results["degree_plans"] = upsert_rows(session, DegreePlan, rows["degree_plans"], ["name"])
+        results["degree_requirements"] = upsert_rows(session, DegreeRequirement, rows["degree_requirements"], ["program", "catalog_year"])
+        results["policies"] = upsert_rows(session, CatalogPolicy, rows["policies"], ["program", "catalog_year", "key"])
+        # Normalized requirement rows of the plans and requirement sets just written
+        requirement_counts = sync_requirements(
+            session,
+            plan_names=[name for (name,) in results["degree_plans"].written],
+            requirement_set_keys=results["degree_requirements"].written,
+        )
         session.commit()
-
     except Exception as e:
-        print(f"Error ingesting degree plan: {e}")
+        print(f"Error ingesting catalog data: {e}")
+        session.rollback()
+        return {}
     finally:
         session.close()
 
+    for table, result in results.items():
+        print(f"{table}: {result}")
+    print(f"requirements: rebuilt for {requirement_counts['plans']} plans and {requirement_counts['requirement_sets']} requirement sets "
+          f"({requirement_counts['requirements']} requirements, {requirement_counts['options']} options, {requirement_counts['prefixes']} prefixes)")
+    print(f"Catalog ingested in {time.perf_counter() - start:.2f}s.")
+    return results
+
 if __name__ == "__main__":
     # Ensure we are in the root directory context for imports to work if running as script from root
     # But for simplicity, we assume this is run via `python -m data.ingest_structured` from root
     init_db()
-    ingest_courses()
-    ingest_degree_plan()
+    ingest_catalog()
@@ -1,8 +1,18 @@
 import asyncio
+import datetime
+import hashlib
 import json
 import os
-import datetime
-from crawl4ai import AsyncWebCrawler
+import urllib.robotparser
+from collections import Counter
+from contextlib import asynccontextmanager
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+import httpx
+
+from data.corpus import SHARD_RE, shard_paths
 
 # Comprehensive List of URLs to Scrape
 URLS_TO_SCRAPE = [
@@ -43,8 +53,52 @@ URLS_TO_SCRAPE = [
     {"url": "https://www.honors.olemiss.edu/admissions/requirements/", "type": "program"}, # Added Honors
 ]
 
-OUTPUT_DIR = "data"
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, "olemiss_data.jsonl")
+# Pages, crawl state and shards live here; ingest with INGEST_DATA=data/crawl
+CRAWL_DIR = os.getenv("SCRAPER_CRAWL_DIR", os.path.join(os.path.dirname(__file__), "crawl"))
+# Links are followed only under these prefixes (seed URLs are always fetched)
+ALLOWED_PREFIXES = [prefix for prefix in os.getenv("SCRAPER_ALLOWED_PREFIXES", "https://catalog.olemiss.edu/").split(",") if prefix]
+# Pages fetched at once across all hosts
+CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "8"))
+# Politeness: requests in flight per host and seconds between request starts
+# to one host (raised to the host's robots.txt Crawl-delay)
+HOST_CONCURRENCY = int(os.getenv("SCRAPER_HOST_CONCURRENCY", "2"))
+HOST_DELAY = float(os.getenv("SCRAPER_HOST_DELAY", "1.0"))
+# Frontier bounds: link hops from a seed, and pages known in total
+MAX_DEPTH = int(os.getenv("SCRAPER_MAX_DEPTH", "3"))
+MAX_PAGES = int(os.getenv("SCRAPER_MAX_PAGES", "500"))
+# Attempts per page on timeouts, 429 and 5xx, backing off exponentially
+RETRIES = int(os.getenv("SCRAPER_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("SCRAPER_RETRY_BACKOFF", "2.0"))
+TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "30"))
+# A new shard is started once the current one reaches this size
+SHARD_MAX_BYTES = int(os.getenv("SCRAPER_SHARD_MAX_BYTES", str(16 * 1024 * 1024)))
+# Raw HTML is ~10x the markdown and nothing downstream reads it
+KEEP_HTML = os.getenv("SCRAPER_KEEP_HTML", "").lower() in ("1", "true", "yes")
+CATALOG_YEAR = os.getenv("SCRAPER_CATALOG_YEAR", "2024-2025")
+USER_AGENT = "olemiss-advisor-crawler/1.0"
+
+
+def now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+def canonical_url(url: str) -> str:
+    # One frontier entry per page: no fragment, lower-case scheme and host, "/" for an empty path
+    parts = urlsplit(urldefrag(url)[0])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def guess_page_type(url: str, parent_type: str) -> str:
+    # Discovered pages inherit the type of the page linking to them unless the URL says otherwise
+    path = urlsplit(url).path.rstrip("/")
+    if path == "/courses":
+        return "course_index"
+    if path.endswith("/courses"):
+        return "course_list"
+    if "/regulations" in path:
+        return "regulation"
+    return parent_type
+
 
 def extract_course_metadata(text, url):
     """
@@ -58,46 +112,372 @@ def extract_course_metadata(text, url):
         metadata["is_course_page"] = True
     return metadata
 
+
+def html_to_markdown(html: str, url: str) -> str:
+    # crawl4ai's markdown generator without its browser: the page is already fetched.
+    # Imported here so a Crawler given its own to_markdown does not need crawl4ai.
+    from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+    return DefaultMarkdownGenerator().generate_markdown(html, base_url=url).raw_markdown
+
+
+class PageParser(HTMLParser):
+    """Collects the <title> and every <a href> of a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.links: List[str] = []
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+
+def _open_append(path: str):
+    # A crash can leave half a line at the end; start on a fresh line so only that one is lost
+    torn = os.path.exists(path) and os.path.getsize(path) > 0
+    if torn:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+    f = open(path, "a", encoding="utf-8")
+    if torn:
+        f.write("\n")
+    return f
+
+
+class CrawlState:
+    """
+    Per-URL crawl state (status, depth, page type, ETag / Last-Modified,
+    content hash) kept as an append-only journal, so an interrupted crawl
+    resumes with the pages it had not finished. Compacted to one line per
+    URL when a run completes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pages: Dict[str, Dict] = {}
+        self.complete = True
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if "run" in entry:
+                        self.complete = entry["run"] == "complete"
+                    else:
+                        self.pages.setdefault(entry["url"], {}).update(entry)
+        self._journal = _open_append(path)
+
+    def update(self, url: str, **fields):
+        self.pages.setdefault(url, {"url": url}).update(fields)
+        self._write({"url": url, **fields})
+
+    def mark_run(self, event: str):
+        self.complete = event == "complete"
+        self._write({"run": event, "at": now()})
+
+    def compact(self):
+        self._journal.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for page in self.pages.values():
+                f.write(json.dumps(page) + "\n")
+            f.write(json.dumps({"run": "complete", "at": now()}) + "\n")
+        os.replace(tmp_path, self.path)
+        self.complete = True
+        self._journal = _open_append(self.path)
+
+    def close(self):
+        self._journal.close()
+
+    def _write(self, entry: Dict):
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+
+
+class ShardWriter:
+    """Appends page records to pages-NNNNN.jsonl, starting a new shard past `max_bytes`."""
+
+    def __init__(self, directory: str, max_bytes: int = SHARD_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        shards = shard_paths(directory)
+        self.index = int(SHARD_RE.match(os.path.basename(shards[-1])).group(1)) if shards else 0
+        self._file = _open_append(self._path())
+
+    def write(self, record: Dict) -> str:
+        if self._file.tell() >= self.max_bytes:
+            self._file.close()
+            self.index += 1
+            self._file = _open_append(self._path())
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        return os.path.basename(self._path())
+
+    def close(self):
+        self._file.close()
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, f"pages-{self.index:05d}.jsonl")
+
+
+class HostGate:
+    """Per-host politeness: bounded concurrency, spaced request starts, robots.txt."""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.delay = delay
+        self._slots = asyncio.Semaphore(concurrency)
+        self._spacing = asyncio.Lock()
+        self._next_start = 0.0
+        self._robots: Optional[urllib.robotparser.RobotFileParser] = None
+        self._robots_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._slots:
+            async with self._spacing:
+                loop = asyncio.get_running_loop()
+                wait = self._next_start - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = loop.time() + self.delay
+            yield
+
+    async def allowed(self, client: httpx.AsyncClient, url: str) -> bool:
+        async with self._robots_lock:
+            if self._robots is None:
+                self._robots = await self._load_robots(client, url)
+        return self._robots.can_fetch(USER_AGENT, url)
+
+    async def _load_robots(self, client: httpx.AsyncClient, url: str) -> urllib.robotparser.RobotFileParser:
+        parts = urlsplit(url)
+        robots = urllib.robotparser.RobotFileParser()
+        try:
+            async with self.slot():
+                response = await client.get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+        except httpx.HTTPError:
+            response = None
+        # Same conventions as RobotFileParser.read(): 401/403 forbid everything, other errors allow it
+        if response is not None and response.status_code in (401, 403):
+            robots.disallow_all = True
+        elif response is not None and response.status_code == 200:
+            robots.parse(response.text.splitlines())
+            crawl_delay = robots.crawl_delay(USER_AGENT)
+            if crawl_delay:
+                self.delay = max(self.delay, float(crawl_delay))
+        else:
+            robots.parse([])
+        return robots
+
+
+class Crawler:
+    """
+    Crawls from the seed URLs, following links under `allowed_prefixes`.
+    Pages already crawled are re-fetched conditionally (If-None-Match /
+    If-Modified-Since); a page is appended to the shards only when it is new
+    or its markdown changed, so the shards are an append-only history and
+    readers take the latest record per URL (data/corpus.py).
+    """
+
+    def __init__(
+        self,
+        seeds: List[Dict[str, str]] = URLS_TO_SCRAPE,
+        crawl_dir: str = CRAWL_DIR,
+        allowed_prefixes: List[str] = ALLOWED_PREFIXES,
+        concurrency: int = CONCURRENCY,
+        host_concurrency: int = HOST_CONCURRENCY,
+        host_delay: float = HOST_DELAY,
+        max_depth: int = MAX_DEPTH,
+        max_pages: int = MAX_PAGES,
+        to_markdown: Callable[[str, str], str] = html_to_markdown,
+    ):
+        self.seeds = seeds
+        self.crawl_dir = crawl_dir
+        self.allowed_prefixes = tuple(allowed_prefixes)
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.host_delay = host_delay
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.to_markdown = to_markdown
+        self.stats: Counter = Counter()
+        self._gates: Dict[str, HostGate] = {}
+
+    async def run(self) -> Counter:
+        os.makedirs(self.crawl_dir, exist_ok=True)
+        self.state = CrawlState(os.path.join(self.crawl_dir, "state.jsonl"))
+        self.writer = ShardWriter(self.crawl_dir)
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+        # 1. A finished crawl starts a new run that re-checks every known page;
+        #    an interrupted one resumes with the pages still pending
+        if self.state.complete:
+            self.state.mark_run("start")
+            for seed in self.seeds:
+                self.state.update(canonical_url(seed["url"]), status="pending", depth=0, page_type=seed["type"])
+            for url, page in self.state.pages.items():
+                if page.get("status") != "pending":
+                    self.state.update(url, status="pending")
+        pending = [url for url, page in self.state.pages.items() if page.get("status") == "pending"]
+        print(f"Crawling {len(pending)} pending pages ({len(self.state.pages)} known) into {self.crawl_dir}...")
+        for url in pending:
+            self.queue.put_nowait(url)
+
+        # 2. Workers drain the frontier; discovered links are queued as they are found
+        try:
+            async with httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT, follow_redirects=True) as client:
+                workers = [asyncio.create_task(self._worker(client)) for _ in range(self.concurrency)]
+                try:
+                    await self.queue.join()
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+
+            # 3. Only a drained frontier completes the run
+            self.state.compact()
+        finally:
+            self.writer.close()
+            self.state.close()
+        return self.stats
+
+    async def _worker(self, client: httpx.AsyncClient):
+        while True:
+            url = await self.queue.get()
+            try:
+                await self._crawl(client, url)
+            except Exception as e:
+                print(f"Failed to scrape: {url} - Error: {e}")
+                self.state.update(url, status="failed", error=str(e), checked_at=now())
+                self.stats["failed"] += 1
+            finally:
+                self.queue.task_done()
+
+    async def _crawl(self, client: httpx.AsyncClient, url: str):
+        page = self.state.pages[url]
+        gate = self._gate(url)
+        if not await gate.allowed(client, url):
+            self.state.update(url, status="disallowed", checked_at=now())
+            self.stats["disallowed"] += 1
+            return
+
+        headers = {}
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+        response = await self._fetch(client, gate, url, headers)
+
+        if response.status_code == 304:
+            # Its links were followed when it last changed
+            self.state.update(url, status="not_modified", checked_at=now())
+            self.stats["not_modified"] += 1
+            return
+        if response.status_code in (404, 410):
+            self.state.update(url, status="gone", checked_at=now())
+            self.stats["gone"] += 1
+            return
+        response.raise_for_status()
+        if "html" not in response.headers.get("content-type", ""):
+            # PDFs (e.g. the 4-year plan) need their own extraction
+            self.state.update(url, status="skipped", checked_at=now())
+            self.stats["skipped"] += 1
+            return
+
+        final_url = str(response.url)
+        html = response.text
+        parser = PageParser()
+        parser.feed(html)
+        markdown = self.to_markdown(html, final_url)
+        links = list(dict.fromkeys(
+            canonical_url(urljoin(final_url, href)) for href in parser.links
+            if urlsplit(urljoin(final_url, href)).scheme in ("http", "https")
+        ))
+        content_hash = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+        # The record goes to disk before the state says so
+        if content_hash == page.get("content_hash"):
+            self.stats["unchanged"] += 1
+        else:
+            record = {
+                "url": final_url,
+                "title": " ".join(parser.title.split()) or "Ole Miss Academic Data",
+                "page_type": page["page_type"],
+                "fetched_at": now(),
+                "catalog_year": CATALOG_YEAR,
+                "text_clean": markdown,
+                "links_out": [link for link in links if urlsplit(link).netloc == urlsplit(final_url).netloc],
+                "course_metadata": extract_course_metadata(markdown, final_url),
+            }
+            if KEEP_HTML:
+                record["html_raw"] = html
+            shard = self.writer.write(record)
+            self.stats["changed" if page.get("content_hash") else "new"] += 1
+            print(f"Successfully scraped: {final_url} -> {shard}")
+        self.state.update(
+            url,
+            status="fetched",
+            content_hash=content_hash,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            checked_at=now(),
+        )
+
+        for link in links:
+            self._discover(link, page["depth"] + 1, guess_page_type(link, page["page_type"]))
+
+    async def _fetch(self, client: httpx.AsyncClient, gate: HostGate, url: str, headers: Dict[str, str]) -> httpx.Response:
+        for attempt in range(1, RETRIES + 1):
+            backoff = RETRY_BACKOFF * 2 ** (attempt - 1)
+            try:
+                async with gate.slot():
+                    response = await client.get(url, headers=headers)
+                if attempt == RETRIES or (response.status_code != 429 and response.status_code < 500):
+                    return response
+                # A throttling server says how long to wait
+                retry_after = response.headers.get("retry-after", "")
+                if retry_after.isdigit():
+                    backoff = max(backoff, float(retry_after))
+            except httpx.TransportError:
+                if attempt == RETRIES:
+                    raise
+            await asyncio.sleep(backoff)
+
+    def _discover(self, url: str, depth: int, page_type: str):
+        if url in self.state.pages or depth > self.max_depth or len(self.state.pages) >= self.max_pages:
+            return
+        if not url.startswith(self.allowed_prefixes):
+            return
+        self.state.update(url, status="pending", depth=depth, page_type=page_type)
+        self.queue.put_nowait(url)
+
+    def _gate(self, url: str) -> HostGate:
+        host = urlsplit(url).netloc
+        if host not in self._gates:
+            self._gates[host] = HostGate(self.host_concurrency, self.host_delay)
+        return self._gates[host]
+
+
 async def main():
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    print(f"Starting scrape of {len(URLS_TO_SCRAPE)} pages...")
-    
-    async with AsyncWebCrawler(verbose=True) as crawler:
-        # Extract just the URLs for the crawler
-        urls = [item["url"] for item in URLS_TO_SCRAPE]
-        results = await crawler.arun_many(urls)
-        
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            for i, result in enumerate(results):
-                original_item = URLS_TO_SCRAPE[i]
-                
-                if result.success:
-                    print(f"Successfully scraped: {result.url}")
-                    
-                    # 1. Basic Metadata
-                    record = {
-                        "url": result.url,
-                        "title": "Ole Miss Academic Data", # Ideally extract from HTML title
-                        "page_type": original_item["type"],
-                        "fetched_at": datetime.datetime.now().isoformat(),
-                        "catalog_year": "2024-2025", # Default assumption, or extract from text
-                        
-                        # 2. Content
-                        "text_clean": result.markdown, # Markdown is best for RAG
-                        "html_raw": result.html,       # Keep raw just in case
-                        
-                        # 3. Links (Graph Building)
-                        "links_out": [link['href'] for link in result.links.get('internal', [])],
-                        
-                        # 4. Course Specifics (Placeholder)
-                        "course_metadata": extract_course_metadata(result.markdown, result.url)
-                    }
-                    
-                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
-                else:
-                    print(f"Failed to scrape: {result.url} - Error: {result.error_message}")
-
-    print(f"Scraping complete! Data saved to {OUTPUT_FILE}")
+    stats = await Crawler().run()
+    print(f"Crawl complete: {dict(stats)}")
+    print(f"Pages saved to {CRAWL_DIR}; ingest them with INGEST_DATA={CRAWL_DIR}")
 
 if __name__ == "__main__":
     asyncio.run(main())